@@ -6,6 +6,7 @@ from django.contrib.auth.forms import ReadOnlyPasswordHashField
 from django.core.exceptions import ValidationError
 
 from .models import Company, CustomUser, Worker, FormType, FormSubmission, Experiment, ExperimentFile
+from .submissions import delete_worker_submissions
 
 # 公司創建表單
 class CompanyCreationForm(forms.ModelForm):
@@ -95,6 +96,15 @@ class CompanyAdmin(admin.ModelAdmin):
     def has_add_permission(self, request):
         # 只有超級管理員和超級用戶可以添加公司
         return request.user.is_superuser or getattr(request.user, 'role', None) == 'superadmin'
+    
+    def delete_model(self, request, obj):
+        # 先以 SQL 分批刪除所屬勞工的提交記錄，連帶刪除時不逐筆載入
+        delete_worker_submissions(Worker.objects.filter(company=obj).values_list('id', flat=True))
+        super().delete_model(request, obj)
+    
+    def delete_queryset(self, request, queryset):
+        delete_worker_submissions(Worker.objects.filter(company__in=queryset).values_list('id', flat=True))
+        super().delete_queryset(request, queryset)
 
 # 自定義用戶管理界面
 class CustomUserAdmin(UserAdmin):
@@ -125,13 +135,23 @@ class WorkerAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         queryset = super().get_queryset(request)
         return queryset.select_related('company')
+    
+    def delete_model(self, request, obj):
+        # 先以 SQL 分批刪除提交記錄，連帶刪除時不逐筆載入
+        delete_worker_submissions([obj.id])
+        super().delete_model(request, obj)
+    
+    def delete_queryset(self, request, queryset):
+        delete_worker_submissions(queryset.values_list('id', flat=True))
+        super().delete_queryset(request, queryset)
 
 # 表單類型管理界面
 @admin.register(FormType)
 class FormTypeAdmin(admin.ModelAdmin):
-    list_display = ['name', 'is_required_first_time', 'is_required_subsequent']
+    list_display = ['name', 'is_required_first_time', 'is_required_subsequent', 'schema_version']
     list_filter = ['is_required_first_time', 'is_required_subsequent']
     search_fields = ['name', 'description']
+    readonly_fields = ['schema_version', 'schema_hash']
     ordering = ['name']
 
 # 表單提交管理界面
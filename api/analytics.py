@@ -0,0 +1,267 @@
+# backend/app/analytics.py
+"""疲勞指標統計分析
+
+以一次查詢取得公司所有主要指標分數（SubmissionScore），
+載入為 pandas DataFrame 後以向量化運算計算：
+各階段平均、每日趨勢、同日早晚變化量，以及各勞工相對於群體的 z 分數。
+
+填寫完成率則在資料庫以 GROUP BY 彙總，不逐一查詢勞工。
+"""
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .models import FormSubmission, SubmissionScore, Worker
+from .scoring import primary_metric_names
+from .stages import STAGE_NAMES, STAGE_REQUIREMENTS, determine_current_stage
+from . import archive
+
+FRAME_COLUMNS = ['submission_id', 'worker_id', 'stage', 'submission_time', 'metric', 'value']
+
+ANALYTICS_CACHE_PREFIX = 'analytics:cohort'
+COMPLIANCE_CACHE_PREFIX = 'analytics:compliance'
+
+
+def load_score_frame(company_id, start=None, end=None, metrics=None):
+    """以一次查詢載入公司的分數資料（含已封存的分數）
+
+    start / end 為當地日期（含），metrics 未指定時為各表單類型的主要指標，
+    回傳欄位見 FRAME_COLUMNS，另加上當地日期欄位 date
+    """
+    if metrics is None:
+        metrics = primary_metric_names()
+    scores = SubmissionScore.objects.filter(
+        submission__worker__company_id=company_id,
+        metric__in=metrics
+    )
+    if start:
+        scores = scores.filter(submission__submission_time__date__gte=start)
+    if end:
+        scores = scores.filter(submission__submission_time__date__lte=end)
+
+    rows = list(scores.values_list(
+        'submission_id', 'submission__worker_id', 'submission__stage',
+        'submission__submission_time', 'metric', 'value'
+    ))
+    # 已封存的分數（只讀取範圍內有封存檔的月份）
+    rows.extend(archive.score_rows(company_id, start, end, metrics))
+    frame = pd.DataFrame.from_records(rows, columns=FRAME_COLUMNS)
+    frame['submission_time'] = pd.to_datetime(frame['submission_time'], utc=True)
+    frame['date'] = frame['submission_time'].dt.tz_convert(settings.TIME_ZONE).dt.normalize().dt.date
+    frame['metric'] = frame['metric'].astype('category')
+    return frame
+
+
+def _records(frame):
+    """DataFrame 轉為可 JSON 序列化的列表（NaN 轉為 None）"""
+    frame = frame.astype(object).where(pd.notna(frame), None)
+    for column in frame.columns:
+        if column == 'date':
+            frame[column] = frame[column].map(lambda value: value.isoformat() if value else None)
+    return frame.to_dict(orient='records')
+
+
+def stage_means(frame):
+    """各指標在各階段的平均、標準差與筆數"""
+    summary = frame.groupby(['metric', 'stage'], observed=True)['value'].agg(['mean', 'std', 'count'])
+    return _records(summary.reset_index())
+
+
+def daily_trend(frame):
+    """各指標每日的平均與填寫人數"""
+    summary = frame.groupby(['metric', 'date'], observed=True).agg(
+        mean=('value', 'mean'),
+        workers=('worker_id', 'nunique')
+    )
+    return _records(summary.reset_index())
+
+
+def within_day_deltas(frame):
+    """同一勞工同一天內，最晚階段與最早階段的分數差（例如早上到晚上）
+
+    只計算當天有兩個以上階段的資料，回傳各指標的平均變化量與各勞工的平均變化量
+    """
+    by_stage = frame.pivot_table(
+        index=['metric', 'worker_id', 'date'],
+        columns='stage',
+        values='value',
+        aggfunc='mean',
+        observed=True
+    )
+    by_stage = by_stage[by_stage.count(axis=1) >= 2]
+    if by_stage.empty:
+        return {'metrics': [], 'workers': []}
+
+    # 往右填補後取最後一欄為最晚階段，往左填補後取第一欄為最早階段
+    first = by_stage.bfill(axis=1).iloc[:, 0]
+    last = by_stage.ffill(axis=1).iloc[:, -1]
+    deltas = (last - first).rename('delta').reset_index()
+
+    metrics = deltas.groupby('metric', observed=True)['delta'].agg(['mean', 'std', 'count'])
+    workers = deltas.groupby(['metric', 'worker_id'], observed=True)['delta'].agg(['mean', 'count'])
+    return {
+        'metrics': _records(metrics.reset_index()),
+        'workers': _records(workers.reset_index()),
+    }
+
+
+def worker_zscores(frame):
+    """各勞工相對於公司群體的 z 分數
+
+    每筆分數先以該指標的群體平均與標準差標準化，再取各勞工的平均
+    """
+    grouped = frame.groupby('metric', observed=True)['value']
+    std = grouped.transform('std').replace(0, np.nan)
+    frame = frame.assign(z=(frame['value'] - grouped.transform('mean')) / std)
+    summary = frame.groupby(['metric', 'worker_id'], observed=True).agg(
+        mean=('value', 'mean'),
+        z=('z', 'mean'),
+        count=('value', 'count')
+    )
+    return _records(summary.reset_index())
+
+
+def cohort_analysis(company_id, start=None, end=None):
+    """計算公司的群體統計結果"""
+    frame = load_score_frame(company_id, start, end)
+    if frame.empty:
+        return {
+            'total_scores': 0,
+            'stage_means': [],
+            'daily_trend': [],
+            'within_day_deltas': {'metrics': [], 'workers': []},
+            'worker_zscores': [],
+        }
+    return {
+        'total_scores': len(frame),
+        'stage_means': stage_means(frame),
+        'daily_trend': daily_trend(frame),
+        'within_day_deltas': within_day_deltas(frame),
+        'worker_zscores': worker_zscores(frame),
+    }
+
+
+def data_version(company_id):
+    """公司提交資料的版本指紋（最大 ID + 筆數），新增或刪除提交時會改變"""
+    result = FormSubmission.objects.filter(worker__company_id=company_id).order_by().aggregate(
+        last_id=Max('id'), total=Count('id')
+    )
+    return f"{result['last_id'] or 0}-{result['total']}"
+
+
+def cached_cohort_analysis(company_id, start=None, end=None, version=None):
+    """帶快取的群體統計，資料版本改變時自動失效"""
+    version = version or data_version(company_id)
+    key = f"{ANALYTICS_CACHE_PREFIX}:{company_id}:{start}:{end}:{version}"
+    result = cache.get(key)
+    if result is None:
+        result = cohort_analysis(company_id, start, end)
+        cache.set(key, result, settings.ANALYTICS_CACHE_TIMEOUT)
+    return result
+
+
+def required_forms_filter():
+    """只保留各階段必填的表單類型"""
+    condition = Q()
+    for stage, form_type_ids in STAGE_REQUIREMENTS.items():
+        condition |= Q(stage=stage, form_type_id__in=form_type_ids)
+    return condition
+
+
+def compliance_summary(company_id, days=7, now=None):
+    """公司最近幾天各日各階段的完成率，以及目前階段尚未完成的勞工
+
+    以 (日期, 階段, 勞工) 分組計算已填的必填表單種類數，
+    種類數達到該階段要求即視為完成
+    """
+    now = timezone.localtime(now)
+    today = now.date()
+    start = today - timedelta(days=days - 1)
+    stage = determine_current_stage(now.hour)
+
+    workers = list(
+        Worker.objects.filter(company_id=company_id).order_by('id').values('id', 'name', 'code')
+    )
+    total_workers = len(workers)
+
+    submissions = FormSubmission.objects.filter(
+        worker__company_id=company_id,
+        submission_time__date__gte=start
+    ).filter(required_forms_filter())
+
+    rows = submissions.annotate(
+        day=TruncDate('submission_time')
+    ).values('day', 'stage', 'worker_id').annotate(
+        forms=Count('form_type_id', distinct=True)
+    ).order_by()
+    frame = pd.DataFrame.from_records(list(rows), columns=['day', 'stage', 'worker_id', 'forms'])
+    frame['complete'] = frame['forms'] >= frame['stage'].map(
+        {key: len(value) for key, value in STAGE_REQUIREMENTS.items()}
+    )
+    counts = frame.groupby(['day', 'stage']).agg(
+        started=('worker_id', 'size'),
+        completed=('complete', 'sum')
+    )
+
+    daily = []
+    for offset in range(days):
+        day = today - timedelta(days=offset)
+        stages = []
+        for stage_id, required in STAGE_REQUIREMENTS.items():
+            started, completed = (
+                counts.loc[(day, stage_id)].tolist() if (day, stage_id) in counts.index else (0, 0)
+            )
+            stages.append({
+                'stage': stage_id,
+                'stage_name': STAGE_NAMES[stage_id],
+                'required': required,
+                'started': int(started),
+                'completed': int(completed),
+                'completion_rate': completed / total_workers if total_workers else 0,
+            })
+        daily.append({
+            'date': day.isoformat(),
+            'stages': stages,
+            'completion_rate': (
+                sum(item['completion_rate'] for item in stages) / len(stages)
+            ),
+        })
+
+    # 目前階段各勞工已填的必填表單
+    submitted = {}
+    for worker_id, form_type_id in submissions.filter(
+        submission_time__date=today, stage=stage
+    ).values_list('worker_id', 'form_type_id').distinct():
+        submitted.setdefault(worker_id, set()).add(form_type_id)
+
+    required = STAGE_REQUIREMENTS[stage]
+    missing_workers = []
+    for worker in workers:
+        missing = [form_id for form_id in required if form_id not in submitted.get(worker['id'], ())]
+        if missing:
+            missing_workers.append({**worker, 'missing': missing})
+
+    return {
+        'date': today.isoformat(),
+        'current_stage': stage,
+        'current_stage_name': STAGE_NAMES[stage],
+        'total_workers': total_workers,
+        'daily': daily,
+        'missing_current_stage': missing_workers,
+    }
+
+
+def cached_compliance_summary(company_id, days=7):
+    """短暫快取的完成率統計（同一階段內的重複請求共用結果）"""
+    now = timezone.localtime()
+    stage = determine_current_stage(now.hour)
+    key = f"{COMPLIANCE_CACHE_PREFIX}:{company_id}:{days}:{now.date()}:{stage}"
+    result = cache.get(key)
+    if result is None:
+        result = compliance_summary(company_id, days, now)
+        cache.set(key, result, settings.COMPLIANCE_CACHE_TIMEOUT)
+    return result
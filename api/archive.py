@@ -0,0 +1,354 @@
+# backend/app/archive.py
+"""表單提交的冷資料封存
+
+超過 ARCHIVE_AFTER_DAYS 的提交記錄（連同分數）依公司與月份寫入只附加的封存檔，
+再分批從資料表刪除，讓日常查詢只面對近期的熱資料。
+
+封存檔：ARCHIVE_ROOT/submissions/company=<ID>/<YYYY-MM>.jsonl.gz
+    每位勞工每次封存寫成一個獨立的 gzip 成員（內容為 JSON Lines），
+    多個成員串接仍是合法的 gzip 檔，可直接以 zcat 讀取。
+索引檔：同目錄的 <YYYY-MM>.index.json
+    記錄已確認寫入的檔案大小、筆數、最大 ID，以及每個成員的 [位移, 長度, 勞工 ID, 筆數]，
+    查詢單一勞工時只需讀取該勞工的成員。
+
+寫入順序為「附加資料 → fsync → 替換索引 → 刪除資料表記錄」：
+索引之後的殘留位元組在下次封存時截斷；已寫入索引但尚未刪除的記錄在下次封存時
+比對封存內容後直接刪除，不會重複寫入。同一時間只應有一個封存程序執行。
+
+匯出、統計分析、Parquet 資料集與每日彙總重建會一併讀取封存資料。
+封存不產生刪除記錄（DeletedRecord），已同步的用戶端會保留原本的資料。
+"""
+import gzip
+import json
+import os
+import re
+from datetime import date, datetime, timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from .models import FormSubmission, SubmissionScore, Worker
+from .scoring import primary_metrics
+from . import form_data
+
+ARCHIVE_DIRECTORY = 'submissions'
+DATA_SUFFIX = '.jsonl.gz'
+INDEX_SUFFIX = '.index.json'
+MONTH_PATTERN = re.compile(r'^(\d{4})-(\d{2})' + re.escape(DATA_SUFFIX) + '$')
+
+ARCHIVE_FIELDS = (
+    'id', 'worker_id', 'form_type_id', 'submission_count', 'time_segment', 'stage', 'submission_time', 'data'
+)
+
+
+def month_start(value):
+    """date 或 datetime 所在月份的第一天（當地時間）"""
+    if isinstance(value, datetime):
+        value = timezone.localdate(value)
+    return value.replace(day=1)
+
+
+def next_month(month):
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def month_bounds(month):
+    """月份的起訖時間（當地時間，含起不含訖）"""
+    return (
+        timezone.make_aware(datetime(month.year, month.month, 1)),
+        timezone.make_aware(datetime.combine(next_month(month), datetime.min.time())),
+    )
+
+
+def archive_cutoff(now=None):
+    """預設的封存界線：早於 ARCHIVE_AFTER_DAYS 天前所在月份的記錄才封存（以整月為單位）"""
+    return month_start(timezone.localdate(now) - timedelta(days=settings.ARCHIVE_AFTER_DAYS))
+
+
+def company_directory(company_id, root=None):
+    return os.path.join(root or settings.ARCHIVE_ROOT, ARCHIVE_DIRECTORY, f"company={company_id}")
+
+
+def month_paths(company_id, month, root=None):
+    """(封存檔路徑, 索引檔路徑)"""
+    base = os.path.join(company_directory(company_id, root), f"{month:%Y-%m}")
+    return base + DATA_SUFFIX, base + INDEX_SUFFIX
+
+
+def load_index(company_id, month, root=None):
+    _, index_path = month_paths(company_id, month, root)
+    if not os.path.exists(index_path):
+        return {'size': 0, 'rows': 0, 'last_id': 0, 'members': []}
+    with open(index_path, encoding='utf-8') as index_file:
+        return json.load(index_file)
+
+
+def _save_index(index_path, index):
+    with open(index_path + '.tmp', 'w', encoding='utf-8') as index_file:
+        json.dump(index, index_file, separators=(',', ':'))
+        index_file.flush()
+        os.fsync(index_file.fileno())
+    os.replace(index_path + '.tmp', index_path)
+
+
+def archived_months(company_id, start=None, end=None, root=None):
+    """公司已有封存檔的月份（依時間排序），可依當地日期範圍篩選"""
+    directory = company_directory(company_id, root)
+    if not os.path.isdir(directory):
+        return []
+    months = []
+    for filename in os.listdir(directory):
+        match = MONTH_PATTERN.match(filename)
+        if not match:
+            continue
+        month = date(int(match.group(1)), int(match.group(2)), 1)
+        if start and next_month(month) <= start:
+            continue
+        if end and month > end:
+            continue
+        months.append(month)
+    return sorted(months)
+
+
+def archived_companies(root=None):
+    directory = os.path.join(root or settings.ARCHIVE_ROOT, ARCHIVE_DIRECTORY)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        int(name.split('=', 1)[1]) for name in os.listdir(directory)
+        if name.startswith('company=') and name.split('=', 1)[1].isdigit()
+    )
+
+
+def month_versions(company_id=None, root=None):
+    """{(公司 ID, 月份): 版本字串}，封存內容有變動時版本就會改變"""
+    versions = {}
+    for archived_company in ([company_id] if company_id is not None else archived_companies(root)):
+        for month in archived_months(archived_company, root=root):
+            index = load_index(archived_company, month, root)
+            if index['rows']:
+                versions[(archived_company, month)] = f"{index['last_id']}-{index['rows']}"
+    return versions
+
+
+def _decode(record):
+    record['submission_time'] = datetime.fromisoformat(record['submission_time'])
+    return record
+
+
+def read_month(company_id, month, worker_ids=None, root=None):
+    """逐筆讀取一個月份的封存記錄；指定勞工（ID 集合）時依索引只讀取這些勞工的 gzip 成員"""
+    index = load_index(company_id, month, root)
+    members = index['members']
+    if worker_ids is not None:
+        members = [member for member in members if member[2] in worker_ids]
+    if not members:
+        return
+
+    data_path, _ = month_paths(company_id, month, root)
+    with open(data_path, 'rb') as data_file:
+        for offset, length, _, _ in members:
+            data_file.seek(offset)
+            for line in gzip.decompress(data_file.read(length)).splitlines():
+                yield _decode(json.loads(line))
+
+
+def iter_records(company_id, start=None, end=None, worker_ids=None, root=None):
+    """逐筆讀取公司在 start 到 end（當地日期，含）之間的封存記錄，可限定勞工 ID 集合
+
+    記錄為 dict（欄位見 ARCHIVE_FIELDS，另有 scores: {指標: 分數}），
+    submission_time 為 aware datetime
+    """
+    for month in archived_months(company_id, start, end, root):
+        for record in read_month(company_id, month, worker_ids, root):
+            if start or end:
+                day = timezone.localdate(record['submission_time'])
+                if (start and day < start) or (end and day > end):
+                    continue
+            yield record
+
+
+def company_workers(company_id):
+    """{勞工 ID: (代碼, 姓名)}；已刪除勞工的封存記錄不再出現在讀取結果中，與資料表的連帶刪除一致"""
+    return {
+        worker_id: (code, name)
+        for worker_id, code, name in Worker.objects.filter(company_id=company_id).values_list('id', 'code', 'name')
+    }
+
+
+def score_rows(company_id, start=None, end=None, metrics=None):
+    """封存記錄中的分數，格式與 analytics.FRAME_COLUMNS 相同"""
+    workers = company_workers(company_id)
+    metrics = set(metrics) if metrics is not None else None
+    for record in iter_records(company_id, start, end):
+        if record['worker_id'] not in workers:
+            continue
+        for metric, value in record['scores'].items():
+            if metrics is None or metric in metrics:
+                yield (
+                    record['id'], record['worker_id'], record['stage'],
+                    record['submission_time'], metric, value
+                )
+
+
+def daily_totals(start, end, company_id=None):
+    """彙總封存記錄，回傳 {(公司 ID, 日期, 階段, 表單類型): [筆數, 勞工 ID 集合, 主要指標總和, 主要指標筆數]}"""
+    totals = {}
+    metrics = primary_metrics()
+    for archived_company in ([company_id] if company_id is not None else archived_companies()):
+        workers = company_workers(archived_company)
+        for record in iter_records(archived_company, start, end):
+            if record['worker_id'] not in workers:
+                continue
+            key = (
+                archived_company,
+                timezone.localdate(record['submission_time']),
+                record['stage'],
+                record['form_type_id'],
+            )
+            entry = totals.setdefault(key, [0, set(), 0.0, 0])
+            entry[0] += 1
+            entry[1].add(record['worker_id'])
+            score = record['scores'].get(metrics.get(record['form_type_id']))
+            if score is not None:
+                entry[2] += score
+                entry[3] += 1
+    return totals
+
+
+def pending_months(before, company_id=None):
+    """以一次 GROUP BY 查詢取得待封存的 {(公司 ID, 月份): 筆數}"""
+    submissions = FormSubmission.objects.filter(submission_time__lt=month_bounds(before)[0])
+    if company_id is not None:
+        submissions = submissions.filter(worker__company_id=company_id)
+    rows = submissions.annotate(
+        month=TruncMonth('submission_time')
+    ).values('worker__company_id', 'month').annotate(total=Count('id')).order_by()
+    return {
+        (row['worker__company_id'], timezone.localdate(row['month'])): row['total']
+        for row in rows
+    }
+
+
+def _serialize(row, scores):
+    record = dict(zip(ARCHIVE_FIELDS, row))
+    record['submission_time'] = record['submission_time'].isoformat()
+    record['scores'] = scores.get(record['id'], {})
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def archive_month(company_id, month, batch_size=None, root=None):
+    """封存公司單一月份的提交記錄並從資料表刪除，回傳 (封存筆數, 刪除筆數)"""
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    month_begin, month_end = month_bounds(month)
+    submissions = FormSubmission.objects.filter(
+        worker__company_id=company_id,
+        submission_time__gte=month_begin,
+        submission_time__lt=month_end
+    )
+    # 之後才寫入的記錄 ID 較大，留待下次封存
+    snapshot = submissions.aggregate(last=Max('id'))['last']
+    if snapshot is None:
+        return 0, 0
+    submissions = submissions.filter(id__lte=snapshot)
+
+    os.makedirs(company_directory(company_id, root), exist_ok=True)
+    data_path, index_path = month_paths(company_id, month, root)
+    index = load_index(company_id, month, root)
+
+    # 上次封存已寫入但未刪除的記錄：確認在封存檔中的直接刪除，其餘照常封存
+    already_archived = set()
+    if submissions.filter(id__lte=index['last_id']).exists():
+        already_archived = {record['id'] for record in read_month(company_id, month, root=root)}
+
+    archived_ids = []
+    with open(data_path, 'ab') as data_file:
+        data_file.truncate(index['size'])
+        offset = index['size']
+
+        rows = submissions.order_by('worker_id', 'id').values_list(*ARCHIVE_FIELDS, 'data_format')
+        # 封存檔一律存放 JSON 物件，不依賴欄位字典
+        rows = form_data.decoded_rows(
+            rows.iterator(chunk_size=batch_size), ARCHIVE_FIELDS.index('form_type_id'), ARCHIVE_FIELDS.index('data')
+        )
+        for chunk in _chunks(rows, batch_size):
+            chunk = [row for row in chunk if row[0] not in already_archived]
+            if not chunk:
+                continue
+            scores = {}
+            for submission_id, metric, value in SubmissionScore.objects.filter(
+                submission_id__in=[row[0] for row in chunk]
+            ).values_list('submission_id', 'metric', 'value'):
+                scores.setdefault(submission_id, {})[metric] = value
+
+            # 同一批次中每位勞工寫成一個 gzip 成員
+            by_worker = {}
+            for row in chunk:
+                by_worker.setdefault(row[1], []).append(row)
+            for worker_id, worker_rows in by_worker.items():
+                payload = gzip.compress(
+                    ''.join(_serialize(row, scores) + '\n' for row in worker_rows).encode('utf-8')
+                )
+                data_file.write(payload)
+                index['members'].append([offset, len(payload), worker_id, len(worker_rows)])
+                offset += len(payload)
+                archived_ids.extend(row[0] for row in worker_rows)
+
+        data_file.flush()
+        os.fsync(data_file.fileno())
+
+    if archived_ids:
+        index['size'] = offset
+        index['rows'] += len(archived_ids)
+        index['last_id'] = max(index['last_id'], max(archived_ids))
+        index['updated_at'] = timezone.now().isoformat()
+        _save_index(index_path, index)
+
+    deleted = delete_submissions(archived_ids + sorted(already_archived), batch_size)
+    return len(archived_ids), deleted
+
+
+def delete_submissions(submission_ids, batch_size=None):
+    """分批刪除已封存的提交記錄與分數
+
+    直接以 SQL 刪除，不觸發 post_delete 訊號（封存不是刪除，不產生 DeletedRecord）
+    """
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    deleted = 0
+    for start in range(0, len(submission_ids), batch_size):
+        batch = submission_ids[start:start + batch_size]
+        with transaction.atomic():
+            scores = SubmissionScore.objects.filter(submission_id__in=batch)
+            scores._raw_delete(scores.db)
+            submissions = FormSubmission.objects.filter(id__in=batch)
+            deleted += submissions._raw_delete(submissions.db)
+    return deleted
+
+
+def archive_submissions(before=None, company_id=None, batch_size=None, dry_run=False, root=None):
+    """封存 before（預設為 archive_cutoff()）所在月份之前的提交記錄
+
+    回傳 {'before': 界線, 'months': [{company_id, month, pending, archived, deleted}], 'archived': 總筆數, 'deleted': 總筆數}
+    """
+    before = month_start(before) if before else archive_cutoff()
+    summary = {'before': before.isoformat(), 'dry_run': dry_run, 'months': [], 'archived': 0, 'deleted': 0}
+    for (pending_company, month), total in sorted(pending_months(before, company_id).items()):
+        item = {'company_id': pending_company, 'month': f"{month:%Y-%m}", 'pending': total, 'archived': 0, 'deleted': 0}
+        if not dry_run:
+            item['archived'], item['deleted'] = archive_month(pending_company, month, batch_size, root)
+            summary['archived'] += item['archived']
+            summary['deleted'] += item['deleted']
+        summary['months'].append(item)
+    return summary
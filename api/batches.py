@@ -0,0 +1,59 @@
+# backend/app/batches.py
+"""勞工目前的填寫批次（WorkerBatch）
+
+提交時在同一個交易中以 select_for_update 鎖定並更新勞工的批次記錄，
+讀取目前批次、批次開始日期與今日已填寫的階段都只需一次主鍵查詢，
+不必彙總勞工所有的提交記錄。
+"""
+from django.utils import timezone
+from .models import WorkerBatch
+
+
+def get_batch(worker):
+    """取得勞工的批次記錄；尚未填寫過時回傳未存檔的空記錄（目前批次為 0）"""
+    try:
+        return worker.batch
+    except WorkerBatch.DoesNotExist:
+        return WorkerBatch(worker=worker)
+
+
+def current_batch(worker):
+    """目前的批次編號，尚未填寫過時為 0"""
+    return get_batch(worker).current_batch
+
+
+def submitted_stages(batch, day=None):
+    """目前批次在指定日期（預設今天）已填寫的階段"""
+    day = day or timezone.localdate()
+    return list(batch.submitted_stages) if batch.stages_date == day else []
+
+
+def apply_submission(batch, submission):
+    """將一筆提交套用到批次記錄（不存檔）"""
+    day = timezone.localdate(submission.submission_time)
+    if submission.submission_count > batch.current_batch:
+        batch.current_batch = submission.submission_count
+        batch.started_on = day
+        batch.stages_date = None
+        batch.submitted_stages = []
+
+    if submission.submission_count == batch.current_batch:
+        if batch.stages_date is None or day > batch.stages_date:
+            batch.stages_date = day
+            batch.submitted_stages = [submission.stage]
+        elif day == batch.stages_date and submission.stage not in batch.submitted_stages:
+            batch.submitted_stages = sorted(batch.submitted_stages + [submission.stage])
+
+    if batch.last_submission_at is None or submission.submission_time > batch.last_submission_at:
+        batch.last_submission_at = submission.submission_time
+
+
+def record_submissions(worker_id, submissions):
+    """以同一勞工新建立的提交更新批次記錄，需在交易中呼叫"""
+    if not submissions:
+        return None
+    batch, _ = WorkerBatch.objects.select_for_update().get_or_create(worker_id=worker_id)
+    for submission in sorted(submissions, key=lambda submission: submission.submission_time):
+        apply_submission(batch, submission)
+    batch.save()
+    return batch
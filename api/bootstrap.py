@@ -0,0 +1,110 @@
+# backend/app/bootstrap.py
+"""勞工表單頁的啟動資料
+
+表單頁開啟時需要的勞工資料、應填表單、目前批次與階段、今日完成狀態，
+合併為一次回應。結果依勞工快取到下一次階段切換為止，
+勞工提交表單或資料變動時立即清除。
+"""
+import uuid
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from .models import FormSubmission, Worker
+from .serializers import FormTypeSerializer
+from .stages import STAGE_NAMES, STAGE_REQUIREMENTS, determine_current_stage, next_stage_boundary
+from . import reference_cache
+from . import batches
+
+BOOTSTRAP_CACHE_PREFIX = 'form_bootstrap'
+
+
+def cache_key(company_id, worker_code):
+    return f"{BOOTSTRAP_CACHE_PREFIX}:{company_id}:{worker_code}"
+
+
+def invalidate(company_id, worker_codes):
+    """清除勞工的啟動資料快取（交易提交後才清除，避免並行請求快取到舊資料）"""
+    keys = [cache_key(company_id, code) for code in worker_codes]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_worker(worker):
+    invalidate(worker.company_id, [worker.code])
+
+
+def build_payload(worker, company, now=None):
+    """組成啟動資料，只需一次查詢今日提交（目前批次隨勞工一併載入）"""
+    now = timezone.localtime(now)
+    stage = determine_current_stage(now.hour)
+
+    submission_count = batches.current_batch(worker)
+    current_batch = submission_count or 1
+
+    submitted = {}
+    for stage_id, form_type_id in FormSubmission.objects.filter(
+        worker=worker,
+        submission_time__date=now.date(),
+        submission_count=current_batch
+    ).values_list('stage', 'form_type_id').distinct():
+        submitted.setdefault(stage_id, set()).add(form_type_id)
+
+    stages = []
+    for stage_id, required in STAGE_REQUIREMENTS.items():
+        completed = [form_id for form_id in required if form_id in submitted.get(stage_id, ())]
+        stages.append({
+            'stage': stage_id,
+            'stage_name': STAGE_NAMES[stage_id],
+            'required': required,
+            'completed': completed,
+            'missing': [form_id for form_id in required if form_id not in completed],
+            'is_complete': len(completed) == len(required),
+        })
+
+    # 與 get_worker_forms 相同：首次填寫顯示所有首次必填表單，之後只顯示後續必填表單
+    form_types = reference_cache.get_form_types()
+    if submission_count == 0:
+        forms_to_show = [form_type for form_type in form_types if form_type.is_required_first_time]
+    else:
+        forms_to_show = [form_type for form_type in form_types if form_type.is_required_subsequent]
+
+    return {
+        'worker': {
+            'id': worker.id,
+            'name': worker.name,
+            'code': worker.code,
+            'company': company.id,
+            'company_name': company.name,
+        },
+        'submission_count': submission_count,
+        'current_batch': current_batch,
+        'current_stage': stage,
+        'current_stage_name': STAGE_NAMES[stage],
+        'form_types': FormTypeSerializer(form_types, many=True).data,
+        'forms_to_show': FormTypeSerializer(forms_to_show, many=True).data,
+        'today': {
+            'date': now.date().isoformat(),
+            'stages': stages,
+        },
+    }
+
+
+def get_bootstrap(company, worker_code):
+    """取得啟動資料，回傳 (內容, 版本)；勞工不存在時拋出 Worker.DoesNotExist
+
+    版本在每次重新產生時更換，可直接作為 ETag
+    """
+    key = cache_key(company.id, worker_code)
+    cached = cache.get(key)
+    if cached and cached['reference_version'] == reference_cache.current_version():
+        return cached['payload'], cached['version']
+
+    worker = Worker.objects.select_related('batch').get(code=worker_code, company=company)
+    now = timezone.localtime()
+    entry = {
+        'payload': build_payload(worker, company, now),
+        'version': uuid.uuid4().hex,
+        'reference_version': reference_cache.current_version(),
+    }
+    timeout = max(int((next_stage_boundary(now) - now).total_seconds()), 1)
+    cache.set(key, entry, timeout)
+    return entry['payload'], entry['version']
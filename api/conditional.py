@@ -0,0 +1,88 @@
+# backend/app/conditional.py
+"""HTTP 條件式請求（ETag / Last-Modified）與快取標頭
+
+以便宜的版本指紋（最後更新時間 + 筆數 + 關聯資料的最後更新時間）判斷列表是否變動，
+未變動時直接回傳 304，不需要再執行序列化。
+網址含內容雜湊的資源（例如表單 schema）則可標記為不會變動，讓用戶端長期快取。
+"""
+import hashlib
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
+def queryset_fingerprint(queryset, timestamp_field):
+    """以一次聚合查詢取得 (最後更新時間, 筆數)"""
+    last_modified, total, _ = related_fingerprint(queryset, timestamp_field)
+    return last_modified, total
+
+
+def related_fingerprint(queryset, timestamp_field, related=()):
+    """以一次聚合查詢取得 (最後更新時間, 筆數, [各關聯資料的最後更新時間])"""
+    aggregates = {'last_modified': Max(timestamp_field), 'total': Count('pk')}
+    for index, field in enumerate(related):
+        aggregates[f'related_{index}'] = Max(field)
+    result = queryset.order_by().aggregate(**aggregates)
+    return (
+        result['last_modified'],
+        result['total'],
+        [result[f'related_{index}'] for index in range(len(related))]
+    )
+
+
+def make_etag(request, *parts):
+    """由請求路徑、使用者與版本資訊組成 ETag"""
+    user_id = getattr(getattr(request, 'user', None), 'pk', None)
+    raw = '|'.join(str(part) for part in (request.get_full_path(), user_id) + parts)
+    return quote_etag(hashlib.md5(raw.encode('utf-8')).hexdigest())
+
+
+def _isoformat(value):
+    return value.isoformat() if value else ''
+
+
+def queryset_etag(request, queryset, timestamp_field, *parts, related=()):
+    """計算列表查詢的 ETag
+
+    related 為序列化內容引用的關聯資料時間欄位（例如 worker__updated_at），關聯資料更新時 ETag 一併改變。
+    列表不提供 Last-Modified：刪除資料不會改變最後更新時間，只送 If-Modified-Since 的用戶端
+    會在刪除後繼續得到 304；ETag 含筆數，刪除時會改變
+    """
+    last_modified, total, related_modified = related_fingerprint(queryset, timestamp_field, related)
+    return make_etag(
+        request, _isoformat(last_modified), total,
+        *[_isoformat(value) for value in related_modified], *parts
+    )
+
+
+def not_modified(request, etag, last_modified=None):
+    """用戶端的快取仍有效時回傳 304 回應，否則回傳 None"""
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None
+    )
+    if response is not None:
+        with_validators(response, etag, last_modified)
+    return response
+
+
+def with_validators(response, etag, last_modified=None):
+    """在回應加上 ETag / Last-Modified，並要求用戶端每次都重新驗證"""
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+# 內容不會變動的資源快取一年
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def immutable(response, etag=None):
+    """網址含內容雜湊的回應：允許共用快取長期保存，且不需要重新驗證"""
+    if etag:
+        response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    return response
@@ -0,0 +1,294 @@
+# backend/app/datasets.py
+"""研究用 Parquet 資料集匯出
+
+每個資料集依 company=<ID>/month=<YYYY-MM> 分區，每個分區一個 Parquet 檔，
+pandas / pyarrow 可直接以 pd.read_parquet(資料集目錄) 讀取整個分區資料集。
+
+增量匯出：以一次 GROUP BY 查詢取得各分區的版本（最大 ID 或更新時間 + 筆數），
+與資料集目錄中的 _manifest.json 比對，只重寫新增或變動的分區；
+來源資料已全部刪除的分區會一併移除。寫入時分批讀取，記憶體用量固定。
+提交與分數資料集會一併讀取已封存的記錄（見 archive.py），封存後分區內容不變。
+"""
+import itertools
+import json
+import os
+import shutil
+from datetime import datetime
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.conf import settings
+from django.db.models import Count, F, Max
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from .models import Experiment, FormSubmission, SubmissionScore
+from . import archive
+from . import form_data
+
+DATASET_CHUNK_SIZE = 5000
+MANIFEST_NAME = '_manifest.json'
+
+TIMESTAMP = pa.timestamp('us', tz='UTC')
+
+
+class Dataset:
+    """資料集定義：來源查詢、分區依據的欄位，以及輸出欄位 (欄位名稱, 查詢欄位, 型別)
+
+    decode_rows 為 (額外查詢欄位, 解碼函式)：查詢時附加在輸出欄位之後，由解碼函式轉換資料列並移除
+    """
+
+    def __init__(self, name, queryset, company_field, time_field, version_field, columns, archived_rows=None,
+                 decode_rows=None):
+        self.name = name
+        self.queryset = queryset
+        self.company_field = company_field
+        self.time_field = time_field
+        self.version_field = version_field
+        self.columns = columns
+        self.archived_rows = archived_rows
+        self.decode_rows = decode_rows
+        self.schema = pa.schema([(column, type_) for column, _, type_ in columns])
+
+    def partition_versions(self):
+        """一次查詢取得 {(公司 ID, 月份開始時間): 版本字串}"""
+        rows = self.queryset().annotate(
+            partition_company=F(self.company_field),
+            partition_month=TruncMonth(self.time_field)
+        ).values('partition_company', 'partition_month').annotate(
+            last=Max(self.version_field),
+            total=Count('pk')
+        ).order_by()
+        versions = {
+            (row['partition_company'], timezone.localtime(row['partition_month'])): _version(row['last'], row['total'])
+            for row in rows
+        }
+        if self.archived_rows is None:
+            return versions
+
+        # 封存的月份：版本為資料表與封存兩部分的組合
+        for (company_id, month), archived_version in archive.month_versions().items():
+            key = (company_id, archive.month_bounds(month)[0])
+            versions[key] = f"{versions.get(key, '')}+archive-{archived_version}"
+        return versions
+
+    def partition_rows(self, company_id, month_start):
+        """逐批讀取單一分區的資料列"""
+        month_end = timezone.make_aware(
+            datetime(month_start.year + month_start.month // 12, month_start.month % 12 + 1, 1)
+        )
+
+        rows = self.queryset().filter(**{
+            self.company_field: company_id,
+            f"{self.time_field}__gte": month_start,
+            f"{self.time_field}__lt": month_end,
+        }).order_by('pk')
+        lookups = [lookup for _, lookup, _ in self.columns]
+        if self.decode_rows is None:
+            rows = rows.values_list(*lookups).iterator(chunk_size=DATASET_CHUNK_SIZE)
+        else:
+            extra, decode = self.decode_rows
+            rows = decode(rows.values_list(*lookups, *extra).iterator(chunk_size=DATASET_CHUNK_SIZE))
+        if self.archived_rows is None:
+            return rows
+        return itertools.chain(self.archived_rows(company_id, archive.month_start(month_start)), rows)
+
+
+def _version(last, total):
+    if isinstance(last, datetime):
+        last = last.isoformat()
+    return f"{last}-{total}"
+
+
+def _json_text(value):
+    return None if value is None else json.dumps(value, ensure_ascii=False)
+
+
+def _archived_records(company_id, month):
+    """封存記錄與勞工代碼（已刪除勞工的記錄略過）"""
+    workers = archive.company_workers(company_id)
+    for record in archive.read_month(company_id, month):
+        worker = workers.get(record['worker_id'])
+        if worker is not None:
+            yield record, worker[0]
+
+
+def archived_submission_rows(company_id, month):
+    for record, worker_code in _archived_records(company_id, month):
+        yield (
+            record['id'], record['worker_id'], worker_code, record['form_type_id'],
+            record['submission_count'], record['time_segment'], record['stage'],
+            record['submission_time'], record['data']
+        )
+
+
+def archived_score_rows(company_id, month):
+    for record, _ in _archived_records(company_id, month):
+        for metric, value in record['scores'].items():
+            yield (
+                record['id'], record['worker_id'], record['form_type_id'], record['stage'],
+                record['submission_time'], metric, value
+            )
+
+
+def decode_submission_rows(rows):
+    """解碼精簡格式的表單資料（欄位順序同 submissions 資料集，最後附加 data_format）"""
+    return form_data.decoded_rows(rows, 3, 8)
+
+
+DATASETS = {
+    dataset.name: dataset for dataset in [
+        Dataset(
+            'submissions',
+            lambda: FormSubmission.objects.all(),
+            'worker__company_id', 'submission_time', 'id',
+            [
+                ('id', 'id', pa.int64()),
+                ('worker_id', 'worker_id', pa.int64()),
+                ('worker_code', 'worker__code', pa.string()),
+                ('form_type_id', 'form_type_id', pa.int64()),
+                ('submission_count', 'submission_count', pa.int32()),
+                ('time_segment', 'time_segment', pa.int32()),
+                ('stage', 'stage', pa.int32()),
+                ('submission_time', 'submission_time', TIMESTAMP),
+                ('data', 'data', pa.string()),
+            ],
+            archived_rows=archived_submission_rows,
+            decode_rows=(('data_format',), decode_submission_rows)
+        ),
+        Dataset(
+            'scores',
+            lambda: SubmissionScore.objects.all(),
+            'submission__worker__company_id', 'submission__submission_time', 'id',
+            [
+                ('submission_id', 'submission_id', pa.int64()),
+                ('worker_id', 'submission__worker_id', pa.int64()),
+                ('form_type_id', 'submission__form_type_id', pa.int64()),
+                ('stage', 'submission__stage', pa.int32()),
+                ('submission_time', 'submission__submission_time', TIMESTAMP),
+                ('metric', 'metric', pa.string()),
+                ('value', 'value', pa.float64()),
+            ],
+            archived_rows=archived_score_rows
+        ),
+        Dataset(
+            'experiments',
+            lambda: Experiment.objects.all(),
+            'worker__company_id', 'experiment_time', 'updated_at',
+            [
+                ('id', 'id', pa.int64()),
+                ('worker_id', 'worker_id', pa.int64()),
+                ('worker_code', 'worker__code', pa.string()),
+                ('experimenter_id', 'experimenter_id', pa.int64()),
+                ('experiment_type', 'experiment_type', pa.string()),
+                ('experiment_time', 'experiment_time', TIMESTAMP),
+                ('created_at', 'created_at', TIMESTAMP),
+                ('updated_at', 'updated_at', TIMESTAMP),
+                ('data', 'data', pa.string()),
+            ]
+        ),
+    ]
+}
+
+# 以 JSON 字串輸出的欄位
+JSON_COLUMNS = {'data'}
+
+
+def partition_path(company_id, month_start):
+    return f"company={company_id}/month={month_start:%Y-%m}"
+
+
+def write_partition(dataset, directory, company_id, month_start):
+    """分批寫入單一分區，先寫暫存檔再替換，讀取端不會看到寫到一半的檔案，回傳筆數"""
+    os.makedirs(directory, exist_ok=True)
+    final_path = os.path.join(directory, 'part-0.parquet')
+    temp_path = final_path + '.tmp'
+    names = [column for column, _, _ in dataset.columns]
+    json_indexes = [index for index, name in enumerate(names) if name in JSON_COLUMNS]
+
+    total = 0
+    with pq.ParquetWriter(temp_path, dataset.schema) as writer:
+        chunk = []
+        for row in dataset.partition_rows(company_id, month_start):
+            if json_indexes:
+                row = list(row)
+                for index in json_indexes:
+                    row[index] = _json_text(row[index])
+            chunk.append(row)
+            if len(chunk) >= DATASET_CHUNK_SIZE:
+                writer.write_table(_table(dataset, names, chunk))
+                total += len(chunk)
+                chunk = []
+        if chunk or total == 0:
+            writer.write_table(_table(dataset, names, chunk))
+            total += len(chunk)
+
+    os.replace(temp_path, final_path)
+    return total
+
+
+def _table(dataset, names, rows):
+    columns = list(zip(*rows)) if rows else [[] for _ in names]
+    return pa.Table.from_arrays(
+        [pa.array(values, type=field.type) for values, field in zip(columns, dataset.schema)],
+        schema=dataset.schema
+    )
+
+
+def _load_manifest(root):
+    path = os.path.join(root, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as manifest_file:
+        return json.load(manifest_file)
+
+
+def _save_manifest(root, manifest):
+    path = os.path.join(root, MANIFEST_NAME)
+    with open(path + '.tmp', 'w', encoding='utf-8') as manifest_file:
+        json.dump(manifest, manifest_file, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def export_dataset(dataset, root, full=False, company_id=None):
+    """匯出單一資料集，回傳 {'written': 重寫的分區數, 'skipped': 未變動的分區數, 'removed': 移除的分區數}"""
+    root = os.path.join(root, dataset.name)
+    os.makedirs(root, exist_ok=True)
+    manifest = _load_manifest(root)
+    versions = dataset.partition_versions()
+    summary = {'written': 0, 'skipped': 0, 'removed': 0}
+
+    current = set()
+    for (partition_company, month_start), version in sorted(versions.items()):
+        if company_id is not None and partition_company != company_id:
+            continue
+        key = partition_path(partition_company, month_start)
+        current.add(key)
+        if not full and manifest.get(key, {}).get('version') == version:
+            summary['skipped'] += 1
+            continue
+
+        rows = write_partition(dataset, os.path.join(root, key), partition_company, month_start)
+        manifest[key] = {'version': version, 'rows': rows, 'written_at': timezone.now().isoformat()}
+        _save_manifest(root, manifest)
+        summary['written'] += 1
+
+    # 來源資料已全部刪除的分區
+    for key in list(manifest):
+        if key in current:
+            continue
+        if company_id is not None and not key.startswith(f"company={company_id}/"):
+            continue
+        shutil.rmtree(os.path.join(root, key), ignore_errors=True)
+        del manifest[key]
+        summary['removed'] += 1
+
+    _save_manifest(root, manifest)
+    return summary
+
+
+def export_datasets(names=None, full=False, company_id=None, root=None):
+    """匯出多個資料集（預設全部），回傳 {資料集名稱: 摘要}"""
+    root = root or settings.DATASET_EXPORT_ROOT
+    return {
+        name: export_dataset(DATASETS[name], root, full=full, company_id=company_id)
+        for name in (names or DATASETS)
+    }
@@ -0,0 +1,158 @@
+# backend/app/dedup.py
+"""重複表單提交清理
+
+以一次視窗函數查詢（ROW_NUMBER() OVER (PARTITION BY 自然鍵 ...)）找出重複記錄，
+每組只保留一筆（預設保留最新的），其餘以 DELETE ... WHERE id IN (...) 分批刪除，
+不逐筆查詢、也不逐筆刪除。刪除時一併寫入墓碑讓增量同步的用戶端得知，
+最後重建受影響日期的每日彙總。
+
+表單資料可能以精簡陣列或一般 dict 儲存，自然鍵含 data 時無法在 SQL 中比對：
+先以其他欄位找出候選組，再比對解碼後的內容。
+"""
+import json
+from django.db import transaction
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+from .models import FormSubmission, SubmissionScore, Worker
+from . import bootstrap
+from . import form_data
+from . import rollups
+from . import sync
+from . import worker_stats
+
+# 可作為自然鍵的欄位
+KEY_FIELDS = ('worker', 'form_type', 'submission_count', 'stage', 'time_segment', 'submission_time', 'data')
+DEFAULT_KEY = ('worker', 'form_type', 'submission_count', 'stage', 'time_segment')
+
+KEEP_ORDERINGS = {
+    'latest': [F('submission_time').desc(), F('id').desc()],
+    'earliest': [F('submission_time').asc(), F('id').asc()],
+}
+
+DEDUP_BATCH_SIZE = 1000
+
+
+def parse_key(value):
+    """解析以逗號分隔的自然鍵欄位，欄位無效時拋出 ValueError"""
+    key = tuple(field.strip() for field in value.split(',') if field.strip())
+    unknown = [field for field in key if field not in KEY_FIELDS]
+    if not key or unknown:
+        raise ValueError(f"無效的自然鍵欄位: {', '.join(unknown) or value}（可用欄位: {', '.join(KEY_FIELDS)}）")
+    return key
+
+
+def _submissions(company_id=None):
+    submissions = FormSubmission.objects.all()
+    if company_id is not None:
+        submissions = submissions.filter(worker__company_id=company_id)
+    return submissions
+
+
+def _decoded_duplicates(key, keep, company_id):
+    """自然鍵含 data 時以解碼後的內容分組，回傳 ({組: 筆數}, 要刪除的記錄)
+
+    組為 (其他欄位值..., 正規化的表單資料 JSON)；候選記錄依保留順序排列，每組第一筆保留
+    """
+    fields = [field for field in key if field != 'data']
+    candidates = _submissions(company_id)
+    if fields:
+        # 只載入其他欄位已重複的記錄
+        candidates = candidates.annotate(
+            group_total=Window(expression=Count('id'), partition_by=[F(field) for field in fields])
+        ).filter(group_total__gt=1)
+    rows = candidates.order_by(*KEEP_ORDERINGS[keep]).values_list(
+        'id', 'worker_id', 'submission_time', 'form_type_id', 'data', 'data_format', *fields
+    )
+    totals = {}
+    duplicates = []
+    for submission_id, worker_id, submission_time, form_type_id, data, data_format, *values in rows.iterator():
+        data = form_data.decode(form_type_id, data, data_format)
+        group = (*values, json.dumps(data, sort_keys=True, ensure_ascii=False))
+        if group in totals:
+            duplicates.append((submission_id, worker_id, submission_time))
+        totals[group] = totals.get(group, 0) + 1
+    return totals, duplicates
+
+
+def duplicate_rows(key=DEFAULT_KEY, keep='latest', company_id=None):
+    """每組自然鍵中要刪除的記錄 (id, worker_id, submission_time)"""
+    if 'data' in key:
+        return _decoded_duplicates(key, keep, company_id)[1]
+    ranked = _submissions(company_id).annotate(
+        row_number=Window(
+            expression=RowNumber(),
+            partition_by=[F(field) for field in key],
+            order_by=KEEP_ORDERINGS[keep]
+        )
+    )
+    return list(ranked.filter(row_number__gt=1).values_list('id', 'worker_id', 'submission_time').iterator())
+
+
+def duplicate_groups(key=DEFAULT_KEY, company_id=None, limit=20):
+    """以一次 GROUP BY 取得重複的組數與重複最多的前幾組"""
+    if 'data' in key:
+        totals, _ = _decoded_duplicates(key, 'latest', company_id)
+        fields = [field for field in key if field != 'data']
+        groups = sorted(
+            ({**dict(zip(fields, group[:-1])), 'data': json.loads(group[-1]), 'total': total}
+             for group, total in totals.items() if total > 1),
+            key=lambda group: -group['total']
+        )
+        return len(groups), groups[:limit]
+    groups = _submissions(company_id).values(*key).annotate(
+        total=Count('id')
+    ).filter(total__gt=1).order_by()
+    return groups.count(), list(groups.order_by('-total')[:limit])
+
+
+def delete_batch(rows):
+    """在同一個交易中刪除一批記錄與分數並寫入墓碑（繞過模型訊號）"""
+    ids = [submission_id for submission_id, _ in rows]
+    with transaction.atomic():
+        scores = SubmissionScore.objects.filter(submission_id__in=ids)
+        scores._raw_delete(scores.db)
+        submissions = FormSubmission.objects.filter(id__in=ids)
+        deleted = submissions._raw_delete(submissions.db)
+        sync.record_deletions('formsubmission', rows)
+    return deleted
+
+
+def dedup_submissions(key=DEFAULT_KEY, keep='latest', company_id=None, dry_run=False, batch_size=None, sample=20):
+    """清理重複的表單提交並回傳摘要"""
+    batch_size = batch_size or DEDUP_BATCH_SIZE
+    group_count, samples = duplicate_groups(key, company_id, sample)
+    summary = {
+        'key': list(key),
+        'keep': keep,
+        'dry_run': dry_run,
+        'groups': group_count,
+        'duplicates': 0,
+        'deleted': 0,
+        'samples': samples,
+    }
+    if not group_count:
+        return summary
+
+    rows = duplicate_rows(key, keep, company_id)
+    summary['duplicates'] = len(rows)
+    if dry_run or not rows:
+        return summary
+
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        summary['deleted'] += delete_batch([(submission_id, worker_id) for submission_id, worker_id, _ in batch])
+
+    # 重建受影響日期的彙總與受影響勞工的統計，並清除其啟動資料
+    first_date = timezone.localdate(min(row[2] for row in rows))
+    last_date = timezone.localdate(max(row[2] for row in rows))
+    rollups.rebuild_rollups(first_date, last_date, company_id)
+    worker_ids = {row[1] for row in rows}
+    worker_stats.rebuild(worker_ids)
+
+    affected = {}
+    for company, code in Worker.objects.filter(id__in=worker_ids).values_list('company_id', 'code'):
+        affected.setdefault(company, []).append(code)
+    for company, codes in affected.items():
+        bootstrap.invalidate(company, codes)
+    return summary
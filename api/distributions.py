@@ -0,0 +1,148 @@
+# backend/app/distributions.py
+"""各題答案分布統計
+
+以一次 values_list 查詢分批串流公司在日期範圍內某表單類型的 FormSubmission.data，
+每批將數值答案依題目欄位轉為 numpy 陣列並以 np.unique 計算各值的次數，
+再與先前的次數合併；記憶體只與各題不同答案值的數量有關，與提交筆數無關。
+直方圖、分位數與平均都由 (答案值, 次數) 以向量化運算求得。
+"""
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from .models import FormSubmission
+from .scoring import numeric_answers
+from . import analytics
+from . import archive
+from . import form_data
+
+DISTRIBUTION_CACHE_PREFIX = 'analytics:distribution'
+
+# 每批串流的提交筆數
+CHUNK_SIZE = 2000
+
+# 答案值取到小數第幾位後再計數，連續數值的不同值數量因此有上限
+VALUE_DECIMALS = 2
+
+# 不同答案值不超過此數量時逐值列出次數（NASA-TLX 0–100 每 5 分一格共 21 個值），否則以等寬區間計算直方圖
+MAX_CATEGORIES = 21
+HISTOGRAM_BINS = 10
+
+QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+
+def merge_counts(current, values, counts):
+    """合併兩組 (答案值, 次數)，回傳依答案值排序的新陣列"""
+    if current is not None:
+        values = np.concatenate([current[0], values])
+        counts = np.concatenate([current[1], counts])
+    unique, inverse = np.unique(values, return_inverse=True)
+    return unique, np.bincount(inverse, weights=counts).astype(np.int64)
+
+
+class ValueCounter:
+    """逐批累計各題答案值的次數"""
+
+    def __init__(self):
+        self.counts = {}
+        self.submissions = 0
+        self._pending = {}
+        self._pending_rows = 0
+
+    def add(self, data):
+        if not isinstance(data, dict):
+            return
+        self.submissions += 1
+        for key, value in numeric_answers(data).items():
+            self._pending.setdefault(key, []).append(value)
+        self._pending_rows += 1
+        if self._pending_rows >= CHUNK_SIZE:
+            self.flush()
+
+    def flush(self):
+        for key, items in self._pending.items():
+            values = np.round(np.asarray(items, dtype=np.float64), VALUE_DECIMALS)
+            values, counts = np.unique(values, return_counts=True)
+            self.counts[key] = merge_counts(self.counts.get(key), values, counts)
+        self._pending = {}
+        self._pending_rows = 0
+
+
+def weighted_quantiles(values, counts, quantiles=QUANTILES):
+    """由排序後的 (答案值, 次數) 計算分位數（取累計次數首次達到 q * n 的答案值）"""
+    cumulative = np.cumsum(counts)
+    targets = np.ceil(np.asarray(quantiles) * cumulative[-1])
+    positions = np.searchsorted(cumulative, np.maximum(targets, 1))
+    return values[positions]
+
+
+def histogram(values, counts):
+    """不同值不多時逐值列出次數，否則分成等寬區間"""
+    if len(values) <= MAX_CATEGORIES:
+        return [
+            {'value': float(value), 'count': int(count)}
+            for value, count in zip(values, counts)
+        ]
+    bin_counts, edges = np.histogram(values, bins=HISTOGRAM_BINS, weights=counts)
+    return [
+        {'min': float(low), 'max': float(high), 'count': int(count)}
+        for low, high, count in zip(edges[:-1], edges[1:], bin_counts)
+    ]
+
+
+def summarize(values, counts):
+    """單一題目的筆數、平均、標準差、最小/最大值、分位數與直方圖"""
+    total = counts.sum()
+    mean = float(np.dot(values, counts) / total)
+    std = float(np.sqrt(np.dot((values - mean) ** 2, counts) / total))
+    return {
+        'count': int(total),
+        'mean': mean,
+        'std': std,
+        'min': float(values[0]),
+        'max': float(values[-1]),
+        'quantiles': {
+            str(quantile): float(value)
+            for quantile, value in zip(QUANTILES, weighted_quantiles(values, counts))
+        },
+        'histogram': histogram(values, counts),
+    }
+
+
+def response_distribution(company_id, form_type_id, start=None, end=None):
+    """公司在 start 到 end（當地日期，含）之間某表單類型各題的答案分布（含已封存的記錄）"""
+    submissions = FormSubmission.objects.filter(
+        worker__company_id=company_id,
+        form_type_id=form_type_id
+    )
+    if start:
+        submissions = submissions.filter(submission_time__date__gte=start)
+    if end:
+        submissions = submissions.filter(submission_time__date__lte=end)
+
+    counter = ValueCounter()
+    rows = submissions.order_by().values_list('data', 'data_format').iterator(chunk_size=CHUNK_SIZE)
+    for data, data_format in rows:
+        counter.add(form_data.decode(form_type_id, data, data_format))
+    for record in archive.iter_records(company_id, start, end):
+        if record['form_type_id'] == form_type_id:
+            counter.add(record['data'])
+    counter.flush()
+
+    return {
+        'total_submissions': counter.submissions,
+        'questions': {
+            key: summarize(values, counts)
+            for key, (values, counts) in sorted(counter.counts.items())
+        },
+    }
+
+
+def cached_response_distribution(company_id, form_type_id, start=None, end=None, version=None):
+    """帶快取的答案分布，依 (公司, 表單類型, 日期範圍) 與資料版本快取"""
+    version = version or analytics.data_version(company_id)
+    key = f"{DISTRIBUTION_CACHE_PREFIX}:{company_id}:{form_type_id}:{start}:{end}:{version}"
+    result = cache.get(key)
+    if result is None:
+        result = response_distribution(company_id, form_type_id, start, end)
+        cache.set(key, result, settings.ANALYTICS_CACHE_TIMEOUT)
+    return result
@@ -0,0 +1,157 @@
+# backend/app/exports.py
+"""表單提交匯出（CSV / XLSX）
+
+以 values().iterator() 逐批讀取，邊讀邊輸出，記憶體用量與匯出筆數無關。
+data 欄位攤平成多個欄位：欄位名稱由前 EXPORT_SAMPLE_SIZE 筆資料決定，
+之後才出現的欄位以 JSON 放在 extra 欄位，不必為了決定表頭先讀完整份資料。
+已封存的記錄（見 archive.py）排在資料表記錄之前一併輸出。
+"""
+import csv
+import itertools
+import json
+import tempfile
+from django.utils import timezone
+from openpyxl import Workbook
+from .models import Company, FormSubmission
+from . import archive
+from . import form_data
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_SAMPLE_SIZE = 1000
+
+EXPORT_FIELDS = (
+    'id', 'worker__company__code', 'worker__code', 'worker__name', 'form_type_id',
+    'submission_count', 'time_segment', 'stage', 'submission_time', 'data'
+)
+BASE_COLUMNS = [
+    'submission_id', 'company_code', 'worker_code', 'worker_name', 'form_type_id',
+    'submission_count', 'time_segment', 'stage', 'submission_time'
+]
+EXTRA_COLUMN = 'extra'
+
+
+def export_queryset(company_id=None, start=None, end=None, form_type_id=None, stage=None):
+    """依篩選條件取得要匯出的提交記錄（start / end 為當地日期，含）"""
+    submissions = FormSubmission.objects.all()
+    if company_id is not None:
+        submissions = submissions.filter(worker__company_id=company_id)
+    if start:
+        submissions = submissions.filter(submission_time__date__gte=start)
+    if end:
+        submissions = submissions.filter(submission_time__date__lte=end)
+    if form_type_id is not None:
+        submissions = submissions.filter(form_type_id=form_type_id)
+    if stage is not None:
+        submissions = submissions.filter(stage=stage)
+    return submissions.order_by('id')
+
+
+def archived_source(company_id, start=None, end=None, form_type_id=None, stage=None):
+    """回傳逐筆產生封存記錄（格式同 EXPORT_FIELDS）的函式；範圍內沒有封存檔時回傳 None"""
+    if company_id is None or not archive.archived_months(company_id, start, end):
+        return None
+
+    def rows():
+        company_code = Company.objects.filter(id=company_id).values_list('code', flat=True).first()
+        workers = archive.company_workers(company_id)
+        for record in archive.iter_records(company_id, start, end):
+            worker = workers.get(record['worker_id'])
+            if worker is None:
+                continue
+            if form_type_id is not None and record['form_type_id'] != form_type_id:
+                continue
+            if stage is not None and record['stage'] != stage:
+                continue
+            yield (
+                record['id'], company_code, worker[0], worker[1], record['form_type_id'],
+                record['submission_count'], record['time_segment'], record['stage'],
+                record['submission_time'], record['data']
+            )
+    return rows
+
+
+def source_rows(submissions, archived=None):
+    """封存記錄在前、資料表記錄在後的資料列（格式同 EXPORT_FIELDS）"""
+    hot = submissions.values_list(*EXPORT_FIELDS, 'data_format').iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    hot = form_data.decoded_rows(hot, EXPORT_FIELDS.index('form_type_id'), EXPORT_FIELDS.index('data'))
+    return itertools.chain(archived() if archived else (), hot)
+
+
+def flatten_data(data, prefix=''):
+    """將巢狀的表單資料攤平為 {欄位: 值}，巢狀欄位以 . 連接"""
+    flat = {}
+    if isinstance(data, dict):
+        items = data.items()
+    elif isinstance(data, list):
+        items = enumerate(data)
+    else:
+        return {prefix or 'value': data}
+
+    for key, value in items:
+        name = f"{prefix}.{key}" if prefix else str(key)
+        if isinstance(value, (dict, list)) and value:
+            flat.update(flatten_data(value, name))
+        else:
+            flat[name] = value
+    return flat
+
+
+def data_columns(rows):
+    """由前 EXPORT_SAMPLE_SIZE 筆資料決定 data 攤平後的欄位（依出現順序）"""
+    columns = {}
+    for *_, data in itertools.islice(rows, EXPORT_SAMPLE_SIZE):
+        for key in flatten_data(data):
+            columns.setdefault(key, None)
+    return list(columns)
+
+
+def _cell(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def iter_rows(rows, columns):
+    """逐筆產生匯出資料列（不含表頭）"""
+    known = set(columns)
+    for row in rows:
+        *base, submission_time, data = row
+        flat = flatten_data(data)
+        extra = {key: value for key, value in flat.items() if key not in known}
+        yield (
+            base
+            + [timezone.localtime(submission_time).isoformat()]
+            + [_cell(flat.get(column)) for column in columns]
+            + [json.dumps(extra, ensure_ascii=False) if extra else None]
+        )
+
+
+class Echo:
+    """只回傳寫入內容的檔案物件，讓 csv.writer 可以逐列產生字串"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(submissions, archived=None):
+    """逐列產生 CSV 內容，開頭加上 BOM 讓 Excel 正確顯示中文"""
+    columns = data_columns(source_rows(submissions, archived))
+    writer = csv.writer(Echo())
+    yield '\ufeff' + writer.writerow(BASE_COLUMNS + columns + [EXTRA_COLUMN])
+    for row in iter_rows(source_rows(submissions, archived), columns):
+        yield writer.writerow(row)
+
+
+def write_xlsx(submissions, archived=None):
+    """以 openpyxl 唯寫模式寫入暫存檔並回傳檔案物件（已移到開頭）"""
+    columns = data_columns(source_rows(submissions, archived))
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('submissions')
+    sheet.append(BASE_COLUMNS + columns + [EXTRA_COLUMN])
+    for row in iter_rows(source_rows(submissions, archived), columns):
+        sheet.append(row)
+
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return output
@@ -0,0 +1,204 @@
+# backend/app/form_data.py
+"""FormSubmission.data 的精簡儲存格式
+
+每筆提交的 JSON 都重複存放相同的題目欄位名稱，資料量主要是欄位名稱而不是答案。
+啟用 FORM_DATA_COMPACT 後，每個表單類型有一份欄位字典（FormDataKeyset.keys），
+資料以位置陣列儲存：第 i 個元素為 keys[i] 的答案，沒有填寫的欄位為 null（尾端的 null 省略）。
+
+- 欄位字典只會附加新欄位，既有欄位的位置不變，因此程序內的字典快取不需要失效，
+  遇到超出快取長度的位置時才重新載入
+- 只轉換頂層欄位；巢狀的值（例如 NASA-TLX 的 weights）原樣存放在陣列中
+- 含 null 答案或不是物件的資料維持原本的 JSON 物件格式，以免與「未填寫」混淆
+- 載入模型時（FormSubmission.from_db）自動解碼；以 values_list 讀取 data 的程式
+  需同時讀取 data_format，再以 decoded_rows 解碼
+"""
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+
+PLAIN = 0
+COMPACT = 1
+
+FORMAT_CHOICES = [
+    (PLAIN, 'JSON 物件'),
+    (COMPACT, '依欄位字典的位置陣列'),
+]
+
+# {表單類型 ID: [欄位名稱]}，只在交易提交後更新
+_keys = {}
+_positions = {}
+
+
+def compact_enabled():
+    return getattr(settings, 'FORM_DATA_COMPACT', False)
+
+
+def key_positions(keys):
+    """{欄位名稱: 位置}"""
+    return {key: index for index, key in enumerate(keys)}
+
+
+def _cache(form_type_id, keys):
+    _keys[form_type_id] = list(keys)
+    _positions[form_type_id] = key_positions(keys)
+
+
+def get_keys(form_type_id, min_length=0, keyset_model=None):
+    """表單類型的欄位字典；快取的長度不足 min_length 時由資料庫重新載入"""
+    keys = _keys.get(form_type_id)
+    if keys is None or len(keys) < min_length:
+        if keyset_model is None:
+            from .models import FormDataKeyset as keyset_model  # models 匯入本模組，延後匯入避免循環
+        keys = keyset_model.objects.filter(form_type_id=form_type_id).values_list('keys', flat=True).first() or []
+        _cache(form_type_id, keys)
+    return keys
+
+
+def extend_keys(form_type_id, new_keys, keyset_model=None):
+    """將新欄位附加到欄位字典並回傳完整的字典
+
+    鎖定字典列後附加，並行的寫入不會配到相同位置；
+    程序快取在交易提交後才更新，交易回滾時不會留下資料庫中不存在的欄位
+    """
+    if keyset_model is None:
+        from .models import FormDataKeyset as keyset_model
+    with transaction.atomic():
+        keyset, _ = keyset_model.objects.select_for_update().get_or_create(form_type_id=form_type_id)
+        known = set(keyset.keys)
+        added = [key for key in new_keys if key not in known]
+        if added:
+            keyset.keys = keyset.keys + added
+            keyset.save(update_fields=['keys', 'updated_at'])
+    keys = list(keyset.keys)
+    transaction.on_commit(lambda: _cache(form_type_id, keys))
+    return keys
+
+
+def can_compact(data):
+    return (
+        isinstance(data, dict) and bool(data)
+        and all(isinstance(key, str) and value is not None for key, value in data.items())
+    )
+
+
+def pack(data, positions):
+    """依欄位位置將 dict 轉為陣列"""
+    values = [None] * (max(positions[key] for key in data) + 1)
+    for key, value in data.items():
+        values[positions[key]] = value
+    return values
+
+
+def encode(form_type_id, data, keyset_model=None):
+    """將表單資料轉為 (儲存值, 格式)；無法精簡的資料維持原格式"""
+    if not can_compact(data):
+        return data, PLAIN
+    get_keys(form_type_id, keyset_model=keyset_model)
+    positions = _positions[form_type_id]
+    if any(key not in positions for key in data):
+        positions = key_positions(extend_keys(form_type_id, list(data), keyset_model))
+    return pack(data, positions), COMPACT
+
+
+def decode(form_type_id, stored, data_format, keyset_model=None):
+    """將儲存值還原為表單資料 dict"""
+    if data_format != COMPACT:
+        return stored
+    return unpack(get_keys(form_type_id, len(stored), keyset_model), stored)
+
+
+def unpack(keys, stored):
+    """依欄位字典將陣列還原為 dict"""
+    return {keys[index]: value for index, value in enumerate(stored) if value is not None}
+
+
+def decoded_rows(rows, form_type_index, data_index):
+    """解碼 values_list 的資料列：每列最後一欄為 data_format，回傳時移除"""
+    for row in rows:
+        data_format = row[-1]
+        row = row[:-1]
+        if data_format == COMPACT:
+            row = (
+                row[:data_index]
+                + (decode(row[form_type_index], row[data_index], COMPACT),)
+                + row[data_index + 1:]
+            )
+        yield row
+
+
+class FormDataField(models.JSONField):
+    """表單資料欄位：寫入時依 FORM_DATA_COMPACT 設定編碼，並同步設定 instance.data_format
+
+    save() 與 bulk_create() 都會依欄位定義順序呼叫 pre_save，
+    data_format 必須定義在 data 之後，寫入的才會是這裡設定的格式；
+    bulk_update 不呼叫 pre_save，由 FormSubmissionQuerySet.bulk_update 代為編碼
+    """
+
+    def pre_save(self, model_instance, add):
+        value = super().pre_save(model_instance, add)
+        if compact_enabled():
+            value, data_format = encode(model_instance.form_type_id, value)
+        else:
+            data_format = PLAIN
+        model_instance.data_format = data_format
+        return value
+
+
+def convert(submission_model, keyset_model, to_format, batch_size=1000, queryset=None, log=None):
+    """將既有提交記錄分批轉為指定格式（依 ID 遞增，不使用 OFFSET），回傳轉換筆數
+
+    submission_model / keyset_model 可傳入遷移中的歷史模型；
+    每批在一個交易中以 bulk_update 寫入，中斷後重新執行會從尚未轉換的記錄繼續
+    """
+    from_format = PLAIN if to_format == COMPACT else COMPACT
+    # bulk_update 不會自動更新 auto_now 欄位；遷移中的歷史模型可能還沒有 updated_at
+    fields = ['data', 'data_format']
+    touch = any(field.name == 'updated_at' for field in submission_model._meta.fields)
+    if touch:
+        fields.append('updated_at')
+    queryset = submission_model.objects.all() if queryset is None else queryset
+    queryset = queryset.filter(data_format=from_format)
+    converted = 0
+    last_id = 0
+    positions = {}
+    while True:
+        rows = list(
+            queryset.filter(id__gt=last_id).order_by('id')
+            .values_list('id', 'form_type_id', 'data')[:batch_size]
+        )
+        if not rows:
+            return converted
+        last_id = rows[-1][0]
+
+        updates = []
+        with transaction.atomic():
+            if to_format == COMPACT:
+                # 每批每個表單類型只更新一次欄位字典，位置在本次轉換中自行保存
+                needed = {}
+                for _, form_type_id, data in rows:
+                    if can_compact(data):
+                        needed.setdefault(form_type_id, set()).update(data)
+                for form_type_id, keys in needed.items():
+                    known = positions.get(form_type_id)
+                    if known is None:
+                        known = key_positions(get_keys(form_type_id, keyset_model=keyset_model))
+                    missing = sorted(keys - known.keys())
+                    if missing:
+                        known = key_positions(extend_keys(form_type_id, missing, keyset_model))
+                    positions[form_type_id] = known
+
+            for submission_id, form_type_id, data in rows:
+                if to_format == COMPACT:
+                    if not can_compact(data):
+                        continue
+                    stored = pack(data, positions[form_type_id])
+                else:
+                    stored = decode(form_type_id, data, COMPACT, keyset_model)
+                update = submission_model(id=submission_id, data=stored, data_format=to_format)
+                if touch:
+                    update.updated_at = timezone.now()
+                updates.append(update)
+            submission_model.objects.bulk_update(updates, fields)
+        converted += len(updates)
+        if log:
+            log(f"  已轉換 {converted} 筆（至 ID {last_id}）")
@@ -0,0 +1,86 @@
+# backend/app/form_schemas.py
+"""表單資料的 JSON Schema 驗證
+
+每個 FormType 帶有一份 JSON Schema 與其內容雜湊（schema_hash），schema 變動時版本號遞增。
+驗證器在每個程序中只編譯一次並以雜湊快取，提交時只需查字典與執行驗證；
+schema 以含雜湊的網址提供，內容不會變動，用戶端與代理伺服器可長期快取。
+"""
+import copy
+import hashlib
+import json
+from jsonschema import Draft202012Validator
+from jsonschema.exceptions import SchemaError
+
+# 新表單類型的預設 schema：只要求資料為非空物件，欄位由管理介面補上
+DEFAULT_SCHEMA = {
+    '$schema': 'https://json-schema.org/draft/2020-12/schema',
+    'type': 'object',
+    'minProperties': 1,
+}
+
+
+def default_schema():
+    return copy.deepcopy(DEFAULT_SCHEMA)
+
+
+# 回傳給用戶端的錯誤數量上限
+MAX_ERRORS = 20
+
+_validators = {}
+
+
+class FormDataError(Exception):
+    """表單資料不符合 schema：errors 為 [{'path': 欄位路徑, 'message': 錯誤訊息}]"""
+
+    def __init__(self, errors):
+        super().__init__('表單資料格式錯誤')
+        self.errors = errors
+
+
+def canonical(schema):
+    """以固定的鍵順序與分隔符號序列化，內容相同的 schema 得到相同的字串"""
+    return json.dumps(schema, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+
+
+def schema_hash(schema):
+    return hashlib.sha256(canonical(schema).encode('utf-8')).hexdigest()
+
+
+def check_schema(schema):
+    """schema 本身無效時拋出 ValueError"""
+    try:
+        Draft202012Validator.check_schema(schema)
+    except SchemaError as e:
+        raise ValueError(f"無效的 JSON Schema: {e.message}")
+
+
+def get_validator(form_type):
+    """取得表單類型的驗證器，同一份 schema 在每個程序中只編譯一次"""
+    key = form_type.schema_hash or schema_hash(form_type.schema)
+    validator = _validators.get(key)
+    if validator is None:
+        validator = Draft202012Validator(form_type.schema, format_checker=Draft202012Validator.FORMAT_CHECKER)
+        _validators[key] = validator
+    return validator
+
+
+def errors_for(form_type, data):
+    """回傳資料不符合 schema 的錯誤列表（最多 MAX_ERRORS 筆），符合時為空列表"""
+    if not form_type.schema:
+        return []
+    errors = []
+    for error in get_validator(form_type).iter_errors(data):
+        errors.append({
+            'path': '.'.join(str(part) for part in error.absolute_path),
+            'message': error.message,
+        })
+        if len(errors) >= MAX_ERRORS:
+            break
+    return errors
+
+
+def validate(form_type, data):
+    """資料不符合 schema 時拋出 FormDataError"""
+    errors = errors_for(form_type, data)
+    if errors:
+        raise FormDataError(errors)
@@ -0,0 +1,373 @@
+# backend/app/imports.py
+"""歷史表單資料匯入（CSV / XLSX）
+
+逐列串流讀取檔案，勞工代碼與表單類型各以一次查詢建立對照表，
+每 IMPORT_BATCH_SIZE 列驗證一次，有效資料在各自的交易中以 bulk_create 寫入，
+並回傳逐列的錯誤報告。
+與既有記錄（含已封存的記錄）或同一檔案前面的資料列自然鍵相同的資料列
+（勞工、表單類型、提交次數、階段、提交時間）視為重複，不再寫入，只在報告中計數，
+同一個檔案重複匯入不會產生重複的提交記錄。
+
+欄位與匯出格式相同（submission_id、company_code、worker_name 等匯出專用欄位會被忽略）：
+worker_code、form_type_id（或 form_type 名稱）、submission_count、stage、
+time_segment（選填，預設 1）、submission_time；
+表單內容可放在 data 欄位（JSON），或以其餘欄位表示（a.b 形式的欄位名稱還原為巢狀結構）。
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from openpyxl import load_workbook
+from .models import FormSubmission, Worker
+from .scoring import save_scores
+from .stages import STAGE_REQUIREMENTS
+from . import reference_cache
+from . import rollups
+from . import bootstrap
+from . import batches
+from . import worker_stats
+from . import form_schemas
+from . import archive
+
+IMPORT_BATCH_SIZE = 1000
+IMPORT_MAX_ERRORS = 1000
+
+# 匯出檔中僅供閱讀、匯入時忽略的欄位
+IGNORED_COLUMNS = {'submission_id', 'id', 'company_code', 'worker_name', 'form_type_name'}
+META_COLUMNS = {
+    'worker_code', 'form_type_id', 'form_type', 'submission_count', 'stage',
+    'time_segment', 'submission_time', 'data', 'extra'
+}
+
+
+class ImportFormatError(Exception):
+    """不支援的檔案格式"""
+
+
+def natural_key(worker_id, form_type_id, submission_count, stage, submission_time):
+    """判斷重複匯入用的自然鍵"""
+    return (worker_id, form_type_id, submission_count, stage, submission_time)
+
+
+def _submission_key(submission):
+    return natural_key(
+        submission.worker_id, submission.form_type_id, submission.submission_count,
+        submission.stage, submission.submission_time
+    )
+
+
+def iter_csv(file):
+    """逐列讀取 CSV（自動略過 Excel 加上的 BOM），回傳 (列號, {欄位: 值})"""
+    text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    reader = csv.DictReader(text)
+    for line_number, row in enumerate(reader, start=2):
+        yield line_number, row
+
+
+def iter_xlsx(file):
+    """以唯讀模式逐列讀取 XLSX 的第一個工作表"""
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = [str(column).strip() if column is not None else '' for column in header]
+        for line_number, values in enumerate(rows, start=2):
+            if all(value is None for value in values):
+                continue
+            yield line_number, dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def iter_file(file, filename):
+    """依副檔名選擇讀取方式"""
+    name = (filename or '').lower()
+    if name.endswith('.xlsx'):
+        return iter_xlsx(file)
+    if name.endswith('.csv'):
+        return iter_csv(file)
+    raise ImportFormatError(f"不支援的檔案格式: {filename}")
+
+
+def _blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _int(value, name, errors, default=None):
+    if _blank(value):
+        if default is None:
+            errors.append(f"缺少 {name}")
+        return default
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        number = None
+    if number is None or not number.is_integer():
+        errors.append(f"無效的 {name}: {value}")
+        return None
+    return int(number)
+
+
+def _time(value, errors):
+    """解析填寫時間，未帶時區時視為當地時間"""
+    if _blank(value):
+        errors.append("缺少 submission_time")
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        try:
+            parsed = parse_datetime(str(value).strip())
+        except ValueError:
+            parsed = None
+    if parsed is None:
+        errors.append(f"無效的 submission_time: {value}")
+        return None
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _answer(value):
+    """CSV 的答案都是字串，能轉成數字的轉為數字"""
+    if not isinstance(value, str):
+        return value
+    text = value.strip()
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            continue
+    return text
+
+
+def build_data(row, errors):
+    """由 data 欄位或其餘欄位組成表單內容，a.b 形式的欄位名稱還原為巢狀結構"""
+    data = {}
+    for name in ('data', 'extra'):
+        raw = row.get(name)
+        if _blank(raw):
+            continue
+        try:
+            parsed = json.loads(raw) if isinstance(raw, str) else raw
+        except json.JSONDecodeError:
+            errors.append(f"{name} 欄位不是有效的 JSON")
+            continue
+        if not isinstance(parsed, dict):
+            errors.append(f"{name} 欄位必須是 JSON 物件")
+            continue
+        for key, value in parsed.items():
+            _assign(data, key, value)
+
+    for column, value in row.items():
+        if not column or column in META_COLUMNS or column in IGNORED_COLUMNS or _blank(value):
+            continue
+        _assign(data, column, _answer(value))
+
+    if not data:
+        errors.append("沒有任何表單內容")
+    return data
+
+
+def _assign(data, key, value):
+    parts = str(key).split('.')
+    target = data
+    for part in parts[:-1]:
+        child = target.get(part)
+        if not isinstance(child, dict):
+            child = target[part] = {}
+        target = child
+    target[parts[-1]] = value
+
+
+class SubmissionImporter:
+    """將一個檔案的資料匯入指定公司，錯誤以列號回報
+
+    dry_run 時只驗證不寫入
+    """
+
+    def __init__(self, company, dry_run=False, batch_size=IMPORT_BATCH_SIZE):
+        self.company = company
+        self.dry_run = dry_run
+        self.batch_size = batch_size
+        self.errors = []
+        self.error_count = 0
+        self.total_rows = 0
+        self.imported = 0
+        self.skipped = 0
+        self.imported_workers = set()
+        # 本檔案已接受的自然鍵，與各封存月份的自然鍵（需要時才讀取）
+        self.seen_keys = set()
+        self.archived_keys = {}
+        self.first_date = None
+        self.last_date = None
+
+        # 每個檔案各建立一次對照表
+        self.workers = dict(
+            Worker.objects.filter(company=company).values_list('code', 'id')
+        )
+        form_types = reference_cache.get_form_types()
+        self.form_type_ids = {form_type.id for form_type in form_types}
+        self.form_types_by_name = {form_type.name: form_type.id for form_type in form_types}
+
+    def run(self, rows):
+        batch = []
+        for line_number, row in rows:
+            self.total_rows += 1
+            batch.append((line_number, row))
+            if len(batch) >= self.batch_size:
+                self.process(batch)
+                batch = []
+        if batch:
+            self.process(batch)
+
+        if not self.dry_run and self.imported:
+            rollups.rebuild_rollups(self.first_date, self.last_date, self.company.id)
+            codes = {worker_id: code for code, worker_id in self.workers.items()}
+            bootstrap.invalidate(self.company.id, [codes[worker_id] for worker_id in self.imported_workers])
+        return self.report()
+
+    def process(self, batch):
+        """驗證一批資料列，有效的資料在同一個交易中寫入"""
+        valid = []
+        for line_number, row in batch:
+            errors = []
+            submission = self.validate(row, errors)
+            if errors:
+                self.add_error(line_number, errors)
+            else:
+                valid.append(submission)
+
+        existing = self.existing_keys(valid)
+        submissions = []
+        for submission in valid:
+            key = _submission_key(submission)
+            if key in existing or key in self.seen_keys:
+                self.skipped += 1
+                continue
+            self.seen_keys.add(key)
+            submissions.append(submission)
+
+        if not submissions:
+            return
+        if not self.dry_run:
+            with transaction.atomic():
+                FormSubmission.objects.bulk_create(submissions, batch_size=self.batch_size)
+                save_scores(submissions)
+                by_worker = {}
+                for submission in submissions:
+                    by_worker.setdefault(submission.worker_id, []).append(submission)
+                for worker_id, worker_submissions in by_worker.items():
+                    batches.record_submissions(worker_id, worker_submissions)
+                    worker_stats.record_submissions(worker_id, worker_submissions)
+
+        self.imported += len(submissions)
+        for submission in submissions:
+            self.imported_workers.add(submission.worker_id)
+            day = timezone.localdate(submission.submission_time)
+            self.first_date = min(self.first_date or day, day)
+            self.last_date = max(self.last_date or day, day)
+
+    def existing_keys(self, submissions):
+        """一批資料中已存在於資料表或封存檔的自然鍵（資料表以一次查詢取得）"""
+        if not submissions:
+            return set()
+        keys = set(
+            natural_key(*row) for row in FormSubmission.objects.filter(
+                worker_id__in={submission.worker_id for submission in submissions},
+                submission_time__in={submission.submission_time for submission in submissions}
+            ).values_list('worker_id', 'form_type_id', 'submission_count', 'stage', 'submission_time')
+        )
+        for month in {archive.month_start(submission.submission_time) for submission in submissions}:
+            keys |= self.archived_month_keys(month)
+        return keys
+
+    def archived_month_keys(self, month):
+        """封存月份中所有記錄的自然鍵，每個月份只讀取一次"""
+        if month not in self.archived_keys:
+            keys = set()
+            if month in archive.archived_months(self.company.id, month, month):
+                keys = {
+                    natural_key(
+                        record['worker_id'], record['form_type_id'], record['submission_count'],
+                        record['stage'], record['submission_time']
+                    )
+                    for record in archive.read_month(self.company.id, month)
+                }
+            self.archived_keys[month] = keys
+        return self.archived_keys[month]
+
+    def validate(self, row, errors):
+        worker_code = row.get('worker_code')
+        worker_id = None
+        if _blank(worker_code):
+            errors.append("缺少 worker_code")
+        else:
+            worker_code = str(worker_code).strip()
+            worker_id = self.workers.get(worker_code)
+            if worker_id is None:
+                errors.append(f"找不到勞工代碼: {worker_code}")
+
+        form_type_id = None
+        if not _blank(row.get('form_type_id')):
+            form_type_id = _int(row.get('form_type_id'), 'form_type_id', errors)
+            if form_type_id is not None and form_type_id not in self.form_type_ids:
+                errors.append(f"找不到表單類型: {form_type_id}")
+        elif not _blank(row.get('form_type')):
+            form_type_id = self.form_types_by_name.get(str(row.get('form_type')).strip())
+            if form_type_id is None:
+                errors.append(f"找不到表單類型: {row.get('form_type')}")
+        else:
+            errors.append("缺少 form_type_id")
+
+        submission_count = _int(row.get('submission_count'), 'submission_count', errors)
+        if submission_count is not None and submission_count < 1:
+            errors.append("submission_count 必須大於 0")
+        stage = _int(row.get('stage'), 'stage', errors)
+        if stage is not None and stage not in STAGE_REQUIREMENTS:
+            errors.append(f"無效的 stage: {stage}")
+        time_segment = _int(row.get('time_segment'), 'time_segment', errors, default=1)
+        submission_time = _time(row.get('submission_time'), errors)
+        data = build_data(row, errors)
+        if not errors:
+            for error in form_schemas.errors_for(reference_cache.get_form_type(form_type_id), data):
+                errors.append(f"{error['path'] or '表單內容'}: {error['message']}")
+
+        if errors:
+            return None
+        return FormSubmission(
+            worker_id=worker_id,
+            form_type_id=form_type_id,
+            submission_count=submission_count,
+            time_segment=time_segment,
+            stage=stage,
+            submission_time=submission_time,
+            data=data
+        )
+
+    def add_error(self, line_number, errors):
+        self.error_count += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append({'row': line_number, 'errors': errors})
+
+    def report(self):
+        return {
+            'dry_run': self.dry_run,
+            'total_rows': self.total_rows,
+            'imported': self.imported,
+            'skipped': self.skipped,
+            'error_count': self.error_count,
+            'errors': self.errors,
+            'errors_truncated': self.error_count > len(self.errors),
+        }
+
+
+def import_submissions(company, file, filename, dry_run=False, batch_size=IMPORT_BATCH_SIZE):
+    """匯入一個檔案並回傳報告，檔案格式錯誤時拋出 ImportFormatError"""
+    rows = iter_file(file, filename)
+    return SubmissionImporter(company, dry_run=dry_run, batch_size=batch_size).run(rows)
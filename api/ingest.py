@@ -0,0 +1,244 @@
+# backend/app/ingest.py
+"""表單提交緩衝佇列（Redis Stream）
+
+SUBMISSION_INGEST_MODE = 'queue' 時，提交 API 驗證後只將資料附加到 Redis Stream，
+立即回傳 202 與收據 ID；消費者（consume_submissions 指令或 Celery 任務）
+以消費者群組讀取，整批在同一個交易中 bulk_create，高峰時不再每筆提交各自搶資料庫寫入鎖。
+
+收據狀態存在 Redis（queued → done / failed），用戶端以收據 ID 查詢結果。
+消費者當機時未確認的訊息會留在群組的待處理清單，由下一個消費者以 XAUTOCLAIM 接手。
+
+帶冪等鍵的提交先提交冪等鍵佔位才附加到佇列（見 submissions.run_idempotent），
+並行的重試不會各自附加一則訊息。submission_time 為收到請求的時間，
+寫入資料庫的時間記錄在 created_at / updated_at，增量同步以 updated_at 比對，佇列延遲寫入的資料不會被漏掉。
+"""
+import json
+import logging
+import os
+import socket
+import uuid
+import redis
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import Worker
+from .submissions import build_submissions, save_submission_batch
+from . import reference_cache
+
+logger = logging.getLogger(__name__)
+
+RECEIPT_KEY_PREFIX = 'ingest:receipt'
+STATUS_QUEUED = 'queued'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+_client = None
+
+
+def queue_enabled():
+    return settings.SUBMISSION_INGEST_MODE == 'queue'
+
+
+def get_client():
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(settings.INGEST_REDIS_URL)
+    return _client
+
+
+def receipt_key(receipt_id):
+    return f"{RECEIPT_KEY_PREFIX}:{receipt_id}"
+
+
+def enqueue(worker, submission_count, stage, time_segment, forms):
+    """將已驗證的提交附加到佇列，回傳收據 ID
+
+    forms 為 (form_type, form_data) 的列表；填寫時間以收到請求的時間為準
+    """
+    receipt_id = uuid.uuid4().hex
+    entry = {
+        'receipt_id': receipt_id,
+        'worker_id': worker.id,
+        'submission_count': submission_count,
+        'stage': stage,
+        'time_segment': time_segment,
+        'submitted_at': timezone.now().isoformat(),
+        'forms': [[form_type.id, form_data] for form_type, form_data in forms],
+    }
+    receipt = {'status': STATUS_QUEUED, 'queued_at': entry['submitted_at']}
+
+    # 收據與佇列訊息在同一個 MULTI 中寫入
+    pipeline = get_client().pipeline(transaction=True)
+    pipeline.set(receipt_key(receipt_id), json.dumps(receipt), ex=settings.INGEST_RECEIPT_TTL)
+    pipeline.xadd(settings.INGEST_STREAM, {'entry': json.dumps(entry, ensure_ascii=False)})
+    pipeline.execute()
+    return receipt_id
+
+
+def get_receipt(receipt_id):
+    """查詢收據狀態，不存在或已過期時回傳 None"""
+    raw = get_client().get(receipt_key(receipt_id))
+    return json.loads(raw) if raw else None
+
+
+def _set_receipts(receipts):
+    if not receipts:
+        return
+    pipeline = get_client().pipeline(transaction=False)
+    for receipt_id, receipt in receipts.items():
+        pipeline.set(receipt_key(receipt_id), json.dumps(receipt), ex=settings.INGEST_RECEIPT_TTL)
+    pipeline.execute()
+
+
+def persist_entries(entries):
+    """將一批佇列訊息寫入資料庫，回傳 {收據 ID: 收據內容}
+
+    整批在同一個交易中以一次 bulk_create 寫入；整批失敗時改為逐筆寫入，
+    讓無法寫入的訊息（例如勞工已被刪除）只影響自己
+    """
+    workers = Worker.objects.in_bulk({entry['worker_id'] for entry in entries})
+    form_types = reference_cache.get_form_types_by_ids(
+        {form_type_id for entry in entries for form_type_id, _ in entry['forms']}
+    )
+
+    receipts = {}
+    valid = []
+    for entry in entries:
+        worker = workers.get(entry['worker_id'])
+        missing = [form_type_id for form_type_id, _ in entry['forms'] if form_type_id not in form_types]
+        if worker is None or missing:
+            receipts[entry['receipt_id']] = {
+                'status': STATUS_FAILED,
+                'error': '找不到該勞工' if worker is None else '找不到該表單類型',
+            }
+        else:
+            valid.append((entry, worker))
+
+    try:
+        receipts.update(_persist(valid, form_types))
+    except Exception:
+        logger.exception("批次寫入提交失敗，改為逐筆寫入")
+        for entry, worker in valid:
+            try:
+                receipts.update(_persist([(entry, worker)], form_types))
+            except Exception as e:
+                receipts[entry['receipt_id']] = {'status': STATUS_FAILED, 'error': str(e)}
+    return receipts
+
+
+def _persist(valid, form_types):
+    if not valid:
+        return {}
+
+    groups = []
+    with transaction.atomic():
+        reserved = {}
+        for entry, worker in valid:
+            submissions = build_submissions(
+                worker,
+                entry['submission_count'],
+                entry['stage'],
+                entry['time_segment'],
+                [(form_types[form_type_id], form_data) for form_type_id, form_data in entry['forms']],
+                submission_time=parse_datetime(entry['submitted_at']),
+                reserved=reserved
+            )
+            groups.append((entry, worker, submissions))
+        save_submission_batch([(worker, submissions) for _, worker, submissions in groups])
+
+    completed_at = timezone.now().isoformat()
+    return {
+        entry['receipt_id']: {
+            'status': STATUS_DONE,
+            'completed_at': completed_at,
+            'submission_count': entry['submission_count'],
+            'stage': entry['stage'],
+            'submissions': [
+                {
+                    'submission_id': submission.id,
+                    'form_type_id': submission.form_type_id,
+                    'time_segment': submission.time_segment
+                }
+                for submission in submissions
+            ],
+        }
+        for entry, _, submissions in groups
+    }
+
+
+def ensure_group():
+    """建立消費者群組（串流不存在時一併建立）"""
+    try:
+        get_client().xgroup_create(settings.INGEST_STREAM, settings.INGEST_GROUP, id='0', mkstream=True)
+    except redis.ResponseError as e:
+        if 'BUSYGROUP' not in str(e):
+            raise
+
+
+def consumer_name():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def consume_batch(consumer, batch_size=None, block_ms=None):
+    """讀取並寫入一批訊息，回傳處理的訊息數（沒有訊息時為 0）
+
+    先接手其他消費者閒置過久的待處理訊息，再讀取新訊息；
+    寫入資料庫並更新收據後才確認（XACK）並刪除訊息
+    """
+    client = get_client()
+    batch_size = batch_size or settings.INGEST_BATCH_SIZE
+
+    _, messages, *_ = client.xautoclaim(
+        settings.INGEST_STREAM, settings.INGEST_GROUP, consumer,
+        min_idle_time=settings.INGEST_CLAIM_IDLE_MS, start_id='0-0', count=batch_size
+    )
+    if not messages:
+        response = client.xreadgroup(
+            settings.INGEST_GROUP, consumer, {settings.INGEST_STREAM: '>'},
+            count=batch_size, block=block_ms
+        )
+        messages = response[0][1] if response else []
+    if not messages:
+        return 0
+
+    message_ids = []
+    entries = []
+    for message_id, fields in messages:
+        message_ids.append(message_id)
+        if not fields:
+            continue  # 已被刪除的訊息
+        try:
+            entries.append(json.loads(fields[b'entry']))
+        except (KeyError, ValueError):
+            logger.error("無法解析佇列訊息 %s", message_id)
+
+    # 寫入後、確認前當機的訊息會被重新接手，已完成的收據不再重複寫入
+    if entries:
+        statuses = client.mget([receipt_key(entry['receipt_id']) for entry in entries])
+        entries = [
+            entry for entry, raw in zip(entries, statuses)
+            if not raw or json.loads(raw).get('status') != STATUS_DONE
+        ]
+    _set_receipts(persist_entries(entries) if entries else {})
+
+    pipeline = client.pipeline(transaction=True)
+    pipeline.xack(settings.INGEST_STREAM, settings.INGEST_GROUP, *message_ids)
+    pipeline.xdel(settings.INGEST_STREAM, *message_ids)
+    pipeline.execute()
+    return len(message_ids)
+
+
+def drain(consumer=None, max_batches=None):
+    """持續處理到佇列清空（或達到批次上限），回傳處理的訊息數"""
+    ensure_group()
+    consumer = consumer or consumer_name()
+    total = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        processed = consume_batch(consumer)
+        if not processed:
+            break
+        total += processed
+        batches += 1
+    return total
@@ -6,8 +6,12 @@ from linebot.exceptions import InvalidSignatureError, LineBotApiError
 from django.conf import settings
 from django.urls import reverse
 from django.utils import timezone
-from django.db import models
 from .models import LineUserBinding, Worker, Company, FormSubmission, ReminderLog
+from . import reference_cache
+from . import batches
+from . import worker_stats
+from . import worker_tokens
+from .stages import STAGE_NAMES, STAGE_REQUIREMENTS, determine_current_stage
 
 class LineBotService:
     def __init__(self):
@@ -50,7 +54,7 @@ class LineBotService:
             
             # 查找公司和勞工
             try:
-                company = Company.objects.get(code=company_code)
+                company = reference_cache.require_company_by_code(company_code)
                 worker = Worker.objects.get(code=worker_code, company=company)
             except Company.DoesNotExist:
                 self.reply_message(event, "公司代碼不存在！")
@@ -70,7 +74,11 @@ class LineBotService:
                 binding.is_active = True
                 binding.save()
             
-            self.reply_message(event, f"綁定成功！\n勞工：{worker.name}\n公司：{company.name}\n\n您將會收到問卷填寫提醒。")
+            form_url = worker_tokens.build_form_url(worker, company)
+            self.reply_message(
+                event,
+                f"綁定成功！\n勞工：{worker.name}\n公司：{company.name}\n\n您將會收到問卷填寫提醒。\n\n問卷連結：{form_url}"
+            )
             
         except Exception as e:
             self.reply_message(event, f"綁定失敗：{str(e)}")
@@ -116,7 +124,7 @@ class LineBotService:
             worker = binding.worker
             
             # 生成問卷連結
-            form_url = f"{settings.FRONTEND_URL}/form?worker_code={worker.code}&company_code={worker.company.code}"
+            form_url = worker_tokens.build_form_url(worker)
             
             # 創建豐富訊息
             flex_message = self.create_form_flex_message(worker, form_url)
@@ -168,12 +176,9 @@ class LineBotService:
         today = now.date()
         current_hour = now.hour
         
-        # 獲取最新的批次號
-        latest_submission = FormSubmission.objects.filter(
-            worker=worker
-        ).order_by('-submission_time').first()
-        
-        current_batch = latest_submission.submission_count if latest_submission else 1
+        # 獲取目前的批次記錄
+        batch = batches.get_batch(worker)
+        current_batch = batch.current_batch or 1
         
         # 判斷當前應該在哪個階段
         current_stage = self.determine_current_stage(current_hour)
@@ -189,7 +194,7 @@ class LineBotService:
         stage_status = self.analyze_stage_status(today_submissions, current_stage)
         
         # 計算整體統計
-        total_stats = self.calculate_total_stats(worker)
+        total_stats = self.calculate_total_stats(worker, batch)
         
         return {
             'current_batch': current_batch,
@@ -197,33 +202,15 @@ class LineBotService:
             'stage_status': stage_status,
             'needs_fill': stage_status['current_stage_incomplete'],
             'total_stats': total_stats,
-            'last_submission': latest_submission
+            'last_submission_at': batch.last_submission_at
         }
     
     def determine_current_stage(self, hour):
         """根據當前時間判斷應該在哪個階段"""
-        if 6 <= hour < 12:
-            return 0  # 早上表單 (6-12點)
-        elif 12 <= hour < 14:
-            return 1  # 中午表單 (12-14點)
-        elif 14 <= hour < 17:
-            return 2  # 下午表單 (14-17點)
-        elif 17 <= hour < 20:
-            return 3  # 下班表單 (17-20點)
-        else:
-            return 4  # 晚上表單 (20點後)
+        return determine_current_stage(hour)
     
     def analyze_stage_status(self, today_submissions, current_stage):
         """分析各階段的填寫狀態"""
-        # 定義各階段需要的表單類型 (對應你的 STAGE_FORMS)
-        STAGE_REQUIREMENTS = {
-            0: [1, 2, 3],  # 早上：睡眠、嗜睡、視覺疲勞
-            1: [2, 3],     # 中午：嗜睡、視覺疲勞
-            2: [2, 3],     # 下午：嗜睡、視覺疲勞
-            3: [2, 3],     # 下班：嗜睡、視覺疲勞
-            4: [2, 3, 4]   # 晚上：嗜睡、視覺疲勞、NASA-TLX
-        }
-        
         stages_status = {}
         current_stage_incomplete = False
         
@@ -250,9 +237,10 @@ class LineBotService:
         stages_status['current_stage_incomplete'] = current_stage_incomplete
         return stages_status
     
-    def calculate_total_stats(self, worker):
+    def calculate_total_stats(self, worker, batch=None):
         """計算總體統計資料"""
-        total_submissions = FormSubmission.objects.filter(worker=worker).count()
+        batch = batch or batches.get_batch(worker)
+        stats = worker_stats.get_stats(worker)
         
         # 計算最近7天的填寫次數
         week_ago = timezone.now() - timedelta(days=7)
@@ -261,32 +249,22 @@ class LineBotService:
             submission_time__gte=week_ago
         ).count()
         
-        # 計算當前批次進度
-        current_batch = FormSubmission.objects.filter(
-            worker=worker
-        ).aggregate(max_batch=models.Max('submission_count'))['max_batch'] or 1
-        
-        # 計算當前批次已完成的階段數
-        today = timezone.now().date()
-        today_stages = FormSubmission.objects.filter(
-            worker=worker,
-            submission_time__date=today,
-            submission_count=current_batch
-        ).values('stage').distinct().count()
+        # 當前批次進度與今日已填寫的階段數
+        current_batch = batch.current_batch or 1
+        today_stages = len(batches.submitted_stages(batch))
         
         return {
-            'total_submissions': total_submissions,
+            'total_submissions': stats.submission_total,
             'recent_submissions': recent_submissions,
             'current_batch': current_batch,
+            'current_batch_submissions': stats.batch_counts.get(str(current_batch), 0),
             'today_completed_stages': today_stages,
-            'first_submission_date': FormSubmission.objects.filter(
-                worker=worker
-            ).order_by('submission_time').first()
+            'first_submission_date': stats.first_submission_at
         }
     
     def create_status_message(self, worker, status_info):
         """創建詳細的狀態訊息"""
-        stage_names = ["早上", "中午", "下午", "下班", "晚上"]
+        stage_names = STAGE_NAMES
         form_names = {1: "睡眠調查", 2: "嗜睡量表", 3: "視覺疲勞", 4: "NASA-TLX"}
         
         message = f"📊 {worker.name} 的填寫狀態\n"
@@ -317,8 +295,8 @@ class LineBotService:
         message += f"近7天填寫：{stats['recent_submissions']} 次\n"
         
         # 最後填寫時間
-        if status_info['last_submission']:
-            last_time = status_info['last_submission'].submission_time
+        if status_info['last_submission_at']:
+            last_time = timezone.localtime(status_info['last_submission_at'])
             message += f"最後填寫：{last_time.strftime('%m/%d %H:%M')}\n"
         
         # 提醒訊息
@@ -370,7 +348,7 @@ class LineBotService:
     
     def create_history_message(self, worker, history):
         """創建歷史記錄訊息"""
-        stage_names = ["早上", "中午", "下午", "下班", "晚上"]
+        stage_names = STAGE_NAMES
         form_names = {1: "睡眠", 2: "嗜睡", 3: "視覺", 4: "TLX"}
         
         message = f"📋 {worker.name} 近7天填寫記錄\n\n"
@@ -430,7 +408,7 @@ class LineBotService:
             'needs_reminder': len(missing_forms) > 0,
             'missing_forms': missing_forms,
             'current_stage': current_stage,
-            'stage_name': ["早上", "中午", "下午", "下班", "晚上"][current_stage]
+            'stage_name': STAGE_NAMES[current_stage]
         }
 
     def send_binding_instruction(self, event):
@@ -512,15 +490,13 @@ class LineBotService:
         """檢查是否需要填寫問卷"""
         # 這裡可以根據你的業務邏輯來判斷
         # 例如：檢查上次填寫時間是否超過一週
-        latest_submission = FormSubmission.objects.filter(
-            worker=worker
-        ).order_by('-submission_time').first()
+        last_submission_at = batches.get_batch(worker).last_submission_at
         
-        if not latest_submission:
+        if not last_submission_at:
             return True
         
         # 如果超過一週沒填寫，需要提醒
-        return timezone.now() - latest_submission.submission_time > timedelta(days=7)
+        return timezone.now() - last_submission_at > timedelta(days=7)
     
     def log_reminder_clicked(self, worker):
         """記錄提醒點擊"""
@@ -546,7 +522,7 @@ class LineBotService:
             )
             
             # 創建 Flex Message
-            form_url = f"{settings.FRONTEND_URL}/form?worker_code={worker.code}&company_code={worker.company.code}"
+            form_url = worker_tokens.build_form_url(worker)
             flex_message = self.create_form_flex_message(worker, form_url)
             
             # 發送訊息
@@ -0,0 +1,51 @@
+# backend/app/management/commands/archive_submissions.py
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from api.archive import archive_cutoff, archive_submissions
+
+
+class Command(BaseCommand):
+    help = '將超過保留期限的表單提交（以整月為單位）寫入壓縮封存檔，並從資料表刪除'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--before',
+            help=f'封存此日期所在月份之前的記錄 YYYY-MM-DD（預設為 {settings.ARCHIVE_AFTER_DAYS} 天前所在月份）'
+        )
+        parser.add_argument('--company', type=int, help='只封存指定的公司 ID')
+        parser.add_argument('--batch-size', type=int, default=settings.ARCHIVE_BATCH_SIZE, help='每批讀取與刪除的筆數')
+        parser.add_argument('--dry-run', action='store_true', help='只列出待封存的月份與筆數')
+
+    def handle(self, *args, **options):
+        before = None
+        if options['before']:
+            try:
+                before = parse_date(options['before'])
+            except ValueError:
+                before = None
+            if before is None:
+                raise CommandError(f"無效的 before 日期: {options['before']}")
+            if before > archive_cutoff():
+                self.stdout.write(self.style.WARNING(f"封存界線晚於預設保留期限（{archive_cutoff()}）"))
+
+        summary = archive_submissions(
+            before=before,
+            company_id=options['company'],
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run']
+        )
+        for item in summary['months']:
+            if options['dry_run']:
+                self.stdout.write(f"公司 {item['company_id']} {item['month']}: 待封存 {item['pending']} 筆")
+            else:
+                self.stdout.write(
+                    f"公司 {item['company_id']} {item['month']}: 封存 {item['archived']} 筆，刪除 {item['deleted']} 筆"
+                )
+
+        if not summary['months']:
+            self.stdout.write(f"{summary['before']} 之前沒有待封存的記錄")
+        elif not options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(
+                f"封存完成：共封存 {summary['archived']} 筆，刪除 {summary['deleted']} 筆"
+            ))
@@ -0,0 +1,87 @@
+# backend/app/management/commands/backfill_scores.py
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from api.models import FormSubmission, SubmissionScore
+from api.scoring import compute_scores, scoring_definitions
+from api import form_data
+
+
+def score_batch(rows, definitions):
+    """計算一批 (id, form_type_id, data) 的分數
+
+    definitions 為 {表單類型 ID: 計分定義}，只處理原始資料以便在子程序執行
+    """
+    return [
+        (submission_id, metric, value)
+        for submission_id, form_type_id, data in rows
+        for metric, value in compute_scores(definitions.get(form_type_id), data).items()
+    ]
+
+
+class Command(BaseCommand):
+    help = '為既有的表單提交記錄回填衍生分數'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='每批處理的提交筆數')
+        parser.add_argument('--workers', type=int, default=1, help='平行計算的程序數')
+        parser.add_argument('--form-type', type=int, help='只處理指定的表單類型 ID')
+        parser.add_argument('--rebuild', action='store_true', help='先刪除既有分數再全部重新計算')
+
+    def handle(self, *args, **options):
+        definitions = scoring_definitions()
+        if options['form_type'] and options['form_type'] not in definitions:
+            raise CommandError(f"表單類型 {options['form_type']} 沒有計分定義")
+        form_type_ids = [options['form_type']] if options['form_type'] else list(definitions)
+        submissions = FormSubmission.objects.filter(form_type_id__in=form_type_ids)
+
+        if options['rebuild']:
+            deleted, _ = SubmissionScore.objects.filter(submission__in=submissions).delete()
+            self.stdout.write(f"已刪除 {deleted} 筆既有分數")
+        else:
+            submissions = submissions.filter(scores__isnull=True)
+
+        batches = self.iter_batches(submissions, options['batch_size'])
+        written = 0
+
+        if options['workers'] > 1:
+            # 同時最多只保留 workers * 2 批在途，讀取與寫入都維持固定記憶體
+            with ProcessPoolExecutor(max_workers=options['workers']) as executor:
+                pending = deque()
+                for rows in batches:
+                    pending.append(executor.submit(score_batch, rows, definitions))
+                    if len(pending) >= options['workers'] * 2:
+                        written += self.save(pending.popleft().result())
+                while pending:
+                    written += self.save(pending.popleft().result())
+        else:
+            for rows in batches:
+                written += self.save(score_batch(rows, definitions))
+
+        self.stdout.write(self.style.SUCCESS(f"回填完成，共寫入 {written} 筆分數"))
+
+    def iter_batches(self, submissions, batch_size):
+        """依 ID 遞增分批讀取，不使用 OFFSET"""
+        last_id = 0
+        while True:
+            rows = list(form_data.decoded_rows(
+                submissions.filter(id__gt=last_id)
+                .order_by('id')
+                .values_list('id', 'form_type_id', 'data', 'data_format')[:batch_size],
+                1, 2
+            ))
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            yield rows
+
+    def save(self, scores):
+        with transaction.atomic():
+            SubmissionScore.objects.bulk_create(
+                [SubmissionScore(submission_id=submission_id, metric=metric, value=value)
+                 for submission_id, metric, value in scores],
+                ignore_conflicts=True
+            )
+        self.stdout.write(f"  寫入 {len(scores)} 筆分數")
+        return len(scores)
@@ -0,0 +1,91 @@
+# backend/app/management/commands/benchmark_form_data.py
+import json
+import time
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Sum, TextField
+from django.db.models.functions import Cast, Length
+from api import form_data
+from api.models import FormSubmission
+
+
+class Command(BaseCommand):
+    help = '比較表單資料 JSON 物件與精簡格式的儲存大小與掃描時間'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, help='只計算指定的公司 ID')
+        parser.add_argument('--limit', type=int, default=100000, help='估算兩種格式時讀取的筆數上限')
+        parser.add_argument('--repeat', type=int, default=3, help='掃描計時的重複次數（取最快的一次）')
+
+    def handle(self, *args, **options):
+        submissions = FormSubmission.objects.all()
+        if options['company'] is not None:
+            submissions = submissions.filter(worker__company_id=options['company'])
+
+        # 資料表目前的 data 欄位大小（以資料庫序列化的文字長度計算）
+        self.stdout.write("資料表目前的 data 欄位：")
+        for row in submissions.values('data_format').annotate(
+            rows=Count('id'), size=Sum(Length(Cast('data', TextField())))
+        ).order_by('data_format'):
+            label = dict(form_data.FORMAT_CHOICES)[row['data_format']]
+            self.stdout.write(f"  {label}: {row['rows']} 筆，{row['size'] or 0:,} 字元")
+
+        # 以目前的儲存格式掃描資料表並解碼；轉換前後各執行一次即可比較
+        scan = submissions.order_by('id').values_list('form_type_id', 'data', 'data_format')[:options['limit']]
+
+        def scan_table():
+            return list(form_data.decoded_rows(scan.iterator(chunk_size=2000), 0, 1))
+
+        rows = scan_table()
+        if not rows:
+            self.stdout.write("沒有任何提交記錄")
+            return
+        table_time = self.best_time(scan_table, options['repeat'])
+        self.stdout.write(f"  掃描並解碼 {len(rows)} 筆：{table_time * 1000:.1f} ms")
+
+        # 同一批記錄分別以兩種格式序列化，比較大小與解析時間
+
+        # 欄位位置只在本地計算，不寫入欄位字典
+        positions = {}
+        plain, compact = [], []
+        for form_type_id, data in rows:
+            plain.append(json.dumps(data, ensure_ascii=False))
+            if form_data.can_compact(data):
+                known = positions.setdefault(
+                    form_type_id, form_data.key_positions(form_data.get_keys(form_type_id))
+                )
+                for key in data:
+                    known.setdefault(key, len(known))
+                compact.append((form_type_id, json.dumps(form_data.pack(data, known), ensure_ascii=False)))
+            else:
+                compact.append((None, plain[-1]))
+        keys = {form_type_id: sorted(known, key=known.get) for form_type_id, known in positions.items()}
+
+        def scan_plain():
+            return [json.loads(text) for text in plain]
+
+        def scan_compact():
+            return [
+                form_data.unpack(keys[form_type_id], json.loads(text)) if form_type_id else json.loads(text)
+                for form_type_id, text in compact
+            ]
+
+        plain_size = sum(len(text.encode('utf-8')) for text in plain)
+        compact_size = sum(len(text.encode('utf-8')) for _, text in compact)
+        plain_time = self.best_time(scan_plain, options['repeat'])
+        compact_time = self.best_time(scan_compact, options['repeat'])
+
+        self.stdout.write(f"估算 {len(rows)} 筆：")
+        self.stdout.write(f"  JSON 物件：{plain_size:,} bytes，解析 {plain_time * 1000:.1f} ms")
+        self.stdout.write(f"  精簡格式：{compact_size:,} bytes，解析並解碼 {compact_time * 1000:.1f} ms")
+        self.stdout.write(self.style.SUCCESS(
+            f"大小減少 {1 - compact_size / plain_size:.1%}，掃描時間 {compact_time / plain_time:.2f} 倍"
+        ))
+
+    def best_time(self, function, repeat):
+        best = None
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            function()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
@@ -0,0 +1,32 @@
+# backend/app/management/commands/consume_submissions.py
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from api import ingest
+
+
+class Command(BaseCommand):
+    help = '常駐讀取提交佇列（Redis Stream），批次寫入資料庫'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='處理到佇列清空後即結束')
+        parser.add_argument('--batch-size', type=int, default=settings.INGEST_BATCH_SIZE, help='每批讀取的訊息數')
+        parser.add_argument('--block', type=int, default=5000, help='沒有新訊息時等待的毫秒數')
+        parser.add_argument('--consumer', help='消費者名稱（預設為主機名稱與程序 ID）')
+
+    def handle(self, *args, **options):
+        ingest.ensure_group()
+        consumer = options['consumer'] or ingest.consumer_name()
+
+        if options['once']:
+            processed = ingest.drain(consumer)
+            self.stdout.write(self.style.SUCCESS(f"共寫入 {processed} 筆佇列提交"))
+            return
+
+        self.stdout.write(f"消費者 {consumer} 開始讀取 {settings.INGEST_STREAM}")
+        try:
+            while True:
+                processed = ingest.consume_batch(consumer, options['batch_size'], options['block'])
+                if processed:
+                    self.stdout.write(f"寫入 {processed} 筆佇列提交")
+        except KeyboardInterrupt:
+            self.stdout.write("已停止")
@@ -0,0 +1,33 @@
+# backend/app/management/commands/convert_form_data.py
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from api import form_data
+from api.models import FormDataKeyset, FormSubmission
+
+
+class Command(BaseCommand):
+    help = '將既有表單提交的 data 分批轉為精簡格式（依欄位字典的位置陣列）或還原為 JSON 物件'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--to', choices=['compact', 'plain'], default='compact', help='目標格式')
+        parser.add_argument('--company', type=int, help='只轉換指定的公司 ID')
+        parser.add_argument('--batch-size', type=int, default=1000, help='每批轉換的筆數')
+
+    def handle(self, *args, **options):
+        to_format = form_data.COMPACT if options['to'] == 'compact' else form_data.PLAIN
+        if to_format == form_data.COMPACT and not settings.FORM_DATA_COMPACT:
+            self.stdout.write(self.style.WARNING(
+                "FORM_DATA_COMPACT 未啟用：既有記錄會轉為精簡格式，但新的提交仍以 JSON 物件儲存"
+            ))
+
+        submissions = FormSubmission.objects.all()
+        if options['company'] is not None:
+            submissions = submissions.filter(worker__company_id=options['company'])
+
+        converted = form_data.convert(
+            FormSubmission, FormDataKeyset, to_format,
+            batch_size=options['batch_size'],
+            queryset=submissions,
+            log=self.stdout.write
+        )
+        self.stdout.write(self.style.SUCCESS(f"轉換完成，共 {converted} 筆"))
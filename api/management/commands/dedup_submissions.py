@@ -0,0 +1,47 @@
+# backend/app/management/commands/dedup_submissions.py
+from django.core.management.base import BaseCommand, CommandError
+from api.dedup import DEFAULT_KEY, DEDUP_BATCH_SIZE, KEEP_ORDERINGS, KEY_FIELDS, dedup_submissions, parse_key
+
+
+class Command(BaseCommand):
+    help = '依自然鍵找出重複的表單提交，每組只保留一筆，其餘分批刪除'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--key', default=','.join(DEFAULT_KEY),
+            help=f"以逗號分隔的自然鍵欄位（可用: {', '.join(KEY_FIELDS)}），預設 {','.join(DEFAULT_KEY)}"
+        )
+        parser.add_argument('--keep', choices=list(KEEP_ORDERINGS), default='latest', help='每組保留最新或最早的一筆')
+        parser.add_argument('--company', type=int, help='只處理指定的公司 ID')
+        parser.add_argument('--batch-size', type=int, default=DEDUP_BATCH_SIZE, help='每批刪除的筆數')
+        parser.add_argument('--sample', type=int, default=20, help='報告中列出的重複組數')
+        parser.add_argument('--dry-run', action='store_true', help='只列出重複情形，不刪除')
+
+    def handle(self, *args, **options):
+        try:
+            key = parse_key(options['key'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        summary = dedup_submissions(
+            key=key,
+            keep=options['keep'],
+            company_id=options['company'],
+            dry_run=options['dry_run'],
+            batch_size=options['batch_size'],
+            sample=options['sample']
+        )
+
+        if not summary['groups']:
+            self.stdout.write(f"自然鍵 ({', '.join(key)}) 沒有重複的提交記錄")
+            return
+
+        self.stdout.write(f"自然鍵 ({', '.join(key)}) 共 {summary['groups']} 組重複，多出 {summary['duplicates']} 筆")
+        for group in summary['samples']:
+            values = ', '.join(f"{field}={group[field]}" for field in key)
+            self.stdout.write(f"  {values}: {group['total']} 筆")
+
+        if options['dry_run']:
+            self.stdout.write(f"試執行：將刪除 {summary['duplicates']} 筆（保留{'最新' if options['keep'] == 'latest' else '最早'}的一筆）")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"已刪除 {summary['deleted']} 筆重複記錄"))
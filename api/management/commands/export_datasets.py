@@ -0,0 +1,30 @@
+# backend/app/management/commands/export_datasets.py
+from django.core.management.base import BaseCommand, CommandError
+from api.datasets import DATASETS, export_datasets
+
+
+class Command(BaseCommand):
+    help = '匯出研究用 Parquet 資料集（依公司與月份分區，預設只重寫新增或變動的分區）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('datasets', nargs='*', help=f"要匯出的資料集（{', '.join(DATASETS)}），預設全部")
+        parser.add_argument('--full', action='store_true', help='忽略既有分區，全部重新寫入')
+        parser.add_argument('--company', type=int, help='只匯出指定的公司 ID')
+        parser.add_argument('--output', help='輸出目錄（預設為 DATASET_EXPORT_ROOT）')
+
+    def handle(self, *args, **options):
+        unknown = [name for name in options['datasets'] if name not in DATASETS]
+        if unknown:
+            raise CommandError(f"未知的資料集: {', '.join(unknown)}")
+
+        summary = export_datasets(
+            names=options['datasets'] or None,
+            full=options['full'],
+            company_id=options['company'],
+            root=options['output']
+        )
+        for name, result in summary.items():
+            self.stdout.write(
+                f"{name}: 寫入 {result['written']} 個分區，略過 {result['skipped']} 個，移除 {result['removed']} 個"
+            )
+        self.stdout.write(self.style.SUCCESS("資料集匯出完成"))
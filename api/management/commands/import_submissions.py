@@ -0,0 +1,43 @@
+# backend/app/management/commands/import_submissions.py
+import json
+from django.core.management.base import BaseCommand, CommandError
+from api.models import Company
+from api.imports import IMPORT_BATCH_SIZE, ImportFormatError, import_submissions
+
+
+class Command(BaseCommand):
+    help = '由 CSV / XLSX 檔案匯入歷史表單資料'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV 或 XLSX 檔案路徑')
+        parser.add_argument('--company', required=True, help='公司代碼')
+        parser.add_argument('--dry-run', action='store_true', help='只驗證不寫入')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE, help='每批驗證與寫入的筆數')
+        parser.add_argument('--report', help='將錯誤報告寫入指定的 JSON 檔案')
+
+    def handle(self, *args, **options):
+        try:
+            company = Company.objects.get(code=options['company'])
+        except Company.DoesNotExist:
+            raise CommandError(f"找不到公司代碼: {options['company']}")
+
+        try:
+            with open(options['path'], 'rb') as file:
+                report = import_submissions(
+                    company, file, options['path'],
+                    dry_run=options['dry_run'],
+                    batch_size=options['batch_size']
+                )
+        except (OSError, ImportFormatError) as e:
+            raise CommandError(str(e))
+
+        if options['report']:
+            with open(options['report'], 'w', encoding='utf-8') as report_file:
+                json.dump(report, report_file, ensure_ascii=False, indent=2)
+
+        for error in report['errors'][:20]:
+            self.stdout.write(f"第 {error['row']} 列: {'；'.join(error['errors'])}")
+        self.stdout.write(self.style.SUCCESS(
+            f"共 {report['total_rows']} 列，{'可匯入' if report['dry_run'] else '已匯入'} {report['imported']} 筆，"
+            f"重複略過 {report['skipped']} 列，錯誤 {report['error_count']} 列"
+        ))
@@ -0,0 +1,45 @@
+# backend/app/management/commands/rebuild_rollups.py
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from api.models import FormSubmission
+from api.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = '由表單提交記錄重建指定日期範圍的每日提交彙總'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='起始日期 YYYY-MM-DD（預設為最早的提交日期）')
+        parser.add_argument('--end', help='結束日期 YYYY-MM-DD（預設為今天）')
+        parser.add_argument('--company', type=int, help='只重建指定的公司 ID')
+
+    def handle(self, *args, **options):
+        start = self.parse(options['start'], 'start')
+        end = self.parse(options['end'], 'end') or timezone.localdate()
+
+        if start is None:
+            first = FormSubmission.objects.order_by('submission_time').values_list(
+                'submission_time', flat=True
+            ).first()
+            if first is None:
+                self.stdout.write("沒有任何提交記錄")
+                return
+            start = timezone.localdate(first)
+
+        if start > end:
+            raise CommandError("起始日期不可晚於結束日期")
+
+        written = rebuild_rollups(start, end, options['company'])
+        self.stdout.write(self.style.SUCCESS(f"已重建 {start} 至 {end} 的每日彙總，共 {written} 筆"))
+
+    def parse(self, value, name):
+        if not value:
+            return None
+        try:
+            parsed = parse_date(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise CommandError(f"無效的 {name} 日期: {value}")
+        return parsed
@@ -0,0 +1,15 @@
+# backend/app/management/commands/repair_worker_stats.py
+from django.core.management.base import BaseCommand
+from api.worker_stats import rebuild
+
+
+class Command(BaseCommand):
+    help = '由表單提交、封存檔與實驗記錄重新計算勞工活動統計'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, help='只重新計算指定的公司 ID')
+        parser.add_argument('--worker', type=int, action='append', help='只重新計算指定的勞工 ID（可重複指定）')
+
+    def handle(self, *args, **options):
+        updated = rebuild(worker_ids=options['worker'], company_id=options['company'])
+        self.stdout.write(self.style.SUCCESS(f"已重新計算 {updated} 位勞工的統計"))
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.6 on 2026-10-18 22:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_worker_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletedRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_name', models.CharField(choices=[('formsubmission', '表單提交'), ('experiment', '實驗紀錄')], max_length=30)),
+                ('object_id', models.BigIntegerField()),
+                ('worker_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='formsubmission',
+            index=models.Index(fields=['worker', 'submission_time'], name='api_formsub_worker__7aed88_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deletedrecord',
+            index=models.Index(fields=['model_name', 'worker_id', 'deleted_at'], name='api_deleted_model_n_ed1f86_idx'),
+        ),
+    ]
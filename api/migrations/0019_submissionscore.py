@@ -0,0 +1,27 @@
+# Generated by Django 5.1.6 on 2026-10-18 22:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_deletedrecord_formsubmission_worker_time_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissionScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(max_length=50, verbose_name='指標')),
+                ('value', models.FloatField(verbose_name='分數')),
+                ('submission', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scores', to='api.formsubmission')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['metric', 'value'], name='api_submiss_metric_4fca41_idx')],
+                'unique_together': {('submission', 'metric')},
+            },
+        ),
+    ]
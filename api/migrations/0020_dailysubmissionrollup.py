@@ -0,0 +1,33 @@
+# Generated by Django 5.1.6 on 2026-10-18 22:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_submissionscore'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySubmissionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='日期')),
+                ('stage', models.IntegerField(verbose_name='階段')),
+                ('submission_count', models.IntegerField(default=0, verbose_name='提交筆數')),
+                ('worker_count', models.IntegerField(default=0, verbose_name='填寫人數')),
+                ('score_sum', models.FloatField(default=0, verbose_name='主要指標分數總和')),
+                ('score_count', models.IntegerField(default=0, verbose_name='主要指標分數筆數')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api.company', verbose_name='公司')),
+                ('form_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api.formtype', verbose_name='表單類型')),
+            ],
+            options={
+                'verbose_name': '每日提交彙總',
+                'verbose_name_plural': '每日提交彙總',
+                'unique_together': {('company', 'date', 'stage', 'form_type')},
+            },
+        ),
+    ]
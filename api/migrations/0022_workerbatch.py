@@ -0,0 +1,72 @@
+# Generated by Django 5.1.6 on 2026-10-18 22:29
+
+from datetime import timedelta
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Max, Min
+from django.utils import timezone
+
+
+def backfill_worker_batches(apps, schema_editor):
+    """由既有提交記錄建立每位勞工的目前批次"""
+    FormSubmission = apps.get_model('api', 'FormSubmission')
+    WorkerBatch = apps.get_model('api', 'WorkerBatch')
+
+    batches = {}
+    for worker_id, submission_count, first, last in FormSubmission.objects.values(
+        'worker_id', 'submission_count'
+    ).annotate(first=Min('submission_time'), last=Max('submission_time')).values_list(
+        'worker_id', 'submission_count', 'first', 'last'
+    ).order_by():
+        batch = batches.setdefault(worker_id, WorkerBatch(worker_id=worker_id))
+        if submission_count > batch.current_batch:
+            batch.current_batch = submission_count
+            batch.started_on = timezone.localdate(first)
+            batch.stages_date = timezone.localdate(last)
+        if batch.last_submission_at is None or last > batch.last_submission_at:
+            batch.last_submission_at = last
+
+    # 已填寫的階段只在當天有意義，只需掃描最近的提交
+    recent = FormSubmission.objects.filter(
+        submission_time__gte=timezone.now() - timedelta(days=2)
+    ).values_list('worker_id', 'submission_count', 'stage', 'submission_time')
+    for worker_id, submission_count, stage, submission_time in recent:
+        batch = batches[worker_id]
+        if (
+            submission_count == batch.current_batch
+            and timezone.localdate(submission_time) == batch.stages_date
+            and stage not in batch.submitted_stages
+        ):
+            batch.submitted_stages.append(stage)
+
+    for batch in batches.values():
+        batch.submitted_stages.sort()
+    WorkerBatch.objects.bulk_create(batches.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0021_formsubmission_submission_time_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkerBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('current_batch', models.IntegerField(default=0, verbose_name='目前批次')),
+                ('started_on', models.DateField(blank=True, null=True, verbose_name='批次開始日期')),
+                ('last_submission_at', models.DateTimeField(blank=True, null=True, verbose_name='最後填寫時間')),
+                ('stages_date', models.DateField(blank=True, null=True, verbose_name='階段紀錄日期')),
+                ('submitted_stages', models.JSONField(default=list, verbose_name='已填寫的階段')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('worker', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='batch', to='api.worker', verbose_name='勞工')),
+            ],
+            options={
+                'verbose_name': '勞工填寫批次',
+                'verbose_name_plural': '勞工填寫批次',
+            },
+        ),
+        migrations.RunPython(backfill_worker_batches, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.1.6 on 2026-10-18 22:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Min
+
+
+def backfill_worker_stats(apps, schema_editor):
+    """由既有提交與實驗記錄建立每位勞工的活動統計"""
+    FormSubmission = apps.get_model('api', 'FormSubmission')
+    Experiment = apps.get_model('api', 'Experiment')
+    WorkerStats = apps.get_model('api', 'WorkerStats')
+
+    stats = {}
+    for worker_id, submission_count, total, first, last in FormSubmission.objects.values(
+        'worker_id', 'submission_count'
+    ).annotate(total=Count('id'), first=Min('submission_time'), last=Max('submission_time')).values_list(
+        'worker_id', 'submission_count', 'total', 'first', 'last'
+    ).order_by():
+        row = stats.setdefault(worker_id, WorkerStats(worker_id=worker_id, batch_counts={}))
+        row.submission_total += total
+        row.batch_counts[str(submission_count)] = total
+        if row.first_submission_at is None or first < row.first_submission_at:
+            row.first_submission_at = first
+        if row.last_submission_at is None or last > row.last_submission_at:
+            row.last_submission_at = last
+
+    for worker_id, total in Experiment.objects.values('worker_id').annotate(
+        total=Count('id')
+    ).values_list('worker_id', 'total').order_by():
+        stats.setdefault(worker_id, WorkerStats(worker_id=worker_id, batch_counts={})).experiment_count = total
+
+    WorkerStats.objects.bulk_create(stats.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0022_workerbatch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkerStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('submission_total', models.IntegerField(default=0, verbose_name='提交總數')),
+                ('batch_counts', models.JSONField(default=dict, verbose_name='各批次提交數')),
+                ('experiment_count', models.IntegerField(default=0, verbose_name='實驗記錄數')),
+                ('first_submission_at', models.DateTimeField(blank=True, null=True, verbose_name='首次填寫時間')),
+                ('last_submission_at', models.DateTimeField(blank=True, null=True, verbose_name='最後填寫時間')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('worker', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='api.worker', verbose_name='勞工')),
+            ],
+            options={
+                'verbose_name': '勞工活動統計',
+                'verbose_name_plural': '勞工活動統計',
+            },
+        ),
+        migrations.RunPython(backfill_worker_stats, migrations.RunPython.noop),
+    ]
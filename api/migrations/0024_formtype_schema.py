@@ -0,0 +1,38 @@
+# Generated by Django 5.1.6 on 2026-10-18 22:37
+
+import api.form_schemas
+from django.db import migrations, models
+
+
+def fill_schema_hashes(apps, schema_editor):
+    """為既有表單類型計算預設 schema 的雜湊"""
+    FormType = apps.get_model('api', 'FormType')
+    for form_type in FormType.objects.all():
+        form_type.schema_hash = api.form_schemas.schema_hash(form_type.schema)
+        form_type.save(update_fields=['schema_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0023_workerstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='formtype',
+            name='schema',
+            field=models.JSONField(default=api.form_schemas.default_schema, verbose_name='JSON Schema'),
+        ),
+        migrations.AddField(
+            model_name='formtype',
+            name='schema_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, verbose_name='Schema 雜湊'),
+        ),
+        migrations.AddField(
+            model_name='formtype',
+            name='schema_version',
+            field=models.IntegerField(default=1, verbose_name='Schema 版本'),
+        ),
+        migrations.RunPython(fill_schema_hashes, migrations.RunPython.noop),
+    ]
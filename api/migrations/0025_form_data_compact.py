@@ -0,0 +1,38 @@
+# Generated by Django 5.1.6 on 2026-10-18 22:43
+
+import api.form_data
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0024_formtype_schema'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='formsubmission',
+            name='data_format',
+            field=models.SmallIntegerField(choices=[(0, 'JSON 物件'), (1, '依欄位字典的位置陣列')], default=0, verbose_name='資料格式'),
+        ),
+        migrations.AlterField(
+            model_name='formsubmission',
+            name='data',
+            field=api.form_data.FormDataField(),
+        ),
+        migrations.CreateModel(
+            name='FormDataKeyset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('keys', models.JSONField(default=list, verbose_name='欄位名稱')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('form_type', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='data_keyset', to='api.formtype', verbose_name='表單類型')),
+            ],
+            options={
+                'verbose_name': '表單資料欄位字典',
+                'verbose_name_plural': '表單資料欄位字典',
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.6 on 2026-10-18 22:45
+
+from django.conf import settings
+from django.db import migrations
+from api import form_data
+
+
+def compact_form_data(apps, schema_editor):
+    """FORM_DATA_COMPACT 啟用時將既有提交分批轉為精簡格式（每批各自提交）"""
+    if not settings.FORM_DATA_COMPACT:
+        return
+    form_data.convert(
+        apps.get_model('api', 'FormSubmission'),
+        apps.get_model('api', 'FormDataKeyset'),
+        form_data.COMPACT
+    )
+
+
+def expand_form_data(apps, schema_editor):
+    """還原為 JSON 物件格式，之後才能移除 data_format 欄位"""
+    form_data.convert(
+        apps.get_model('api', 'FormSubmission'),
+        apps.get_model('api', 'FormDataKeyset'),
+        form_data.PLAIN
+    )
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('api', '0025_form_data_compact'),
+    ]
+
+    operations = [
+        migrations.RunPython(compact_form_data, expand_form_data),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.6 on 2026-10-18 22:48
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0026_convert_form_data'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChunkedUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('file_field_name', models.CharField(max_length=100, verbose_name='表單中的檔案欄位名稱')),
+                ('original_filename', models.CharField(max_length=255, verbose_name='原始檔名')),
+                ('file_path', models.CharField(max_length=255, verbose_name='儲存路徑')),
+                ('size', models.BigIntegerField(verbose_name='檔案大小')),
+                ('offset', models.BigIntegerField(default=0, verbose_name='已接收位元組')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True, verbose_name='完成時間')),
+                ('experiment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='uploads', to='api.experiment', verbose_name='實驗記錄')),
+                ('experiment_file', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='upload', to='api.experimentfile', verbose_name='實驗檔案')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='上傳者')),
+            ],
+            options={
+                'verbose_name': '分段上傳',
+                'verbose_name_plural': '分段上傳',
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.1.6 on 2026-10-18 22:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_workers(apps, schema_editor):
+    """由既有回應中的提交 ID 找出冪等鍵所屬的勞工（佇列模式的回應沒有提交 ID，維持 null）"""
+    IdempotencyKey = apps.get_model('api', 'IdempotencyKey')
+    FormSubmission = apps.get_model('api', 'FormSubmission')
+
+    submission_ids = {}
+    for record_id, response in IdempotencyKey.objects.values_list('id', 'response'):
+        if not isinstance(response, dict):
+            continue
+        submission_id = response.get('submission_id')
+        if submission_id is None and response.get('submissions'):
+            submission_id = response['submissions'][0].get('submission_id')
+        if submission_id is not None:
+            submission_ids[record_id] = submission_id
+
+    workers = dict(
+        FormSubmission.objects.filter(id__in=set(submission_ids.values())).values_list('id', 'worker_id')
+    )
+    updates = [
+        IdempotencyKey(id=record_id, worker_id=workers[submission_id])
+        for record_id, submission_id in submission_ids.items()
+        if submission_id in workers
+    ]
+    IdempotencyKey.objects.bulk_update(updates, ['worker'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0027_chunkedupload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='request_hash',
+            field=models.CharField(blank=True, max_length=64, verbose_name='請求內容雜湊'),
+        ),
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='worker',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='api.worker', verbose_name='勞工'),
+        ),
+        migrations.AlterField(
+            model_name='idempotencykey',
+            name='key',
+            field=models.CharField(max_length=64, verbose_name='冪等鍵'),
+        ),
+        migrations.RunPython(backfill_workers, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='idempotencykey',
+            constraint=models.UniqueConstraint(fields=('worker', 'key'), name='unique_idempotency_key_per_worker'),
+        ),
+    ]
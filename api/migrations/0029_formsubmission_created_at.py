@@ -0,0 +1,35 @@
+# Generated by Django 5.1.6 on 2026-10-18 23:02
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_created_at(apps, schema_editor):
+    """既有記錄的寫入時間無從得知，以填寫時間代替"""
+    FormSubmission = apps.get_model('api', 'FormSubmission')
+    FormSubmission.objects.filter(created_at__isnull=True).update(created_at=F('submission_time'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0028_idempotency_key_scope'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='formsubmission',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, null=True, verbose_name='寫入時間'),
+        ),
+        migrations.RunPython(backfill_created_at, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='formsubmission',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, verbose_name='寫入時間'),
+        ),
+        migrations.AddIndex(
+            model_name='formsubmission',
+            index=models.Index(fields=['worker', 'created_at'], name='api_formsub_worker__e925e6_idx'),
+        ),
+    ]
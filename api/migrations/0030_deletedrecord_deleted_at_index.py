@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 23:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0029_formsubmission_created_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='deletedrecord',
+            name='deleted_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 23:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0030_deletedrecord_deleted_at_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='idempotencykey',
+            name='response',
+            field=models.JSONField(blank=True, null=True, verbose_name='原始回應'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+import hashlib
+import json
+
+from django.db import migrations
+
+# 以下內容在撰寫時凍結，不隨 api.form_schemas 變動
+
+DEFAULT_SCHEMA = {
+    '$schema': 'https://json-schema.org/draft/2020-12/schema',
+    'type': 'object',
+    'minProperties': 1,
+}
+
+# 先前版本的 0031 / 0032 套用到內建表單類型 1–4 的 schema 雜湊（欄位名稱未經確認），
+# 每個表單類型各有不含與含 x-scoring 兩個版本
+UNCONFIRMED_SCHEMA_HASHES = {
+    1: (
+        '96ccc09c81f9551f5dd9e9c2935cb6604cf56fd5fca52584b6e2665fdbc9f9eb',
+        'f1faa80327720e1dc187f1338e1ea22c4f5fa20f7c4f742c044abae64985bc6e',
+    ),
+    2: (
+        '9b865cf7efe0fe601906451d8ae4ed806794ee58ba6e719d7d511299742f39fb',
+        'b67a37ab0bd5677bd3a179ab42c52603d7fe7eee4939a23ad352f12bf1c35383',
+    ),
+    3: (
+        '0ff05ee63c98fe7f2e9bf9a217b31f8ea08dd2a528f68816a8f57bc36d9875f0',
+        '27856a04815668ef13c6fee8b9d37eb20ef3921fc6613a5d51c387be379b6538',
+    ),
+    4: (
+        'f534cccb67728bcc3209b62ae0a7a51cdb0e29dccce64cd641b89d050a49933c',
+        'c95fdd1bfaac9dbccf5339325c66ac0a8a501997775d7d817f868346a226a647',
+    ),
+}
+
+
+def schema_hash(schema):
+    raw = json.dumps(schema, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def restore_default_schemas(apps, schema_editor):
+    """仍使用未確認 schema 的內建表單類型改回預設 schema；已在管理介面調整過的不變"""
+    FormType = apps.get_model('api', 'FormType')
+    for form_type_id, hashes in UNCONFIRMED_SCHEMA_HASHES.items():
+        form_type = FormType.objects.filter(id=form_type_id, schema_hash__in=hashes).first()
+        if form_type is None:
+            continue
+        form_type.schema = DEFAULT_SCHEMA
+        form_type.schema_hash = schema_hash(DEFAULT_SCHEMA)
+        form_type.schema_version += 1
+        form_type.save(update_fields=['schema', 'schema_hash', 'schema_version'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0033_idempotency_key_pending'),
+    ]
+
+    operations = [
+        migrations.RunPython(restore_default_schemas, migrations.RunPython.noop),
+    ]
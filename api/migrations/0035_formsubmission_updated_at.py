@@ -0,0 +1,39 @@
+# Generated by Django 5.1.6 on 2026-10-18 23:18
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_updated_at(apps, schema_editor):
+    """既有記錄以寫入時間作為最後更新時間"""
+    FormSubmission = apps.get_model('api', 'FormSubmission')
+    FormSubmission.objects.filter(updated_at__isnull=True).update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0034_restore_default_form_schemas'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='formsubmission',
+            name='api_formsub_worker__e925e6_idx',
+        ),
+        migrations.AddField(
+            model_name='formsubmission',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, null=True, verbose_name='更新時間'),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='formsubmission',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='更新時間'),
+        ),
+        migrations.AddIndex(
+            model_name='formsubmission',
+            index=models.Index(fields=['worker', 'updated_at'], name='api_formsub_worker__881c3b_idx'),
+        ),
+    ]
@@ -1,7 +1,12 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.utils import timezone
 import os
+import uuid
+from . import form_schemas
+from . import form_data
 
 
 def experiment_file_upload_path(instance, filename):
@@ -27,6 +32,7 @@ class Worker(models.Model):
     company = models.ForeignKey(Company, on_delete=models.CASCADE)
     name = models.CharField(max_length=100)
     code = models.CharField(max_length=10)
+    updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return f"{self.name} ({self.code})"
@@ -67,30 +73,256 @@ class ExperimentFile(models.Model):
         return None
 
 
+# 可續傳的分段上傳：分段直接寫入最終的檔案位置，完成後建立 ExperimentFile
+class ChunkedUpload(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    experiment = models.ForeignKey(Experiment, on_delete=models.CASCADE, related_name='uploads', verbose_name="實驗記錄")
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, verbose_name="上傳者")
+    file_field_name = models.CharField(max_length=100, verbose_name="表單中的檔案欄位名稱")
+    original_filename = models.CharField(max_length=255, verbose_name="原始檔名")
+    file_path = models.CharField(max_length=255, verbose_name="儲存路徑")  # 相對於 MEDIA_ROOT
+    size = models.BigIntegerField(verbose_name="檔案大小")
+    offset = models.BigIntegerField(default=0, verbose_name="已接收位元組")
+    experiment_file = models.OneToOneField(
+        ExperimentFile, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='upload', verbose_name="實驗檔案"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True, verbose_name="完成時間")
+
+    def __str__(self):
+        return f"{self.original_filename} ({self.offset}/{self.size})"
+
+    class Meta:
+        verbose_name = "分段上傳"
+        verbose_name_plural = "分段上傳"
+
+
 # 表單類型模型
 class FormType(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
     is_required_first_time = models.BooleanField(default=True)
     is_required_subsequent = models.BooleanField(default=False)
+    schema = models.JSONField(default=form_schemas.default_schema, verbose_name="JSON Schema")
+    schema_version = models.IntegerField(default=1, verbose_name="Schema 版本")
+    schema_hash = models.CharField(max_length=64, blank=True, editable=False, verbose_name="Schema 雜湊")
     
     def __str__(self):
         return self.name
 
+    def clean(self):
+        try:
+            form_schemas.check_schema(self.schema)
+        except ValueError as e:
+            raise ValidationError({'schema': str(e)})
+
+    def save(self, *args, **kwargs):
+        # schema 內容變動時更新雜湊並遞增版本
+        current_hash = form_schemas.schema_hash(self.schema)
+        if current_hash != self.schema_hash:
+            if self.schema_hash:
+                self.schema_version += 1
+            self.schema_hash = current_hash
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | {'schema_hash', 'schema_version'}
+        super().save(*args, **kwargs)
+
+
+# 表單資料欄位字典：精簡格式下 FormSubmission.data 依此字典的位置儲存答案，只會附加新欄位
+class FormDataKeyset(models.Model):
+    form_type = models.OneToOneField(FormType, on_delete=models.CASCADE, related_name='data_keyset', verbose_name="表單類型")
+    keys = models.JSONField(default=list, verbose_name="欄位名稱")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.form_type_id} - {len(self.keys)} 個欄位"
+
+    class Meta:
+        verbose_name = "表單資料欄位字典"
+        verbose_name_plural = "表單資料欄位字典"
+
+
+class FormSubmissionQuerySet(models.QuerySet):
+    def bulk_update(self, objs, fields, batch_size=None):
+        """只更新 data 時依目前設定重新編碼並一併更新 data_format
+
+        bulk_update 不呼叫 pre_save，載入時已解碼的精簡資料會直接以 dict 寫回，格式卻仍標示為精簡；
+        同時指定 data_format 時（例如 form_data.convert）由呼叫端自行編碼
+        """
+        fields = list(fields)
+        if 'data' not in fields or 'data_format' in fields:
+            return super().bulk_update(objs, fields, batch_size)
+        objs = list(objs)
+        data_field = self.model._meta.get_field('data')
+        decoded = [obj.data for obj in objs]
+        for obj in objs:
+            obj.data = data_field.pre_save(obj, False)
+        try:
+            return super().bulk_update(objs, fields + ['data_format'], batch_size)
+        finally:
+            for obj, data in zip(objs, decoded):
+                obj.data = data
+
 
 # 表單紀錄模型
 class FormSubmission(models.Model):
     worker = models.ForeignKey(Worker, on_delete=models.CASCADE)
     form_type = models.ForeignKey(FormType, on_delete=models.CASCADE)
-    submission_time = models.DateTimeField(auto_now_add=True)
+    submission_time = models.DateTimeField(default=timezone.now)  # 匯入歷史資料時保留原始填寫時間
     submission_count = models.IntegerField()  # 第幾次填寫
     time_segment = models.IntegerField(default=1)
     stage = models.IntegerField(default=0)  # 階段字段
-    data = models.JSONField()  # 存儲表單數據
+    data = form_data.FormDataField()  # 存儲表單數據（啟用 FORM_DATA_COMPACT 時以位置陣列儲存）
+    data_format = models.SmallIntegerField(
+        default=form_data.PLAIN, choices=form_data.FORMAT_CHOICES, verbose_name="資料格式"
+    )  # 必須定義在 data 之後，見 FormDataField
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="寫入時間")  # 匯入與佇列寫入也以實際寫入時間為準
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="更新時間")  # 增量同步的游標：建立、修改與格式轉換都會更新
+
+    objects = FormSubmissionQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        # pre_save 重新編碼 data 時會改變格式，只更新 data 也要一併寫入 data_format
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'data' in update_fields and 'data_format' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'data_format']
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # data 一律解碼為 dict，data_format 仍表示資料庫中的儲存格式；寫回時由 FormDataField 重新編碼
+        instance = super().from_db(db, field_names, values)
+        if instance.__dict__.get('data_format') == form_data.COMPACT and 'data' in instance.__dict__:
+            instance.data = form_data.decode(instance.form_type_id, instance.data, form_data.COMPACT)
+        return instance
 
     def __str__(self):
         return f"{self.worker.name} - {self.form_type.name} - 第{self.submission_count}次"
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['worker', 'submission_time']),
+            models.Index(fields=['worker', 'updated_at']),
+        ]
+
+
+# 勞工目前的填寫批次：提交時在同一個交易中更新，不必每次彙總所有提交記錄取最大批次
+class WorkerBatch(models.Model):
+    worker = models.OneToOneField(Worker, on_delete=models.CASCADE, related_name='batch', verbose_name="勞工")
+    current_batch = models.IntegerField(default=0, verbose_name="目前批次")  # 0 表示尚未填寫
+    started_on = models.DateField(null=True, blank=True, verbose_name="批次開始日期")
+    last_submission_at = models.DateTimeField(null=True, blank=True, verbose_name="最後填寫時間")
+    stages_date = models.DateField(null=True, blank=True, verbose_name="階段紀錄日期")
+    submitted_stages = models.JSONField(default=list, verbose_name="已填寫的階段")  # 目前批次在 stages_date 當天
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.worker_id} - 第{self.current_batch}批"
+
+    class Meta:
+        verbose_name = "勞工填寫批次"
+        verbose_name_plural = "勞工填寫批次"
+
+
+# 勞工活動統計：提交與實驗記錄建立、刪除時以 F() 更新，檢查與統計只需一次主鍵查詢
+class WorkerStats(models.Model):
+    worker = models.OneToOneField(Worker, on_delete=models.CASCADE, related_name='stats', verbose_name="勞工")
+    submission_total = models.IntegerField(default=0, verbose_name="提交總數")
+    batch_counts = models.JSONField(default=dict, verbose_name="各批次提交數")  # {批次: 筆數}
+    experiment_count = models.IntegerField(default=0, verbose_name="實驗記錄數")
+    first_submission_at = models.DateTimeField(null=True, blank=True, verbose_name="首次填寫時間")
+    last_submission_at = models.DateTimeField(null=True, blank=True, verbose_name="最後填寫時間")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.worker_id} - {self.submission_total} 筆提交"
+
+    @property
+    def has_data(self):
+        return self.submission_total > 0 or self.experiment_count > 0
+
+    class Meta:
+        verbose_name = "勞工活動統計"
+        verbose_name_plural = "勞工活動統計"
+
+
+# 表單衍生分數模型：提交時計算，統計時可直接在 SQL 中彙總
+class SubmissionScore(models.Model):
+    submission = models.ForeignKey(FormSubmission, on_delete=models.CASCADE, related_name='scores')
+    metric = models.CharField(max_length=50, verbose_name="指標")
+    value = models.FloatField(verbose_name="分數")
+
+    def __str__(self):
+        return f"{self.submission_id} - {self.metric}: {self.value}"
+
+    class Meta:
+        unique_together = ('submission', 'metric')
+        indexes = [
+            models.Index(fields=['metric', 'value']),
+        ]
+
+
+# 每日提交彙總：依公司、當地日期、階段、表單類型累計，報表不必掃描所有提交記錄
+class DailySubmissionRollup(models.Model):
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, verbose_name="公司")
+    date = models.DateField(verbose_name="日期")
+    stage = models.IntegerField(verbose_name="階段")
+    form_type = models.ForeignKey(FormType, on_delete=models.CASCADE, verbose_name="表單類型")
+    submission_count = models.IntegerField(default=0, verbose_name="提交筆數")
+    worker_count = models.IntegerField(default=0, verbose_name="填寫人數")
+    score_sum = models.FloatField(default=0, verbose_name="主要指標分數總和")
+    score_count = models.IntegerField(default=0, verbose_name="主要指標分數筆數")
+
+    def __str__(self):
+        return f"{self.company_id} - {self.date} - 階段{self.stage} - {self.form_type_id}"
+
+    class Meta:
+        unique_together = ('company', 'date', 'stage', 'form_type')
+        verbose_name = "每日提交彙總"
+        verbose_name_plural = "每日提交彙總"
+
+
+# 提交冪等鍵模型：用戶端重試時回傳原本的結果，不再重複寫入；
+# 冪等鍵以勞工為範圍，並記錄請求內容的雜湊，同一個鍵用於不同內容的請求時拒絕
+class IdempotencyKey(models.Model):
+    worker = models.ForeignKey(
+        Worker, on_delete=models.CASCADE, null=True, blank=True, verbose_name="勞工"
+    )  # 舊版本寫入、無法對應勞工的記錄為 null
+    key = models.CharField(max_length=64, verbose_name="冪等鍵")
+    request_hash = models.CharField(max_length=64, blank=True, verbose_name="請求內容雜湊")
+    response = models.JSONField(null=True, blank=True, verbose_name="原始回應")  # null 表示請求仍在處理中
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return self.key
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['worker', 'key'], name='unique_idempotency_key_per_worker'),
+        ]
+
+
+# 刪除記錄（墓碑）：讓增量同步的用戶端得知哪些資料已被刪除
+class DeletedRecord(models.Model):
+    MODEL_CHOICES = (
+        ('formsubmission', '表單提交'),
+        ('experiment', '實驗紀錄'),
+    )
+    model_name = models.CharField(max_length=30, choices=MODEL_CHOICES)
+    object_id = models.BigIntegerField()
+    worker_id = models.BigIntegerField()  # 不使用外鍵，勞工刪除後墓碑仍保留
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)  # 超過 DELETED_RECORD_RETENTION_DAYS 由排程清除
+
+    def __str__(self):
+        return f"{self.model_name} #{self.object_id}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['model_name', 'worker_id', 'deleted_at']),
+        ]
+
 
 class CustomUser(AbstractUser):
     ROLE_CHOICES = (
@@ -0,0 +1,133 @@
+# backend/app/pagination.py
+import base64
+import binascii
+import json
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """以完整排序鍵為游標的分頁，頁數再深也不需要 OFFSET 掃描
+
+    游標記錄頁面邊界那一筆資料的所有排序欄位，例如 (experiment_time, id)，
+    下一頁以 (time < t) OR (time = t AND id < i) 查詢；
+    排序時間相同的資料（匯入、批次寫入）也能直接以索引定位。
+    排序欄位不可為 null，最後一個欄位需唯一
+    """
+    page_size = settings.API_PAGE_SIZE
+    max_page_size = settings.API_MAX_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = '無效的游標'
+    ordering = None
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(size, self.max_page_size) if size > 0 else self.page_size
+
+    def _fields(self, queryset):
+        return [queryset.model._meta.get_field(field.lstrip('-')) for field in self.ordering]
+
+    def decode_cursor(self, request, fields):
+        """解析游標，回傳 (排序鍵的值, 是否往前翻頁)，沒有游標時回傳 None"""
+        raw = request.query_params.get(self.cursor_query_param)
+        if not raw:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(raw.encode('ascii')).decode('utf-8'))
+            values = cursor['p']
+            if len(values) != len(fields):
+                raise ValueError
+            position = [field.to_python(value) for field, value in zip(fields, values)]
+            return position, bool(cursor.get('r'))
+        except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, row, fields, reverse):
+        values = [field.value_to_string(row) for field in fields]
+        raw = json.dumps({'p': values, 'r': reverse}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+    def keyset_filter(self, position, forward):
+        """排在 position 之後（forward）或之前的資料：逐欄比較的字典序條件"""
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') == forward else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        fields = self._fields(queryset)
+        cursor = self.decode_cursor(request, fields)
+
+        reverse = False
+        ordering = list(self.ordering)
+        if cursor:
+            position, reverse = cursor
+            queryset = queryset.filter(self.keyset_filter(position, forward=not reverse))
+        if reverse:
+            ordering = [field[1:] if field.startswith('-') else f'-{field}' for field in ordering]
+
+        rows = list(queryset.order_by(*ordering)[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        # 往後翻頁時，有游標才有上一頁；往前翻頁時一定有下一頁（就是原本所在的頁面）
+        has_next = has_more if not reverse else True
+        has_previous = cursor is not None if not reverse else has_more
+        self.next_cursor = self.encode_cursor(rows[-1], fields, False) if rows and has_next else None
+        self.previous_cursor = self.encode_cursor(rows[0], fields, True) if rows and has_previous else None
+        return rows
+
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        return self._link(self.next_cursor)
+
+    def get_previous_link(self):
+        return self._link(self.previous_cursor)
+
+
+def wants_pagination(request):
+    """用戶端帶有 cursor 或 page_size 參數時才分頁，未帶參數時維持原本的完整列表"""
+    return (
+        KeysetPagination.cursor_query_param in request.query_params
+        or KeysetPagination.page_size_query_param in request.query_params
+    )
+
+
+def list_payload(request, queryset, ordering, serialize, view=None, paginate=False):
+    """依請求決定回傳完整列表或分頁結果
+
+    ordering 為穩定的排序鍵（最後一個欄位需唯一，例如 id），
+    serialize 接收一組資料列並回傳可序列化的列表；
+    paginate=True 時即使未帶參數也分頁（每頁 API_PAGE_SIZE 筆），用於資料量沒有上限的列表
+    """
+    if not paginate and not wants_pagination(request):
+        return serialize(queryset.order_by(*ordering))
+
+    paginator = KeysetPagination()
+    paginator.ordering = ordering
+    page = paginator.paginate_queryset(queryset, request, view=view)
+    return {
+        'next': paginator.get_next_link(),
+        'previous': paginator.get_previous_link(),
+        'results': serialize(page),
+    }
@@ -0,0 +1,162 @@
+# backend/app/reference_cache.py
+"""參考資料快取
+
+表單類型、公司與提醒排程很少變動，卻在幾乎每個請求中被查詢。
+這裡將整張表載入程序記憶體，並以共享快取中的版本號判斷是否過期：
+任何一個程序儲存或刪除這些資料時會更新版本號，所有 gunicorn 與 Celery
+程序在下次檢查時一起丟棄本地快取。
+
+共享快取無法連線時改為每次檢查都重新由資料庫載入，不讓快取故障影響請求。
+
+快取中的模型實例由多個請求共用，取得後請勿修改。
+"""
+import logging
+import threading
+import time
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from .models import FormType, Company, ReminderSchedule
+
+logger = logging.getLogger(__name__)
+
+VERSION_CACHE_KEY = 'reference_data:version'
+
+_lock = threading.Lock()
+_state = {
+    'version': None,
+    'checked_at': 0.0,
+    'tables': {},
+}
+
+
+def _shared_version():
+    """取得共享快取中的版本號，不存在時建立一個；快取無法使用時回傳新的版本號，讓本地快取重新載入"""
+    try:
+        version = cache.get(VERSION_CACHE_KEY)
+        if version is None:
+            version = uuid.uuid4().hex
+            if not cache.add(VERSION_CACHE_KEY, version, timeout=None):
+                version = cache.get(VERSION_CACHE_KEY, version)
+    except Exception:
+        logger.warning("無法讀取參考資料版本號，改由資料庫重新載入", exc_info=True)
+        version = uuid.uuid4().hex
+    return version
+
+
+def _tables():
+    """回傳目前版本的本地快取，每隔固定秒數才向共享快取確認版本"""
+    now = time.monotonic()
+    if now - _state['checked_at'] >= settings.REFERENCE_CACHE_CHECK_INTERVAL:
+        version = _shared_version()
+        with _lock:
+            if version != _state['version']:
+                _state['tables'] = {}
+                _state['version'] = version
+            _state['checked_at'] = now
+    return _state['tables']
+
+
+def _load(name, loader):
+    tables = _tables()
+    if name not in tables:
+        tables[name] = loader()
+    return tables[name]
+
+
+def current_version():
+    """目前的參考資料版本，可作為回應的快取指紋"""
+    _tables()
+    return _state['version']
+
+
+def invalidate():
+    """更新共享版本號，讓所有程序重新載入參考資料"""
+    try:
+        cache.set(VERSION_CACHE_KEY, uuid.uuid4().hex, timeout=None)
+    except Exception:
+        logger.warning("無法更新參考資料版本號", exc_info=True)
+    with _lock:
+        _state['version'] = None
+        _state['checked_at'] = 0.0
+
+
+def invalidate_on_commit():
+    """在交易提交後才使快取失效，避免其他程序讀到尚未提交的舊資料"""
+    transaction.on_commit(invalidate)
+
+
+def _load_form_types():
+    form_types = list(FormType.objects.order_by('id'))
+    return {
+        'list': form_types,
+        'by_id': {form_type.id: form_type for form_type in form_types},
+    }
+
+
+def _load_companies():
+    companies = list(Company.objects.order_by('id'))
+    return {
+        'list': companies,
+        'by_id': {company.id: company for company in companies},
+        'by_code': {company.code: company for company in companies},
+    }
+
+
+def _load_reminder_schedules():
+    return list(
+        ReminderSchedule.objects.filter(is_active=True).select_related('company').order_by('id')
+    )
+
+
+def get_form_types():
+    """所有表單類型（依 ID 排序）"""
+    return _load('form_types', _load_form_types)['list']
+
+
+def get_form_type(form_type_id):
+    """依 ID 取得表單類型，找不到時回傳 None"""
+    try:
+        form_type_id = int(form_type_id)
+    except (TypeError, ValueError):
+        return None
+    return _load('form_types', _load_form_types)['by_id'].get(form_type_id)
+
+
+def get_form_types_by_ids(form_type_ids):
+    """依 ID 取得多個表單類型，回傳 {id: FormType}，找不到的 ID 不會出現在結果中"""
+    by_id = _load('form_types', _load_form_types)['by_id']
+    return {form_type_id: by_id[form_type_id] for form_type_id in form_type_ids if form_type_id in by_id}
+
+
+def get_companies():
+    """所有公司（依 ID 排序）"""
+    return _load('companies', _load_companies)['list']
+
+
+def get_company(company_id):
+    """依 ID 取得公司，找不到時回傳 None"""
+    try:
+        company_id = int(company_id)
+    except (TypeError, ValueError):
+        return None
+    return _load('companies', _load_companies)['by_id'].get(company_id)
+
+
+def get_company_by_code(code):
+    """依公司代碼取得公司，找不到時回傳 None"""
+    return _load('companies', _load_companies)['by_code'].get(code)
+
+
+def require_company_by_code(code):
+    """依公司代碼取得公司，找不到時拋出 Company.DoesNotExist"""
+    company = get_company_by_code(code)
+    if company is None:
+        raise Company.DoesNotExist(f"找不到公司代碼 {code}")
+    return company
+
+
+def get_active_reminder_schedules():
+    """所有啟用中的提醒排程"""
+    return _load('reminder_schedules', _load_reminder_schedules)
@@ -0,0 +1,197 @@
+# backend/app/rollups.py
+"""每日提交彙總（DailySubmissionRollup）
+
+每次提交時以一次 INSERT ... ON CONFLICT DO UPDATE 累加該次提交涉及的所有彙總列
+（不支援此語法的資料庫改為逐列以 F() 累加）；刪除提交不會回扣，
+需要校正時以 rebuild_rollups 指令（或每日排程）重建指定日期範圍，
+已封存的記錄（見 archive.py）也會計入。
+"""
+from django.db import connection, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .models import DailySubmissionRollup, FormSubmission
+from .scoring import primary_metrics, primary_metric_names
+from . import archive
+
+
+def _rollup_key(submission):
+    return (
+        timezone.localdate(submission.submission_time),
+        submission.stage,
+        submission.form_type_id,
+    )
+
+
+def record_submissions(worker, submissions, scores=()):
+    """將同一勞工新建立的提交記錄累加到每日彙總
+
+    scores 為同一批提交的 SubmissionScore，只累計各表單類型的主要指標
+    """
+    if not submissions:
+        return
+
+    form_types = {submission.id: submission.form_type_id for submission in submissions}
+    metrics = primary_metrics()
+    primary_scores = {}
+    for score in scores:
+        if score.metric == metrics.get(form_types.get(score.submission_id)):
+            primary_scores[score.submission_id] = score.value
+
+    totals = {}
+    for submission in submissions:
+        entry = totals.setdefault(_rollup_key(submission), [0, 0.0, 0])
+        entry[0] += 1
+        if submission.id in primary_scores:
+            entry[1] += primary_scores[submission.id]
+            entry[2] += 1
+
+    # 這位勞工在同一天同一階段已填過的表單類型不再增加填寫人數
+    seen = set(
+        FormSubmission.objects.filter(
+            worker=worker,
+            stage__in={key[1] for key in totals},
+            form_type_id__in={key[2] for key in totals},
+            submission_time__date__in={key[0] for key in totals}
+        ).exclude(
+            id__in=list(form_types)
+        ).annotate(
+            day=TruncDate('submission_time')
+        ).values_list('day', 'stage', 'form_type_id').distinct()
+    )
+
+    increments = [
+        (date, stage, form_type_id, count, 0 if (date, stage, form_type_id) in seen else 1, score_sum, score_count)
+        for (date, stage, form_type_id), (count, score_sum, score_count) in totals.items()
+    ]
+    if connection.vendor in UPSERT_VENDORS:
+        _upsert(worker.company_id, increments)
+    else:
+        for date, stage, form_type_id, count, workers, score_sum, score_count in increments:
+            rollup, _ = DailySubmissionRollup.objects.get_or_create(
+                company_id=worker.company_id,
+                date=date,
+                stage=stage,
+                form_type_id=form_type_id
+            )
+            DailySubmissionRollup.objects.filter(pk=rollup.pk).update(
+                submission_count=F('submission_count') + count,
+                worker_count=F('worker_count') + workers,
+                score_sum=F('score_sum') + score_sum,
+                score_count=F('score_count') + score_count
+            )
+
+
+# 支援 INSERT ... ON CONFLICT DO UPDATE 的資料庫
+UPSERT_VENDORS = ('sqlite', 'postgresql')
+KEY_COLUMNS = ('company_id', 'date', 'stage', 'form_type_id')
+COUNTER_COLUMNS = ('submission_count', 'worker_count', 'score_sum', 'score_count')
+
+
+def _upsert(company_id, increments):
+    """以一次語句累加多個彙總列，不存在的列直接以增量建立
+
+    increments 為 (日期, 階段, 表單類型 ID, 提交筆數, 填寫人數, 分數總和, 分數筆數) 的列表
+    """
+    quote = connection.ops.quote_name
+    table = quote(DailySubmissionRollup._meta.db_table)
+    columns = ', '.join(quote(column) for column in KEY_COLUMNS + COUNTER_COLUMNS)
+    row = '(' + ', '.join(['%s'] * (len(KEY_COLUMNS) + len(COUNTER_COLUMNS))) + ')'
+    updates = ', '.join(
+        f"{quote(column)} = {table}.{quote(column)} + excluded.{quote(column)}" for column in COUNTER_COLUMNS
+    )
+    sql = (
+        f"INSERT INTO {table} ({columns}) VALUES {', '.join([row] * len(increments))} "
+        f"ON CONFLICT ({', '.join(quote(column) for column in KEY_COLUMNS)}) DO UPDATE SET {updates}"
+    )
+    params = []
+    for date, stage, form_type_id, *counters in increments:
+        params.extend([company_id, connection.ops.adapt_datefield_value(date), stage, form_type_id, *counters])
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def rebuild_rollups(start, end, company_id=None):
+    """由提交記錄（含封存）重建 start 到 end（當地日期，含）的彙總，回傳寫入的列數"""
+    submissions = FormSubmission.objects.filter(
+        submission_time__date__gte=start,
+        submission_time__date__lte=end
+    )
+    rollups = DailySubmissionRollup.objects.filter(date__gte=start, date__lte=end)
+    if company_id is not None:
+        submissions = submissions.filter(worker__company_id=company_id)
+        rollups = rollups.filter(company_id=company_id)
+
+    primary = Q(scores__metric__in=primary_metric_names())
+    rows = submissions.annotate(
+        day=TruncDate('submission_time')
+    ).values(
+        'worker__company_id', 'day', 'stage', 'form_type_id'
+    ).annotate(
+        total=Count('id', distinct=True),
+        workers=Count('worker_id', distinct=True),
+        score_total=Sum('scores__value', filter=primary),
+        scored=Count('scores', filter=primary)
+    ).order_by()
+
+    totals = {
+        (row['worker__company_id'], row['day'], row['stage'], row['form_type_id']):
+            [row['total'], row['workers'], row['score_total'] or 0, row['scored']]
+        for row in rows
+    }
+
+    # 併入封存記錄；同一天同時有封存與資料表記錄時，填寫人數以勞工 ID 聯集計算
+    archived = archive.daily_totals(start, end, company_id)
+    if archived:
+        hot_workers = {}
+        for *key, worker_id in submissions.filter(
+            submission_time__date__in={key[1] for key in archived}
+        ).annotate(
+            day=TruncDate('submission_time')
+        ).values_list('worker__company_id', 'day', 'stage', 'form_type_id', 'worker_id').distinct():
+            hot_workers.setdefault(tuple(key), set()).add(worker_id)
+
+        for key, (count, workers, score_sum, score_count) in archived.items():
+            entry = totals.setdefault(key, [0, 0, 0, 0])
+            entry[0] += count
+            entry[1] = len(workers | hot_workers.get(key, set()))
+            entry[2] += score_sum
+            entry[3] += score_count
+
+    with transaction.atomic():
+        rollups.delete()
+        created = DailySubmissionRollup.objects.bulk_create(
+            [
+                DailySubmissionRollup(
+                    company_id=company,
+                    date=day,
+                    stage=stage,
+                    form_type_id=form_type_id,
+                    submission_count=count,
+                    worker_count=workers,
+                    score_sum=score_sum,
+                    score_count=score_count
+                )
+                for (company, day, stage, form_type_id), (count, workers, score_sum, score_count) in totals.items()
+            ],
+            batch_size=1000
+        )
+    return len(created)
+
+
+def daily_rows(company_id, start=None, end=None):
+    """讀取公司的每日彙總，另附主要指標平均"""
+    rollups = DailySubmissionRollup.objects.filter(company_id=company_id)
+    if start:
+        rollups = rollups.filter(date__gte=start)
+    if end:
+        rollups = rollups.filter(date__lte=end)
+
+    rows = list(rollups.order_by('date', 'stage', 'form_type_id').values(
+        'date', 'stage', 'form_type_id', 'submission_count', 'worker_count',
+        'score_sum', 'score_count'
+    ))
+    for row in rows:
+        row['date'] = row['date'].isoformat()
+        row['score_mean'] = row['score_sum'] / row['score_count'] if row['score_count'] else None
+    return rows
@@ -0,0 +1,116 @@
+# backend/app/roster.py
+"""勞工名冊匯入與同步
+
+上傳的名冊（CSV / XLSX，欄位 code、name）以一次查詢與公司現有勞工比對，
+在同一個交易中批次新增、更名，並可選擇移除名冊中沒有的勞工
+（有表單或實驗記錄的勞工不會被移除，只列在摘要中）。
+"""
+from django.db import transaction
+from django.utils import timezone
+from .imports import iter_file
+from .models import Worker
+from . import bootstrap
+
+CODE_COLUMNS = ('code', 'worker_code', '勞工代碼')
+NAME_COLUMNS = ('name', 'worker_name', '姓名')
+
+CODE_MAX_LENGTH = Worker._meta.get_field('code').max_length
+NAME_MAX_LENGTH = Worker._meta.get_field('name').max_length
+
+
+def _value(row, columns):
+    for column in columns:
+        value = row.get(column)
+        if value is not None and str(value).strip():
+            return str(value).strip()
+    return None
+
+
+def read_roster(rows):
+    """讀取名冊，回傳 ({代碼: 姓名}, 錯誤列表)"""
+    roster = {}
+    errors = []
+    for line_number, row in rows:
+        code = _value(row, CODE_COLUMNS)
+        name = _value(row, NAME_COLUMNS)
+        row_errors = []
+        if not code:
+            row_errors.append("缺少勞工代碼")
+        elif len(code) > CODE_MAX_LENGTH:
+            row_errors.append(f"勞工代碼超過 {CODE_MAX_LENGTH} 個字元: {code}")
+        elif code in roster:
+            row_errors.append(f"勞工代碼重複: {code}")
+        if not name:
+            row_errors.append("缺少姓名")
+        elif len(name) > NAME_MAX_LENGTH:
+            row_errors.append(f"姓名超過 {NAME_MAX_LENGTH} 個字元")
+
+        if row_errors:
+            errors.append({'row': line_number, 'errors': row_errors})
+        else:
+            roster[code] = name
+    return roster, errors
+
+
+def sync_roster(company, file, filename, remove_missing=False, dry_run=False):
+    """以名冊同步公司勞工並回傳摘要；名冊有任何錯誤時不做任何變更"""
+    roster, errors = read_roster(iter_file(file, filename))
+    summary = {
+        'dry_run': dry_run,
+        'applied': False,
+        'total_rows': len(roster) + len(errors),
+        'created': [],
+        'renamed': [],
+        'missing': [],
+        'removed': [],
+        'kept_with_data': [],
+        'unchanged': 0,
+        'errors': errors,
+    }
+    if errors:
+        return summary
+
+    existing = {worker.code: worker for worker in Worker.objects.filter(company=company).only('id', 'code', 'name')}
+    now = timezone.now()
+
+    to_create = []
+    to_rename = []
+    for code, name in roster.items():
+        worker = existing.get(code)
+        if worker is None:
+            to_create.append(Worker(company=company, code=code, name=name))
+            summary['created'].append(code)
+        elif worker.name != name:
+            summary['renamed'].append({'code': code, 'old_name': worker.name, 'new_name': name})
+            worker.name = name
+            worker.updated_at = now  # bulk_update 不會自動更新 auto_now 欄位
+            to_rename.append(worker)
+        else:
+            summary['unchanged'] += 1
+
+    to_remove = []
+    missing = [worker.id for code, worker in existing.items() if code not in roster]
+    summary['missing'] = [code for code in existing if code not in roster]
+    if remove_missing and missing:
+        # 以勞工統計判斷是否有資料（含已封存的提交），沒有統計列表示從未有資料
+        candidates = Worker.objects.filter(id__in=missing).values_list(
+            'id', 'code', 'stats__submission_total', 'stats__experiment_count'
+        )
+        for worker_id, code, submission_total, experiment_count in candidates:
+            if submission_total or experiment_count:
+                summary['kept_with_data'].append(code)
+            else:
+                to_remove.append(worker_id)
+                summary['removed'].append(code)
+
+    if dry_run:
+        return summary
+
+    with transaction.atomic():
+        Worker.objects.bulk_create(to_create, batch_size=1000)
+        Worker.objects.bulk_update(to_rename, ['name', 'updated_at'], batch_size=1000)
+        if to_remove:
+            Worker.objects.filter(id__in=to_remove).delete()
+        bootstrap.invalidate(company.id, [worker.code for worker in to_rename] + summary['removed'])
+    summary['applied'] = True
+    return summary
@@ -0,0 +1,186 @@
+# backend/app/scoring.py
+"""問卷分數計算
+
+在提交時從 FormSubmission.data 計算衍生分數並存入 SubmissionScore，
+之後的統計可以直接在 SQL 中彙總數值欄位，不必逐筆解析 JSON。
+
+計分方式由表單類型 schema 中的 x-scoring 定義（JSON Schema 驗證時忽略此關鍵字），
+在管理介面編輯 schema 時一併設定，例如：
+
+    "x-scoring": {"method": "sum", "metric": "sleepiness_total", "items": ["q1", "q2"]}
+
+method 為計算方式（sum / sleep_hours / nasa_tlx，見 METHODS），metric 為主要指標名稱，
+items 為計入分數的題目欄位；sleep_hours 另可指定 bedtime / wake_time 欄位，
+nasa_tlx 另可指定 weights 欄位與 raw_metric。只計算 items 列出的題目，
+沒有計分定義的表單類型不產生分數，設定後以 backfill_scores 指令回填既有提交。
+計算函式只接受計分定義與原始資料，方便在多個程序中平行回填。
+"""
+import re
+from .models import SubmissionScore
+from . import reference_cache
+
+# 指標名稱
+SLEEP_HOURS = 'sleep_hours'
+SLEEPINESS_TOTAL = 'sleepiness_total'
+VISUAL_FATIGUE_TOTAL = 'visual_fatigue_total'
+TLX_WEIGHTED = 'tlx_weighted'
+TLX_RAW = 'tlx_raw'
+
+SCORING_KEY = 'x-scoring'
+
+_TIME_PATTERN = re.compile(r'^(\d{1,2}):(\d{2})')
+
+
+def to_number(value):
+    """轉為數值，無法轉換（含布林值）時回傳 None"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.strip())
+        except ValueError:
+            return None
+    return None
+
+
+def numeric_answers(data):
+    """取出所有數值答案（含巢狀結構），回傳 {欄位: 數值}"""
+    answers = {}
+
+    def walk(prefix, value):
+        if isinstance(value, dict):
+            for key, item in value.items():
+                walk(f"{prefix}.{key}" if prefix else str(key), item)
+        elif isinstance(value, list):
+            for index, item in enumerate(value):
+                walk(f"{prefix}.{index}", item)
+        else:
+            number = to_number(value)
+            if number is not None:
+                answers[prefix] = number
+
+    walk('', data)
+    return answers
+
+
+def item_values(data, items):
+    """依序取出指定題目的數值，任何一題缺少或不是數值時回傳 None"""
+    values = [to_number(data.get(item)) for item in items]
+    if any(value is None for value in values):
+        return None
+    return values
+
+
+def _minutes(value):
+    match = _TIME_PATTERN.match(str(value or '').strip())
+    if not match:
+        return None
+    return int(match.group(1)) * 60 + int(match.group(2))
+
+
+def score_sum(definition, data):
+    """題目分數加總：只計算 items 列出的題目，需全部作答"""
+    values = item_values(data, definition['items'])
+    if values is None:
+        return {}
+    return {definition['metric']: sum(values)}
+
+
+def score_sleep(definition, data):
+    """睡眠時數：直接填寫的時數，或由就寢與起床時間推算（可跨午夜）"""
+    values = item_values(data, definition['items'])
+    if values is not None:
+        return {definition['metric']: values[0]}
+    bedtime = _minutes(data.get(definition.get('bedtime')))
+    wake_time = _minutes(data.get(definition.get('wake_time')))
+    if bedtime is None or wake_time is None:
+        return {}
+    return {definition['metric']: ((wake_time - bedtime) % (24 * 60)) / 60}
+
+
+def score_nasa_tlx(definition, data):
+    """NASA-TLX：items 為六個向度，回傳原始平均與加權工作負荷
+
+    權重取自 weights 欄位指定的物件（兩兩比較次數，合計 15）；
+    沒有權重時加權分數等於原始平均
+    """
+    items = definition['items']
+    ratings = item_values(data, items)
+    if ratings is None:
+        return {}
+    raw = sum(ratings) / len(ratings)
+
+    weights = data.get(definition.get('weights'))
+    weights = item_values(weights, items) if isinstance(weights, dict) else None
+    if weights and sum(weights) > 0:
+        weighted = sum(rating * weight for rating, weight in zip(ratings, weights)) / sum(weights)
+    else:
+        weighted = raw
+    return {definition.get('raw_metric', TLX_RAW): raw, definition['metric']: weighted}
+
+
+# 計分定義的 method 對應的計算函式
+METHODS = {
+    'sum': score_sum,
+    'sleep_hours': score_sleep,
+    'nasa_tlx': score_nasa_tlx,
+}
+
+
+def scoring_definition(form_type):
+    """取得表單類型的計分定義，schema 沒有（或有無效的）x-scoring 時回傳 None"""
+    schema = form_type.schema if isinstance(form_type.schema, dict) else {}
+    definition = schema.get(SCORING_KEY)
+    if (
+        not isinstance(definition, dict)
+        or definition.get('method') not in METHODS
+        or not definition.get('metric')
+        or not isinstance(definition.get('items'), list)
+        or not definition['items']
+    ):
+        return None
+    return definition
+
+
+def scoring_definitions():
+    """所有有計分定義的表單類型，回傳 {表單類型 ID: 計分定義}"""
+    definitions = {}
+    for form_type in reference_cache.get_form_types():
+        definition = scoring_definition(form_type)
+        if definition is not None:
+            definitions[form_type.id] = definition
+    return definitions
+
+
+def primary_metrics():
+    """各表單類型的主要指標，回傳 {表單類型 ID: 指標名稱}"""
+    return {form_type_id: definition['metric'] for form_type_id, definition in scoring_definitions().items()}
+
+
+def primary_metric_names():
+    """所有表單類型的主要指標名稱"""
+    return tuple(sorted(set(primary_metrics().values())))
+
+
+def compute_scores(definition, data):
+    """依計分定義計算單筆提交的衍生分數，回傳 {指標: 數值}"""
+    if definition is None or not isinstance(data, dict):
+        return {}
+    return METHODS[definition['method']](definition, data)
+
+
+def build_scores(submissions):
+    """為已存檔的提交記錄建立（尚未存檔的）SubmissionScore 列表"""
+    definitions = scoring_definitions()
+    return [
+        SubmissionScore(submission_id=submission.id, metric=metric, value=value)
+        for submission in submissions
+        for metric, value in compute_scores(definitions.get(submission.form_type_id), submission.data).items()
+    ]
+
+
+def save_scores(submissions):
+    """計算並寫入分數"""
+    return SubmissionScore.objects.bulk_create(build_scores(submissions))
@@ -1,7 +1,8 @@
+from django.urls import reverse
 from rest_framework import serializers
 from .models import (
     CustomUser, Company, Worker, FormType, FormSubmission, 
-    Experiment, ExperimentFile, LineUserBinding, ReminderSchedule
+    Experiment, ExperimentFile, ChunkedUpload, LineUserBinding, ReminderSchedule
 )
 
 class CompanySerializer(serializers.ModelSerializer):
@@ -63,9 +64,16 @@ class WorkerSerializer(serializers.ModelSerializer):
         return obj.company.name if obj.company else None
 
 class FormTypeSerializer(serializers.ModelSerializer):
+    schema_url = serializers.SerializerMethodField()
+
     class Meta:
         model = FormType
-        fields = ['id', 'name', 'description', 'is_required_first_time', 'is_required_subsequent']
+        fields = ['id', 'name', 'description', 'is_required_first_time', 'is_required_subsequent',
+                  'schema_version', 'schema_hash', 'schema_url']
+
+    def get_schema_url(self, obj):
+        # 網址含 schema 雜湊，內容變動時網址也會改變
+        return reverse('public-form-type-schema', args=[obj.id, obj.schema_hash])
 
 class FormSubmissionSerializer(serializers.ModelSerializer):
     form_type_id = serializers.IntegerField(source='form_type.id', read_only=True)
@@ -76,6 +84,7 @@ class FormSubmissionSerializer(serializers.ModelSerializer):
         model = FormSubmission
         fields = ['id', 'worker', 'worker_name', 'form_type', 'form_type_id', 'form_type_name', 
                  'submission_time', 'submission_count', 'time_segment', 'stage', 'data']
+        read_only_fields = ['submission_time']
     
     def get_worker_name(self, obj):
         return obj.worker.name if obj.worker else None
@@ -93,6 +102,14 @@ class ExperimentFileSerializer(serializers.ModelSerializer):
     def get_file_url(self, obj):
         return obj.get_file_url()
 
+class ChunkedUploadSerializer(serializers.ModelSerializer):
+    experiment_file = ExperimentFileSerializer(read_only=True)
+    
+    class Meta:
+        model = ChunkedUpload
+        fields = ['id', 'experiment', 'file_field_name', 'original_filename', 'size', 'offset',
+                 'experiment_file', 'created_at', 'updated_at', 'completed_at']
+
 class ExperimentSerializer(serializers.ModelSerializer):
     worker_name = serializers.SerializerMethodField()
     experimenter_name = serializers.SerializerMethodField()
@@ -0,0 +1,72 @@
+# backend/app/signals.py
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Company, FormType, ReminderSchedule, FormSubmission, Experiment, DeletedRecord, Worker
+from . import reference_cache
+from . import bootstrap
+from . import worker_stats
+
+
+@receiver([post_save, post_delete], sender=Company)
+@receiver([post_save, post_delete], sender=FormType)
+@receiver([post_save, post_delete], sender=ReminderSchedule)
+def invalidate_reference_cache(sender, **kwargs):
+    """參考資料變動時，通知所有程序重新載入"""
+    reference_cache.invalidate_on_commit()
+
+
+def deleted_with_worker(origin):
+    """刪除是否由勞工或公司本身發起（連帶刪除其資料）
+
+    勞工統計會隨勞工一併刪除，不需要逐筆遞減；提交的刪除記錄只供該勞工的增量同步使用，也不需要寫入
+    """
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model in (Worker, Company)
+
+
+@receiver(post_delete, sender=FormSubmission)
+@receiver(post_delete, sender=Experiment)
+def record_deletion(sender, instance, origin=None, **kwargs):
+    """寫入刪除記錄，供增量同步回傳給用戶端
+
+    實驗記錄由公司層級的列表同步，勞工刪除時仍需寫入
+    """
+    if sender is FormSubmission and deleted_with_worker(origin):
+        return
+    DeletedRecord.objects.create(
+        model_name=sender._meta.model_name,
+        object_id=instance.pk,
+        worker_id=instance.worker_id
+    )
+
+
+@receiver([post_save, post_delete], sender=Worker)
+def invalidate_worker_bootstrap(sender, instance, **kwargs):
+    """勞工資料變動時清除表單頁啟動資料快取"""
+    bootstrap.invalidate_worker(instance)
+
+
+@receiver(post_save, sender=FormSubmission)
+def count_submission(sender, instance, created, **kwargs):
+    """單筆建立的提交計入勞工統計（批次寫入由 save_submission_batch 與匯入處理）"""
+    if created:
+        worker_stats.record_submissions(instance.worker_id, [instance])
+
+
+@receiver(post_delete, sender=FormSubmission)
+def uncount_submission(sender, instance, origin=None, **kwargs):
+    if not deleted_with_worker(origin):
+        worker_stats.record_submission_deleted(instance)
+
+
+@receiver(post_save, sender=Experiment)
+def count_experiment(sender, instance, created, **kwargs):
+    if created:
+        worker_stats.record_experiment(instance.worker_id, 1)
+
+
+@receiver(post_delete, sender=Experiment)
+def uncount_experiment(sender, instance, origin=None, **kwargs):
+    if not deleted_with_worker(origin):
+        worker_stats.record_experiment(instance.worker_id, -1)
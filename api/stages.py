@@ -0,0 +1,49 @@
+# backend/app/stages.py
+"""每日填寫階段的定義（LINE Bot、提醒與統計共用）"""
+from datetime import timedelta
+from django.utils import timezone
+
+STAGE_NAMES = ["早上", "中午", "下午", "下班", "晚上"]
+
+# 各階段需要的表單類型
+STAGE_REQUIREMENTS = {
+    0: [1, 2, 3],  # 早上：睡眠、嗜睡、視覺疲勞
+    1: [2, 3],     # 中午：嗜睡、視覺疲勞
+    2: [2, 3],     # 下午：嗜睡、視覺疲勞
+    3: [2, 3],     # 下班：嗜睡、視覺疲勞
+    4: [2, 3, 4]   # 晚上：嗜睡、視覺疲勞、NASA-TLX
+}
+
+
+def determine_current_stage(hour):
+    """根據小時判斷應該在哪個階段"""
+    if 6 <= hour < 12:
+        return 0  # 早上表單 (6-12點)
+    elif 12 <= hour < 14:
+        return 1  # 中午表單 (12-14點)
+    elif 14 <= hour < 17:
+        return 2  # 下午表單 (14-17點)
+    elif 17 <= hour < 20:
+        return 3  # 下班表單 (17-20點)
+    else:
+        return 4  # 晚上表單 (20點後)
+
+
+def current_stage(moment=None):
+    """以當地時間判斷目前階段"""
+    return determine_current_stage(timezone.localtime(moment).hour)
+
+
+# 各階段開始的小時（晚上階段跨過午夜到隔天早上）
+STAGE_START_HOURS = [6, 12, 14, 17, 20]
+
+
+def next_stage_boundary(moment=None):
+    """下一次階段切換或換日的時間（當地時間）"""
+    now = timezone.localtime(moment)
+    for hour in STAGE_START_HOURS:
+        if now.hour < hour:
+            return now.replace(hour=hour, minute=0, second=0, microsecond=0)
+    # 晚上階段跨過午夜，但「今日」的填寫狀態在午夜就會換日
+    tomorrow = now + timedelta(days=1)
+    return tomorrow.replace(hour=0, minute=0, second=0, microsecond=0)
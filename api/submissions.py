@@ -0,0 +1,230 @@
+# backend/app/submissions.py
+import hashlib
+import json
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction, IntegrityError
+from django.utils import timezone
+from .models import FormSubmission, IdempotencyKey
+from .scoring import save_scores
+from . import rollups
+from . import bootstrap
+from . import batches
+from . import worker_stats
+from . import archive
+
+IDEMPOTENCY_KEY_HEADER = 'Idempotency-Key'
+IDEMPOTENCY_KEY_MAX_LENGTH = 64
+
+
+def get_idempotency_key(request):
+    """從標頭或請求內容取得冪等鍵，未提供時回傳 None"""
+    key = request.headers.get(IDEMPOTENCY_KEY_HEADER) or request.data.get('idempotency_key')
+    if not key:
+        return None
+    return str(key).strip() or None
+
+
+class IdempotencyKeyReused(Exception):
+    """冪等鍵已用於內容不同的請求（其他勞工、其他端點或不同的表單內容）"""
+
+
+class IdempotencyKeyPending(Exception):
+    """同一冪等鍵的請求仍在處理中"""
+
+
+def request_fingerprint(endpoint, worker_id, payload):
+    """請求內容的雜湊：相同的重試得到相同的值"""
+    raw = json.dumps(
+        [endpoint, worker_id, payload],
+        sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str
+    )
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def _replay(record, request_hash):
+    """回傳先前的回應；請求內容不同時拋出 IdempotencyKeyReused，仍在處理中時拋出 IdempotencyKeyPending"""
+    if record.request_hash and record.request_hash != request_hash:
+        raise IdempotencyKeyReused()
+    if record.response is None:
+        raise IdempotencyKeyPending()
+    return record.response, True
+
+
+def _claim(idempotency_key, worker, request_hash):
+    """以獨立的交易寫入尚無回應的冪等鍵佔位並立即提交，鍵已存在時回傳 None"""
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(
+                worker=worker, key=idempotency_key, request_hash=request_hash, response=None
+            )
+    except IntegrityError:
+        return None
+
+
+def _take_over(record):
+    """接手超過 IDEMPOTENCY_CLAIM_TIMEOUT_SECONDS 仍未完成的佔位，以條件更新確保只有一個請求接手"""
+    cutoff = timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_CLAIM_TIMEOUT_SECONDS)
+    if record.created_at >= cutoff:
+        return False
+    return IdempotencyKey.objects.filter(
+        pk=record.pk, response__isnull=True, created_at=record.created_at
+    ).update(created_at=timezone.now()) == 1
+
+
+def _run_claimed(idempotency_key, action, worker, request_hash):
+    """先提交冪等鍵佔位再執行交易外的動作，並行的重試只有一個會執行"""
+    record = _claim(idempotency_key, worker, request_hash)
+    if record is None:
+        record = IdempotencyKey.objects.filter(worker=worker, key=idempotency_key).first()
+        if record is None:
+            # 先前的請求失敗並已刪除佔位
+            record = _claim(idempotency_key, worker, request_hash)
+            if record is None:
+                raise IdempotencyKeyPending()
+        elif record.response is not None or (record.request_hash and record.request_hash != request_hash):
+            return _replay(record, request_hash)
+        elif not _take_over(record):
+            raise IdempotencyKeyPending()
+
+    try:
+        payload = action()
+    except Exception:
+        # 動作失敗時刪除佔位，讓用戶端可以用同一個鍵重試
+        IdempotencyKey.objects.filter(pk=record.pk, response__isnull=True).delete()
+        raise
+    IdempotencyKey.objects.filter(pk=record.pk).update(response=payload)
+    return payload, False
+
+
+def run_idempotent(idempotency_key, action, worker, request_hash, claim_first=False):
+    """執行寫入動作並以冪等鍵記錄其回應
+
+    action 在交易中執行並回傳回應內容；冪等鍵以勞工為範圍，
+    同一勞工以相同的鍵與相同內容再次提交時直接回傳原本的回應，
+    內容不同時拋出 IdempotencyKeyReused，同一個鍵的請求仍在處理中時拋出 IdempotencyKeyPending。
+    回傳值為 (回應內容, 是否為重送)
+
+    claim_first=True 用於無法隨交易回滾的動作（例如寫入 Redis 佇列）：
+    先提交冪等鍵佔位再執行動作，並行的重試不會各自執行一次
+    """
+    if idempotency_key and claim_first:
+        return _run_claimed(idempotency_key, action, worker, request_hash)
+
+    if idempotency_key:
+        record = IdempotencyKey.objects.filter(worker=worker, key=idempotency_key).first()
+        if record:
+            return _replay(record, request_hash)
+
+    try:
+        with transaction.atomic():
+            payload = action()
+            if idempotency_key:
+                IdempotencyKey.objects.create(
+                    worker=worker, key=idempotency_key, request_hash=request_hash, response=payload
+                )
+    except IntegrityError:
+        # 同一冪等鍵的並行請求已先完成寫入，本次交易已回滾
+        record = IdempotencyKey.objects.filter(worker=worker, key=idempotency_key).first() if idempotency_key else None
+        if record is None:
+            raise
+        return _replay(record, request_hash)
+
+    return payload, False
+
+
+def allocate_time_segments(worker, submission_count, stage, form_type_ids, time_segment, reserved=None):
+    """為每個表單類型分配時段，一次查詢取得所有已使用的時段
+
+    規則與單筆提交相同：若指定的時段已被使用，改用目前最大時段 + 1；
+    reserved 記錄同一批次中已分配但尚未寫入的時段，批次寫入時避免互相重複
+    """
+    used_segments = {}
+    existing = FormSubmission.objects.filter(
+        worker=worker,
+        submission_count=submission_count,
+        stage=stage,
+        form_type_id__in=form_type_ids
+    ).values_list('form_type_id', 'time_segment')
+
+    for form_type_id, segment in existing:
+        used_segments.setdefault(form_type_id, set()).add(segment)
+
+    segments = {}
+    for form_type_id in form_type_ids:
+        used = used_segments.get(form_type_id, set())
+        if reserved is not None:
+            used = used | reserved.setdefault((worker.id, submission_count, stage, form_type_id), set())
+        segments[form_type_id] = max(used) + 1 if time_segment in used else time_segment
+        if reserved is not None:
+            reserved[(worker.id, submission_count, stage, form_type_id)].add(segments[form_type_id])
+    return segments
+
+
+def build_submissions(worker, submission_count, stage, time_segment, forms, submission_time=None, reserved=None):
+    """分配時段並建立（尚未存檔的）FormSubmission 列表，forms 為 (form_type, form_data) 的列表"""
+    form_type_ids = [form_type.id for form_type, _ in forms]
+    segments = allocate_time_segments(
+        worker, submission_count, stage, form_type_ids, time_segment, reserved
+    )
+    return [
+        FormSubmission(
+            worker=worker,
+            form_type=form_type,
+            submission_count=submission_count,
+            time_segment=segments[form_type.id],
+            stage=stage,
+            submission_time=submission_time or timezone.now(),
+            data=form_data
+        )
+        for form_type, form_data in forms
+    ]
+
+
+def save_submission_batch(groups):
+    """以一次 bulk_create 寫入多組提交記錄並更新分數、彙總、勞工批次與快取
+
+    groups 為 (worker, submissions) 的列表，需在交易中呼叫
+    """
+    submissions = [submission for _, worker_submissions in groups for submission in worker_submissions]
+    FormSubmission.objects.bulk_create(submissions)
+    scores = save_scores(submissions)
+
+    # 同一勞工的提交合併處理，彙總的填寫人數才不會重複計算
+    by_worker = {}
+    for worker, worker_submissions in groups:
+        by_worker.setdefault(worker.id, (worker, []))[1].extend(worker_submissions)
+    for worker, worker_submissions in by_worker.values():
+        rollups.record_submissions(worker, worker_submissions, scores)
+        batches.record_submissions(worker.id, worker_submissions)
+        worker_stats.record_submissions(worker.id, worker_submissions)
+        bootstrap.invalidate_worker(worker)
+    return submissions
+
+
+def create_submissions(worker, submission_count, stage, time_segment, forms):
+    """在同一個交易中建立多筆表單提交記錄
+
+    forms 為 (form_type, form_data) 的列表，回傳建立的 FormSubmission 列表
+    """
+    # 通常在 run_idempotent 的交易中呼叫，不需要另外建立 savepoint
+    with transaction.atomic(savepoint=False):
+        submissions = build_submissions(worker, submission_count, stage, time_segment, forms)
+        save_submission_batch([(worker, submissions)])
+
+    return submissions
+
+
+def delete_worker_submissions(worker_ids):
+    """以 SQL 分批刪除勞工的所有提交記錄與分數，回傳刪除筆數
+
+    供刪除勞工或公司前使用：不逐筆載入資料、不觸發 post_delete 訊號。
+    勞工統計會隨勞工一併刪除；刪除記錄只供該勞工的增量同步使用，勞工刪除後也不再需要
+    """
+    submissions = FormSubmission.objects.filter(worker_id__in=worker_ids).order_by('id')
+    deleted = 0
+    while True:
+        submission_ids = list(submissions.values_list('id', flat=True)[:settings.ARCHIVE_BATCH_SIZE])
+        if not submission_ids:
+            return deleted
+        deleted += archive.delete_submissions(submission_ids)
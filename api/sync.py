@@ -0,0 +1,89 @@
+# backend/app/sync.py
+"""增量同步（?since=）
+
+用戶端帶上次取得的 since 游標，只回傳之後新增或更新的資料，以及之後被刪除的 ID；
+第一次的游標由完整資料的回應提供，不使用用戶端的時鐘。
+時間戳記在交易中寫入、提交後才看得到，下一次的游標因此往前重疊 SYNC_OVERLAP_SECONDS 秒
+（大於最長的寫入交易）；重疊範圍內的資料可能重複出現，用戶端應以 id 覆蓋更新。
+刪除記錄只保留 DELETED_RECORD_RETENTION_DAYS 天，游標早於此期限時回傳 410，用戶端需重新取得完整資料。
+"""
+from datetime import timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import DeletedRecord
+
+# 完整資料回應中提供第一次游標的標頭
+CURSOR_HEADER = 'X-Sync-Since'
+
+# 表單提交同步時回傳的欄位（直接取外鍵 ID，不載入關聯物件）
+SUBMISSION_SYNC_FIELDS = (
+    'id', 'worker_id', 'form_type_id', 'submission_count',
+    'time_segment', 'stage', 'submission_time'
+)
+
+
+def parse_since(value):
+    """解析 since 參數，格式錯誤時拋出 ValueError"""
+    # 網址中的 + 可能被解碼成空白
+    parsed = parse_datetime(value.strip().replace(' ', '+'))
+    if parsed is None:
+        raise ValueError(f"無效的 since 參數: {value}")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, dt_timezone.utc)
+    return parsed
+
+
+def retention_cutoff():
+    """早於此時間的刪除記錄已被清除"""
+    return timezone.now() - timedelta(days=settings.DELETED_RECORD_RETENTION_DAYS)
+
+
+def cursor_expired(since):
+    """游標早於刪除記錄的保留期限，無法得知期間內刪除了哪些資料"""
+    return since < retention_cutoff()
+
+
+def format_cursor(moment):
+    """將時間轉為網址安全的 UTC 游標字串"""
+    return moment.astimezone(dt_timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def next_cursor(started_at):
+    """以查詢開始時間（往前重疊 SYNC_OVERLAP_SECONDS）作為下一次的游標"""
+    return format_cursor(started_at - timedelta(seconds=settings.SYNC_OVERLAP_SECONDS))
+
+
+def with_cursor(response, started_at):
+    """在完整資料的回應加上第一次增量同步的游標"""
+    response[CURSOR_HEADER] = next_cursor(started_at)
+    return response
+
+
+def submission_rows(queryset):
+    """以 values() 投影取得表單提交列表，不逐筆載入勞工與表單類型"""
+    rows = list(queryset.values(*SUBMISSION_SYNC_FIELDS))
+    for row in rows:
+        row['submission_time'] = row['submission_time'].isoformat()
+    return rows
+
+
+def deleted_ids(model_name, since, worker_ids=None):
+    """since 之後被刪除的資料 ID
+
+    worker_ids 可為 ID 列表或子查詢；為 None 時不限勞工
+    （用戶端忽略不認得的 ID 即可）
+    """
+    records = DeletedRecord.objects.filter(model_name=model_name, deleted_at__gt=since)
+    if worker_ids is not None:
+        records = records.filter(worker_id__in=worker_ids)
+    return list(records.values_list('object_id', flat=True))
+
+
+def record_deletions(model_name, rows):
+    """為繞過模型訊號的批次刪除寫入墓碑，rows 為 (object_id, worker_id) 列表"""
+    DeletedRecord.objects.bulk_create(
+        [DeletedRecord(model_name=model_name, object_id=object_id, worker_id=worker_id)
+         for object_id, worker_id in rows],
+        batch_size=1000
+    )
@@ -2,8 +2,16 @@ from celery import shared_task
 from django.utils import timezone
 from django.conf import settings
 from datetime import datetime, timedelta
-from .models import ReminderSchedule, Worker, LineUserBinding, ReminderLog
+from .models import ReminderSchedule, Worker, LineUserBinding, ReminderLog, IdempotencyKey, DeletedRecord
 from .line_bot_handler import LineBotService
+from . import reference_cache
+from . import rollups
+from . import datasets
+from . import ingest
+from . import archive
+from . import worker_tokens
+from . import uploads
+from . import sync
 
 @shared_task
 def send_scheduled_reminders():
@@ -12,12 +20,12 @@ def send_scheduled_reminders():
     current_time = now.time()
     current_weekday = now.weekday() + 1  # 1-7, 週一為1
     
-    # 查找符合條件的排程
-    schedules = ReminderSchedule.objects.filter(
-        is_active=True,
-        reminder_time__hour=current_time.hour,
-        reminder_time__minute=current_time.minute
-    )
+    # 查找符合條件的排程（排程表由參考資料快取提供，不需每分鐘查詢資料庫）
+    schedules = [
+        schedule for schedule in reference_cache.get_active_reminder_schedules()
+        if schedule.reminder_time.hour == current_time.hour
+        and schedule.reminder_time.minute == current_time.minute
+    ]
     
     line_service = LineBotService()
     sent_count = 0
@@ -81,7 +89,7 @@ def smart_reminder_check():
         if reminder_check['needs_reminder']:
             # 發送個人化提醒
             try:
-                form_url = f"{settings.FRONTEND_URL}/form?worker_code={worker.code}&company_code={worker.company.code}"
+                form_url = worker_tokens.build_form_url(worker)
                 flex_message = line_service.create_form_flex_message(worker, form_url)
                 
                 line_service.line_bot_api.push_message(binding.line_user_id, flex_message)
@@ -98,7 +106,7 @@ def daily_status_report():
     from linebot.models import TextSendMessage
     
     line_service = LineBotService()
-    active_bindings = LineUserBinding.objects.filter(is_active=True).select_related('worker')
+    active_bindings = LineUserBinding.objects.filter(is_active=True).select_related('worker__batch', 'worker__stats', 'worker__company')
     
     for binding in active_bindings:
         worker = binding.worker
@@ -111,4 +119,52 @@ def daily_status_report():
                 TextSendMessage(text=f"📊 每日狀態報告\n\n{status_message}")
             )
         except Exception as e:
-            print(f"發送狀態報告失敗 {worker.name}: {e}")
\ No newline at end of file
+            print(f"發送狀態報告失敗 {worker.name}: {e}")
+
+@shared_task
+def purge_idempotency_keys():
+    """清除超過保留期限的提交冪等鍵"""
+    cutoff_time = timezone.now() - timedelta(days=settings.IDEMPOTENCY_KEY_RETENTION_DAYS)
+    deleted, _ = IdempotencyKey.objects.filter(created_at__lt=cutoff_time).delete()
+    return f"共清除 {deleted} 筆冪等鍵"
+
+@shared_task
+def purge_deleted_records():
+    """清除超過保留期限的刪除記錄（墓碑）"""
+    deleted, _ = DeletedRecord.objects.filter(deleted_at__lt=sync.retention_cutoff()).delete()
+    return f"共清除 {deleted} 筆刪除記錄"
+
+@shared_task
+def rebuild_recent_rollups():
+    """重建最近幾天的每日提交彙總，校正刪除或補登造成的差異"""
+    today = timezone.localdate()
+    start = today - timedelta(days=settings.ROLLUP_REBUILD_DAYS - 1)
+    written = rollups.rebuild_rollups(start, today)
+    return f"共重建 {written} 筆每日彙總"
+
+@shared_task
+def export_datasets():
+    """增量匯出研究用 Parquet 資料集（只重寫新增或變動的分區）"""
+    summary = datasets.export_datasets()
+    written = sum(item['written'] for item in summary.values())
+    return f"共重寫 {written} 個資料集分區"
+
+@shared_task
+def archive_submissions():
+    """將超過保留期限的表單提交移到封存檔"""
+    summary = archive.archive_submissions()
+    return f"共封存 {summary['archived']} 筆提交，刪除 {summary['deleted']} 筆"
+
+@shared_task
+def drain_submission_queue():
+    """寫入佇列中的表單提交，作為未常駐 consume_submissions 時的備援"""
+    if not ingest.queue_enabled():
+        return "未啟用提交佇列"
+    processed = ingest.drain()
+    return f"共寫入 {processed} 筆佇列提交"
+
+@shared_task
+def purge_stale_uploads():
+    """清除逾期未完成的分段上傳與已寫入的部分檔案"""
+    purged = uploads.purge_stale_uploads()
+    return f"共清除 {purged} 筆未完成的上傳"
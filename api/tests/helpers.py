@@ -0,0 +1,45 @@
+# backend/app/tests/helpers.py
+import shutil
+import tempfile
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from api.models import Company, CustomUser, FormType, Worker
+from api.submissions import create_submissions
+from api import form_data, reference_cache
+
+
+class ApiTestCase(TestCase):
+    """建立一間公司、一位勞工、一個表單類型與公司管理員的測試基礎類別
+
+    封存檔寫入暫存目錄；參考資料快取與表單欄位字典快取在交易提交後才更新，
+    測試交易不會提交，因此在 setUp 中手動清除
+    """
+
+    def setUp(self):
+        self.archive_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_root, ignore_errors=True)
+        archive_settings = override_settings(ARCHIVE_ROOT=self.archive_root)
+        archive_settings.enable()
+        self.addCleanup(archive_settings.disable)
+        cache.clear()
+
+        self.company = Company.objects.create(name='測試公司', code='T1')
+        self.worker = Worker.objects.create(company=self.company, name='王小明', code='001')
+        self.form_type = FormType.objects.create(name='嗜睡量表')
+        self.user = CustomUser.objects.create_user(
+            username='admin1', password='secret', company=self.company, role='admin'
+        )
+        reference_cache.invalidate()
+        form_data._keys.clear()
+        form_data._positions.clear()
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.public_client = APIClient()
+
+    def submit(self, data, worker=None, form_type=None, submission_count=1, stage=0, time_segment=1):
+        """直接寫入一筆提交記錄（含分數與彙總），回傳 FormSubmission"""
+        return create_submissions(
+            worker or self.worker, submission_count, stage, time_segment, [(form_type or self.form_type, data)]
+        )[0]
@@ -0,0 +1,69 @@
+# backend/app/tests/test_analytics.py
+from api.tests.helpers import ApiTestCase
+
+
+class DistributionViewTests(ApiTestCase):
+    url = '/api/analytics/distributions/'
+
+    def test_returns_answer_distribution(self):
+        for value in (1, 2, 2, 3):
+            self.submit({'q1': value})
+
+        response = self.client.get(self.url, {'form_type_id': self.form_type.id})
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['form_type_id'], self.form_type.id)
+        self.assertIn('ETag', response)
+
+    def test_conditional_get_until_new_submission(self):
+        self.submit({'q1': 1})
+        first = self.client.get(self.url, {'form_type_id': self.form_type.id})
+
+        cached = self.client.get(
+            self.url, {'form_type_id': self.form_type.id}, HTTP_IF_NONE_MATCH=first['ETag']
+        )
+        self.assertEqual(cached.status_code, 304)
+
+        self.submit({'q1': 2})
+        changed = self.client.get(
+            self.url, {'form_type_id': self.form_type.id}, HTTP_IF_NONE_MATCH=first['ETag']
+        )
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], first['ETag'])
+
+    def test_requires_form_type(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 400)
+
+    def test_unknown_form_type(self):
+        response = self.client.get(self.url, {'form_type_id': 9999})
+        self.assertEqual(response.status_code, 404)
+
+
+class CohortViewTests(ApiTestCase):
+    url = '/api/analytics/cohort/'
+
+    def test_empty_company(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['total_scores'], 0)
+
+    def test_with_submissions(self):
+        self.submit({'q1': 3})
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200, response.data)
+
+    def test_invalid_date(self):
+        response = self.client.get(self.url, {'start': '2026-13-40'})
+        self.assertEqual(response.status_code, 400)
+
+
+class DailyRollupViewTests(ApiTestCase):
+    def test_counts_submissions(self):
+        self.submit({'q1': 3})
+        self.submit({'q1': 4}, time_segment=2)
+
+        response = self.client.get('/api/analytics/daily/')
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(sum(row['submission_count'] for row in response.data['rows']), 2)
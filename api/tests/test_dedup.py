@@ -0,0 +1,46 @@
+# backend/app/tests/test_dedup.py
+from unittest import mock
+from django.test import override_settings
+from api import archive, form_data
+from api.dedup import DEFAULT_KEY, dedup_submissions
+from api.models import FormSubmission, Worker, WorkerStats
+from .helpers import ApiTestCase
+
+
+class DedupTests(ApiTestCase):
+    """重複表單提交清理"""
+
+    def duplicate(self, data, time_segment=1):
+        """寫入一筆與第一時段自然鍵相同的記錄（create_submissions 會自動改用下一個時段）"""
+        submission = self.submit(data, time_segment=time_segment)
+        FormSubmission.objects.filter(id=submission.id).update(time_segment=1)
+        return submission
+
+    def test_data_key_compares_decoded_data(self):
+        plain = self.submit({'q1': 1, 'q2': 2})
+        with override_settings(FORM_DATA_COMPACT=True):
+            compact = self.duplicate({'q2': 2, 'q1': 1}, time_segment=2)
+            different = self.duplicate({'q1': 3, 'q2': 2}, time_segment=3)
+        formats = dict(FormSubmission.objects.values_list('id', 'data_format'))
+        self.assertEqual(formats[plain.id], form_data.PLAIN)
+        self.assertEqual(formats[compact.id], form_data.COMPACT)
+
+        summary = dedup_submissions(key=DEFAULT_KEY + ('data',), keep='latest')
+        self.assertEqual((summary['groups'], summary['duplicates'], summary['deleted']), (1, 1, 1))
+        self.assertEqual(summary['samples'][0]['data'], {'q1': 1, 'q2': 2})
+        self.assertEqual(
+            set(FormSubmission.objects.values_list('id', flat=True)), {compact.id, different.id}
+        )
+
+    def test_rebuild_reads_only_affected_workers_from_archive(self):
+        other = Worker.objects.create(company=self.company, name='李小華', code='002')
+        self.submit({'q1': 1}, worker=other)
+        self.submit({'q1': 1})
+        self.duplicate({'q1': 2}, time_segment=2)
+
+        with mock.patch.object(archive, 'iter_records', wraps=archive.iter_records) as iter_records:
+            summary = dedup_submissions()
+        self.assertEqual(summary['deleted'], 1)
+        iter_records.assert_called_once_with(self.company.id, worker_ids={self.worker.id})
+        self.assertEqual(WorkerStats.objects.get(worker=self.worker).submission_total, 1)
+        self.assertEqual(WorkerStats.objects.get(worker=other).submission_total, 1)
@@ -0,0 +1,43 @@
+# backend/app/tests/test_deletion.py
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from api.models import DeletedRecord, FormSubmission, SubmissionScore, WorkerStats
+from api.tests.helpers import ApiTestCase
+
+
+class WorkerDeletionTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        for segment in range(1, 21):
+            self.submit({'q1': segment}, time_segment=segment)
+
+    def test_force_delete_removes_submissions_in_bulk(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.delete(f'/api/workers/{self.worker.id}/force/')
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertFalse(FormSubmission.objects.exists())
+        self.assertFalse(SubmissionScore.objects.exists())
+        self.assertFalse(WorkerStats.objects.exists())
+        # 不逐筆遞減統計或寫入刪除記錄
+        self.assertFalse(DeletedRecord.objects.filter(model_name='formsubmission').exists())
+        self.assertLess(len(queries), 30)
+
+    def test_cascade_from_worker_skips_per_row_bookkeeping(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.worker.delete()
+
+        self.assertFalse(FormSubmission.objects.exists())
+        self.assertFalse(DeletedRecord.objects.filter(model_name='formsubmission').exists())
+        self.assertFalse(any('api_workerstats' in query['sql'] and 'UPDATE' in query['sql']
+                             for query in queries.captured_queries))
+
+    def test_single_submission_delete_updates_stats_and_tombstones(self):
+        submission = FormSubmission.objects.filter(worker=self.worker).first()
+        submission_id = submission.id
+        submission.delete()
+
+        self.assertEqual(WorkerStats.objects.get(worker=self.worker).submission_total, 19)
+        self.assertTrue(DeletedRecord.objects.filter(
+            model_name='formsubmission', object_id=submission_id, worker_id=self.worker.id
+        ).exists())
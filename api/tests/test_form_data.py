@@ -0,0 +1,66 @@
+# backend/app/tests/test_form_data.py
+from django.test import override_settings
+from api import form_data
+from api.models import FormDataKeyset, FormSubmission
+from .helpers import ApiTestCase
+
+
+@override_settings(FORM_DATA_COMPACT=True)
+class CompactFormDataTests(ApiTestCase):
+    """精簡格式的表單資料編碼、解碼與寫回"""
+
+    def stored(self, submission):
+        return FormSubmission.objects.filter(id=submission.id).values_list('data', 'data_format').get()
+
+    def test_bulk_update_data_reencodes(self):
+        submission = self.submit({'q1': 1, 'q2': 2})
+        self.assertEqual(self.stored(submission)[1], form_data.COMPACT)
+
+        loaded = FormSubmission.objects.get(id=submission.id)
+        loaded.data = {**loaded.data, 'q2': 5}
+        FormSubmission.objects.bulk_update([loaded], ['data'])
+        self.assertEqual(loaded.data, {'q1': 1, 'q2': 5})
+        data, data_format = self.stored(submission)
+        self.assertEqual(data_format, form_data.COMPACT)
+        self.assertEqual(form_data.decode(self.form_type.id, data, data_format), {'q1': 1, 'q2': 5})
+
+        with override_settings(FORM_DATA_COMPACT=False):
+            loaded = FormSubmission.objects.get(id=submission.id)
+            FormSubmission.objects.bulk_update([loaded], ['data'])
+        self.assertEqual(self.stored(submission), ({'q1': 1, 'q2': 5}, form_data.PLAIN))
+
+    def test_save_data_only_updates_format(self):
+        submission = self.submit({'q1': 1})
+        with override_settings(FORM_DATA_COMPACT=False):
+            loaded = FormSubmission.objects.get(id=submission.id)
+            loaded.data = {'q1': 2}
+            loaded.save(update_fields=['data'])
+        self.assertEqual(self.stored(submission), ({'q1': 2}, form_data.PLAIN))
+        self.assertEqual(FormSubmission.objects.get(id=submission.id).data, {'q1': 2})
+
+    def test_round_trip(self):
+        first = self.submit({'q1': 1, 'q2': 2})
+        # 新欄位附加到字典尾端，舊記錄的位置不變
+        second = self.submit({'q3': 'c', 'q1': 4}, submission_count=2)
+        self.assertEqual(list(FormDataKeyset.objects.get(form_type=self.form_type).keys), ['q1', 'q2', 'q3'])
+        self.assertEqual(self.stored(first), ([1, 2], form_data.COMPACT))
+        self.assertEqual(self.stored(second), ([4, None, 'c'], form_data.COMPACT))
+
+        form_data._keys.clear()
+        form_data._positions.clear()
+        self.assertEqual(FormSubmission.objects.get(id=first.id).data, {'q1': 1, 'q2': 2})
+        self.assertEqual(FormSubmission.objects.get(id=second.id).data, {'q3': 'c', 'q1': 4})
+
+    def test_uncompactable_data_stays_plain(self):
+        submission = self.submit({'q1': None, 'q2': 1})
+        self.assertEqual(self.stored(submission), ({'q1': None, 'q2': 1}, form_data.PLAIN))
+
+    def test_convert_both_ways(self):
+        with override_settings(FORM_DATA_COMPACT=False):
+            submissions = [self.submit({'q1': index, 'q2': [index]}, time_segment=index) for index in range(1, 4)]
+        self.assertEqual(form_data.convert(FormSubmission, FormDataKeyset, form_data.COMPACT, batch_size=2), 3)
+        self.assertEqual({self.stored(submission)[1] for submission in submissions}, {form_data.COMPACT})
+
+        self.assertEqual(form_data.convert(FormSubmission, FormDataKeyset, form_data.PLAIN, batch_size=2), 3)
+        for index, submission in enumerate(submissions, start=1):
+            self.assertEqual(self.stored(submission), ({'q1': index, 'q2': [index]}, form_data.PLAIN))
@@ -0,0 +1,58 @@
+# backend/app/tests/test_idempotency.py
+from api.models import FormSubmission, IdempotencyKey, Worker
+from .helpers import ApiTestCase
+
+SUBMIT_URL = '/api/public/forms/submit/'
+STAGE_URL = '/api/public/forms/submit-stage/'
+
+
+class IdempotencyTests(ApiTestCase):
+    """以 Idempotency-Key 重送提交"""
+
+    def submit_form(self, key, worker=None, data=None):
+        return self.public_client.post(SUBMIT_URL, {
+            'worker_id': (worker or self.worker).id,
+            'form_type_id': self.form_type.id,
+            'form_data': data or {'q1': 1},
+        }, format='json', headers={'Idempotency-Key': key})
+
+    def test_replay_returns_original_response(self):
+        first = self.submit_form('key-1')
+        self.assertEqual(first.status_code, 200)
+        self.assertNotIn('Idempotent-Replayed', first)
+
+        second = self.submit_form('key-1')
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(FormSubmission.objects.count(), 1)
+
+    def test_reused_key_with_different_body(self):
+        self.submit_form('key-1')
+        response = self.submit_form('key-1', data={'q1': 2})
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(FormSubmission.objects.count(), 1)
+
+    def test_keys_are_scoped_per_worker(self):
+        other = Worker.objects.create(company=self.company, name='李小華', code='002')
+        self.assertEqual(self.submit_form('key-1').status_code, 200)
+        response = self.submit_form('key-1', worker=other)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(FormSubmission.objects.filter(worker=other).count(), 1)
+        self.assertEqual(IdempotencyKey.objects.filter(key='key-1').count(), 2)
+
+    def test_stage_replay(self):
+        body = {
+            'worker_id': self.worker.id, 'stage': 1,
+            'forms': [{'form_type_id': self.form_type.id, 'form_data': {'q1': 1}}],
+        }
+        first = self.public_client.post(STAGE_URL, body, format='json', headers={'Idempotency-Key': 'stage-1'})
+        second = self.public_client.post(STAGE_URL, body, format='json', headers={'Idempotency-Key': 'stage-1'})
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(FormSubmission.objects.count(), 1)
+
+        body['stage'] = 2
+        conflict = self.public_client.post(STAGE_URL, body, format='json', headers={'Idempotency-Key': 'stage-1'})
+        self.assertEqual(conflict.status_code, 422)
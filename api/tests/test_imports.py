@@ -0,0 +1,55 @@
+# backend/app/tests/test_imports.py
+import io
+from datetime import date
+from api import archive
+from api.models import FormSubmission
+from .helpers import ApiTestCase
+
+URL = '/api/imports/submissions/'
+
+
+class SubmissionImportTests(ApiTestCase):
+    """歷史資料匯入的重複判斷"""
+
+    def csv_file(self, *rows):
+        lines = ['worker_code,form_type_id,submission_count,stage,submission_time,q1']
+        lines += [
+            f'001,{self.form_type.id},{count},0,{time},{answer}' for count, time, answer in rows
+        ]
+        upload = io.BytesIO('\n'.join(lines).encode('utf-8'))
+        upload.name = 'submissions.csv'
+        return upload
+
+    def upload(self, *rows):
+        response = self.client.post(URL, {'file': self.csv_file(*rows)}, format='multipart')
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_reimport_is_skipped(self):
+        rows = [(1, '2024-01-05T08:00:00', 1), (2, '2024-01-06T08:00:00', 2)]
+        report = self.upload(*rows)
+        self.assertEqual((report['imported'], report['skipped'], report['error_count']), (2, 0, 0))
+
+        report = self.upload(*rows, (3, '2024-01-07T08:00:00', 3))
+        self.assertEqual((report['imported'], report['skipped']), (1, 2))
+        self.assertEqual(FormSubmission.objects.count(), 3)
+
+    def test_duplicate_rows_in_one_file(self):
+        report = self.upload((1, '2024-01-05T08:00:00', 1), (1, '2024-01-05T08:00:00', 2))
+        self.assertEqual((report['imported'], report['skipped']), (1, 1))
+
+    def test_archived_records_are_skipped(self):
+        self.upload((1, '2024-01-05T08:00:00', 1))
+        archive.archive_month(self.company.id, date(2024, 1, 1))
+        self.assertFalse(FormSubmission.objects.exists())
+
+        report = self.upload((1, '2024-01-05T08:00:00', 1))
+        self.assertEqual((report['imported'], report['skipped']), (0, 1))
+        self.assertFalse(FormSubmission.objects.exists())
+
+    def test_dry_run_counts_without_writing(self):
+        response = self.client.post(
+            URL, {'file': self.csv_file((1, '2024-01-05T08:00:00', 1)), 'dry_run': 'true'}, format='multipart'
+        )
+        self.assertEqual(response.data['imported'], 1)
+        self.assertFalse(FormSubmission.objects.exists())
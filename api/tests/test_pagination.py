@@ -0,0 +1,49 @@
+# backend/app/tests/test_pagination.py
+from django.utils import timezone
+from api.models import FormSubmission
+from .helpers import ApiTestCase
+
+
+class KeysetPaginationTests(ApiTestCase):
+    """勞工表單提交列表的游標分頁"""
+
+    def setUp(self):
+        super().setUp()
+        for segment in range(1, 8):
+            self.submit({'q1': segment}, time_segment=segment)
+        # 匯入或批次寫入的資料填寫時間相同，以 id 決定次序
+        FormSubmission.objects.update(submission_time=timezone.now())
+        self.url = f'/api/workers/{self.worker.id}/submissions/'
+        self.expected = list(FormSubmission.objects.order_by('-submission_time', '-id').values_list('id', flat=True))
+
+    def ids(self, response):
+        return [row['id'] for row in response.data['results']]
+
+    def test_forward_and_back(self):
+        pages = []
+        response = self.client.get(self.url, {'page_size': 3})
+        self.assertIsNone(response.data['previous'])
+        while True:
+            self.assertEqual(response.status_code, 200)
+            pages.append(self.ids(response))
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual(sum(pages, []), self.expected)
+
+        # 由最後一頁往前翻
+        previous = self.client.get(response.data['previous'])
+        self.assertEqual(self.ids(previous), pages[1])
+        first = self.client.get(previous.data['previous'])
+        self.assertEqual(self.ids(first), pages[0])
+        self.assertIsNone(first.data['previous'])
+
+    def test_unpaginated_list(self):
+        response = self.client.get(self.url)
+        self.assertEqual([row['id'] for row in response.data], self.expected)
+
+    def test_invalid_cursor(self):
+        for cursor in ('not-a-cursor', 'eyJwIjpbMV19'):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.client.get(self.url, {'cursor': cursor}).status_code, 404)
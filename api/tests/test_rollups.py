@@ -0,0 +1,50 @@
+# backend/app/tests/test_rollups.py
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from api.models import DailySubmissionRollup, FormType, Worker
+from api.tests.helpers import ApiTestCase
+from api import rollups
+
+
+def rollup_rows():
+    return sorted(DailySubmissionRollup.objects.values_list(
+        'company_id', 'date', 'stage', 'form_type_id', 'submission_count', 'worker_count'
+    ))
+
+
+class RecordSubmissionsTests(ApiTestCase):
+    def test_incremental_rollups_match_rebuild(self):
+        other_form = FormType.objects.create(name='視覺疲勞量表')
+        other_worker = Worker.objects.create(company=self.company, name='李小華', code='002')
+        self.submit({'q1': 1})
+        self.submit({'q1': 2}, time_segment=2)
+        self.submit({'q1': 3}, form_type=other_form, stage=1)
+        self.submit({'q1': 4}, worker=other_worker)
+
+        incremental = rollup_rows()
+        today = timezone.localdate()
+        rollups.rebuild_rollups(today, today, self.company.id)
+
+        self.assertEqual(incremental, rollup_rows())
+        self.assertIn((self.company.id, today, 0, self.form_type.id, 3, 2), incremental)
+
+    def test_stage_submit_updates_rollups_in_one_statement(self):
+        other_form = FormType.objects.create(name='視覺疲勞量表')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.public_client.post('/api/public/forms/submit-stage/', {
+                'worker_id': self.worker.id,
+                'stage': 0,
+                'forms': [
+                    {'form_type_id': self.form_type.id, 'form_data': {'q1': 1}},
+                    {'form_type_id': other_form.id, 'form_data': {'q1': 2}},
+                ],
+            }, format='json')
+
+        self.assertEqual(response.status_code, 200, response.data)
+        rollup_writes = [
+            query['sql'] for query in queries.captured_queries
+            if DailySubmissionRollup._meta.db_table in query['sql'] and not query['sql'].startswith('SELECT')
+        ]
+        self.assertEqual(len(rollup_writes), 1)
+        self.assertEqual(len(rollup_rows()), 2)
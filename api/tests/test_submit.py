@@ -0,0 +1,46 @@
+# backend/app/tests/test_submit.py
+from api.models import FormSubmission
+from .helpers import ApiTestCase
+
+SUBMIT_URL = '/api/public/forms/submit/'
+STAGE_URL = '/api/public/forms/submit-stage/'
+
+
+class SubmitParamsTests(ApiTestCase):
+    """公開提交端點的參數驗證"""
+
+    def submit_form(self, **extra):
+        return self.public_client.post(SUBMIT_URL, {
+            'worker_id': self.worker.id, 'form_type_id': self.form_type.id, 'form_data': {'q1': 1}, **extra
+        }, format='json')
+
+    def submit_stage(self, **extra):
+        return self.public_client.post(STAGE_URL, {
+            'worker_id': self.worker.id,
+            'forms': [{'form_type_id': self.form_type.id, 'form_data': {'q1': 1}}],
+            **extra
+        }, format='json')
+
+    def test_valid_params(self):
+        response = self.submit_form(submission_count='2', time_segment='3', stage='1')
+        self.assertEqual(response.status_code, 200)
+        submission = FormSubmission.objects.get(id=response.data['submission_id'])
+        self.assertEqual((submission.submission_count, submission.time_segment, submission.stage), (2, 3, 1))
+
+        response = self.submit_stage(stage=2)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['stage'], 2)
+
+    def test_invalid_params_are_rejected(self):
+        for params in (
+            {'time_segment': 'abc'}, {'stage': 'x'}, {'submission_count': 'two'},
+            {'time_segment': 0}, {'stage': -1}, {'submission_count': 0}, {'stage': None},
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(self.submit_form(**params).status_code, 400)
+                self.assertEqual(self.submit_stage(**params).status_code, 400)
+        self.assertFalse(FormSubmission.objects.exists())
+
+    def test_invalid_worker_id(self):
+        self.assertEqual(self.submit_form(worker_id='abc').status_code, 404)
+        self.assertEqual(self.submit_stage(worker_id='abc').status_code, 404)
@@ -0,0 +1,77 @@
+# backend/app/tests/test_sync.py
+from datetime import timedelta
+from django.test import override_settings
+from django.utils import timezone
+from api import form_data, sync
+from api.models import DeletedRecord, FormDataKeyset, FormSubmission
+from .helpers import ApiTestCase
+
+URL = '/api/public/worker-submissions/'
+
+
+class WorkerSubmissionSyncTests(ApiTestCase):
+    """公開表單提交記錄的增量同步"""
+
+    def fetch(self, headers=None, **params):
+        return self.public_client.get(URL, {'company_code': 'T1', 'worker_code': '001', **params}, headers=headers)
+
+    def test_full_response_returns_cursor(self):
+        submission = self.submit({'q1': 1})
+        response = self.fetch()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.data], [submission.id])
+
+        cursor = response[sync.CURSOR_HEADER]
+        cached = self.fetch(headers={'If-None-Match': response['ETag']})
+        self.assertEqual(cached.status_code, 304)
+        self.assertIn(sync.CURSOR_HEADER, cached)
+
+        # 以完整資料的游標開始增量同步，重疊範圍內的資料會重複出現
+        delta = self.fetch(since=cursor)
+        self.assertEqual(delta.status_code, 200)
+        self.assertEqual([row['id'] for row in delta.data['submissions']], [submission.id])
+
+    @override_settings(SYNC_OVERLAP_SECONDS=0)
+    def test_updated_submissions_are_synced(self):
+        edited = self.submit({'q1': 1})
+        untouched = self.submit({'q1': 2}, submission_count=2)
+        old = timezone.now() - timedelta(days=1)
+        FormSubmission.objects.update(created_at=old, updated_at=old)
+        since = self.fetch().get(sync.CURSOR_HEADER)
+        self.assertEqual(self.fetch(since=since).data['submissions'], [])
+
+        # 管理員修改與格式轉換都會更新 updated_at
+        edited.data = {'q1': 3}
+        edited.save()
+        delta = self.fetch(since=since)
+        self.assertEqual([row['id'] for row in delta.data['submissions']], [edited.id])
+
+        FormSubmission.objects.update(updated_at=old)
+        form_data.convert(FormSubmission, FormDataKeyset, form_data.COMPACT)
+        delta = self.fetch(since=since)
+        self.assertEqual(
+            sorted(row['id'] for row in delta.data['submissions']), sorted([edited.id, untouched.id])
+        )
+
+    def test_deleted_submissions_are_synced(self):
+        kept = self.submit({'q1': 1})
+        removed = self.submit({'q1': 2}, submission_count=2)
+        removed_id = removed.id
+        since = self.fetch()[sync.CURSOR_HEADER]
+
+        removed.delete()
+        delta = self.fetch(since=since)
+        self.assertEqual(delta.data['deleted'], [removed_id])
+        self.assertNotIn(removed_id, [row['id'] for row in delta.data['submissions']])
+        self.assertIn(kept.id, [row['id'] for row in delta.data['submissions']])
+
+        # 其他勞工的墓碑不會出現
+        DeletedRecord.objects.filter(object_id=removed_id).update(worker_id=self.worker.id + 1)
+        self.assertEqual(self.fetch(since=since).data['deleted'], [])
+
+    def test_expired_and_invalid_cursor(self):
+        expired = sync.format_cursor(timezone.now() - timedelta(days=91))
+        self.assertEqual(self.fetch(since=expired).status_code, 410)
+        self.assertEqual(self.fetch(since='yesterday').status_code, 400)
+        with override_settings(DELETED_RECORD_RETENTION_DAYS=365):
+            self.assertEqual(self.fetch(since=expired).status_code, 200)
@@ -0,0 +1,189 @@
+# backend/app/uploads.py
+"""大型實驗檔案的可續傳分段上傳（tus 協定的簡化版本）
+
+1. 建立上傳：提供欄位名稱、檔名與總大小，在檔案最終的儲存位置建立空檔案
+2. 以 PATCH 依序送出分段，Upload-Offset 必須等於已接收的位元組數；
+   請求本文邊讀邊寫入檔案的對應位置，不經過 Django 的上傳暫存檔
+3. 連線中斷後查詢已接收的位元組數（HEAD），從該位置繼續，已送達的部分不必重傳
+4. 全部接收後完成上傳：直接以該檔案建立 ExperimentFile，不再複製
+
+分段以 default_storage.path() 取得的本機路徑寫入，需使用檔案系統儲存（MEDIA_ROOT）。
+"""
+import base64
+import os
+from datetime import timedelta
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from .models import ChunkedUpload, Experiment, ExperimentFile
+
+TUS_VERSION = '1.0.0'
+CHUNK_CONTENT_TYPE = 'application/offset+octet-stream'
+
+# 每次由請求本文讀取的位元組數
+READ_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    """上傳請求無效，status 為回應的 HTTP 狀態碼"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_metadata(header):
+    """解析 Upload-Metadata 標頭：以逗號分隔的「鍵 base64(值)」"""
+    metadata = {}
+    for item in (header or '').split(','):
+        parts = item.strip().split(' ', 1)
+        if not parts[0]:
+            continue
+        value = ''
+        if len(parts) == 2:
+            try:
+                value = base64.b64decode(parts[1], validate=True).decode('utf-8')
+            except (ValueError, UnicodeDecodeError):
+                raise UploadError(f"無效的 Upload-Metadata: {parts[0]}")
+        metadata[parts[0]] = value
+    return metadata
+
+
+def parse_size(value, name):
+    """解析非負整數的位元組數，格式錯誤時拋出 UploadError"""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        size = -1
+    if size < 0:
+        raise UploadError(f"無效的 {name}: {value}")
+    return size
+
+
+def expires_at(upload):
+    """未完成的上傳在最後一次寫入後超過 UPLOAD_EXPIRY_HOURS 即由排程清除"""
+    return upload.updated_at + timedelta(hours=settings.UPLOAD_EXPIRY_HOURS)
+
+
+def create_upload(experiment, user, field_name, filename, size):
+    """建立上傳記錄，並在檔案最終的儲存位置建立空檔案"""
+    filename = os.path.basename(filename or '')
+    if not field_name:
+        raise UploadError("缺少 file_field_name")
+    if not filename:
+        raise UploadError("缺少 filename")
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in settings.ALLOWED_FILE_EXTENSIONS:
+        raise UploadError(f"不支援的檔案類型: {extension or filename}")
+    if size > settings.MAX_FILE_SIZE:
+        raise UploadError(f"檔案大小超過上限 {settings.MAX_FILE_SIZE} 位元組", status=413)
+
+    # 與一般上傳相同的路徑規則；同名檔案已存在時由 storage 產生不重複的檔名
+    name = ExperimentFile._meta.get_field('file').generate_filename(
+        ExperimentFile(experiment=experiment), filename
+    )
+    name = default_storage.save(name, ContentFile(b''))
+    return ChunkedUpload.objects.create(
+        experiment=experiment,
+        user=user,
+        file_field_name=field_name[:100],
+        original_filename=filename[:255],
+        file_path=name,
+        size=size
+    )
+
+
+def write_chunk(upload, offset, stream, length):
+    """將請求本文寫入檔案的 offset 位置並回傳新的已接收位元組數
+
+    只保留一個 READ_SIZE 的緩衝區；連線中途中斷時仍記錄已寫入的部分，
+    用戶端重新查詢後從新的位置繼續。以條件更新推進位置，
+    並行送出同一位置的分段時只有一個會成功，其餘回傳 409
+    """
+    if upload.completed_at:
+        raise UploadError("此上傳已完成", status=409)
+    if offset != upload.offset:
+        raise UploadError(f"Upload-Offset 與已接收的位元組數 {upload.offset} 不符", status=409)
+    if length > settings.UPLOAD_CHUNK_MAX_SIZE:
+        raise UploadError(f"分段大小超過上限 {settings.UPLOAD_CHUNK_MAX_SIZE} 位元組", status=413)
+    if offset + length > upload.size:
+        raise UploadError("分段超出檔案大小")
+
+    written = 0
+    interrupted = False
+    with open(default_storage.path(upload.file_path), 'r+b') as file:
+        file.seek(offset)
+        try:
+            while written < length:
+                data = stream.read(min(READ_SIZE, length - written))
+                if not data:
+                    interrupted = True
+                    break
+                file.write(data)
+                written += len(data)
+        except OSError:
+            # 讀取請求本文時連線中斷（UnreadablePostError 為 OSError 的子類別）
+            interrupted = True
+
+    if written:
+        updated = ChunkedUpload.objects.filter(
+            pk=upload.pk, offset=offset, completed_at__isnull=True
+        ).update(offset=offset + written, updated_at=timezone.now())
+        if not updated:
+            raise UploadError("此上傳同時有其他分段寫入，請重新查詢已接收的位元組數", status=409)
+        upload.offset = offset + written
+    if interrupted:
+        raise UploadError(f"分段未完整接收，已保存至位元組 {upload.offset}")
+    return upload.offset
+
+
+def finalize(upload):
+    """以已接收完整的檔案建立 ExperimentFile，並將檔案網址寫入實驗資料
+
+    重複呼叫回傳同一個檔案記錄；檔案已在最終位置，不再複製
+    """
+    with transaction.atomic():
+        upload = ChunkedUpload.objects.select_for_update().get(pk=upload.pk)
+        if upload.completed_at:
+            return upload
+        if upload.offset < upload.size:
+            raise UploadError(f"檔案尚未上傳完成（{upload.offset}/{upload.size} 位元組）", status=409)
+
+        experiment = Experiment.objects.select_for_update().get(pk=upload.experiment_id)
+        experiment_file = ExperimentFile.objects.create(
+            experiment=experiment,
+            file_field_name=upload.file_field_name,
+            file=upload.file_path,
+            original_filename=upload.original_filename
+        )
+        if not experiment.data:
+            experiment.data = {}
+        experiment.data[upload.file_field_name] = experiment_file.get_file_url()
+        experiment.save()
+
+        upload.experiment_file = experiment_file
+        upload.completed_at = timezone.now()
+        upload.save(update_fields=['experiment_file', 'completed_at', 'updated_at'])
+    return upload
+
+
+def discard(upload):
+    """刪除未完成的上傳與已寫入的部分檔案"""
+    if upload.completed_at:
+        raise UploadError("已完成的上傳無法取消", status=409)
+    default_storage.delete(upload.file_path)
+    upload.delete()
+
+
+def purge_stale_uploads(now=None):
+    """清除超過 UPLOAD_EXPIRY_HOURS 未再寫入的未完成上傳，回傳清除數量"""
+    cutoff = (now or timezone.now()) - timedelta(hours=settings.UPLOAD_EXPIRY_HOURS)
+    stale = ChunkedUpload.objects.filter(completed_at__isnull=True, updated_at__lt=cutoff)
+    purged = 0
+    for upload in stale.iterator():
+        default_storage.delete(upload.file_path)
+        upload.delete()
+        purged += 1
+    return purged
@@ -6,6 +6,9 @@ from . import views_worker
 from . import views_experiment
 from . import views_user
 from . import views_form
+from . import views_analytics
+from . import views_export
+from . import views_import
 from .views_line import LineWebhookView
 from .views_line_admin import (
     LineBindingListView, 
@@ -29,10 +32,12 @@ urlpatterns = [
     # path('api/companies/<int:company_id>/workers/', views_worker.WorkerListView.as_view(), name='company-workers'),
     path('api/workers/', views_worker.WorkerCreateView.as_view(), name='worker-create'),
     path('api/workers/<int:worker_id>/', views_worker.WorkerDetailView.as_view(), name='worker-detail'),
+    path('api/workers/import/', views_worker.WorkerRosterImportView.as_view(), name='worker-roster-import'),
     path('api/workers/all/', views_worker.WorkerListView.as_view(), name='all-workers'),
     path('api/companies/<int:company_id>/workers/', views_worker.WorkerListView.as_view(), name='company-workers'),
     path('api/public/worker-by-code/', views_worker.WorkerByCodeView.as_view(), name='worker-by-code'),
     path('api/workers/<int:worker_id>/delete/', views_worker.WorkerDetailView.as_view(), name='worker-delete'),
+    path('api/workers/<int:worker_id>/form-link/', views_worker.WorkerFormLinkView.as_view(), name='worker-form-link'),
     path('api/workers/<int:worker_id>/force/', views_worker.WorkerForceDeleteView.as_view(), name='worker-force-delete'),
 
 
@@ -46,7 +51,11 @@ urlpatterns = [
     path('api/forms/submit/', views_form.submit_form, name='submit-form'),
     path('api/workers/<int:worker_id>/submissions/', views_form.WorkerSubmissionsView.as_view(), name='worker-submissions'),
     path('api/public/forms/submit/', views_form.submit_form, name='public-submit-form'),
+    path('api/public/forms/submit-stage/', views_form.submit_stage_forms, name='public-submit-stage-forms'),
+    path('api/public/forms/receipts/<str:receipt_id>/', views_form.public_submission_receipt, name='public-submission-receipt'),
     path('api/public/form-types/', views_form.public_form_types, name='public-form-types'),
+    path('api/public/form-types/<int:form_type_id>/schema/<str:schema_hash>/', views_form.public_form_type_schema, name='public-form-type-schema'),
+    path('api/public/forms/bootstrap/', views_form.public_form_bootstrap, name='public-form-bootstrap'),
     path('api/public/worker-submissions/', views_form.public_worker_submissions, name='public-worker-submissions'),
 
 
@@ -54,9 +63,22 @@ urlpatterns = [
     # 實驗相關 API
     path('api/experiments/', views_experiment.ExperimentCreateView.as_view(), name='experiment-create'),
     path('api/experiments/<int:experiment_id>/', views_experiment.ExperimentCreateView.as_view(), name='experiment-update'),
+    path('api/experiments/<int:experiment_id>/uploads/', views_experiment.ExperimentUploadCreateView.as_view(), name='experiment-upload-create'),
+    path('api/experiments/uploads/<uuid:upload_id>/', views_experiment.ExperimentUploadView.as_view(), name='experiment-upload'),
+    path('api/experiments/uploads/<uuid:upload_id>/finalize/', views_experiment.ExperimentUploadFinalizeView.as_view(), name='experiment-upload-finalize'),
     path('api/experimenter/experiments/', views_experiment.ExperimenterExperimentsView.as_view(), name='experimenter-experiments'),
     path('api/companies/experiments/', views_experiment.CompanyExperimentsView.as_view(), name='company-experiments'),
     path('api/workers/<int:worker_id>/experiments/', views_experiment.WorkerExperimentsView.as_view(), name='worker-experiments'),
+
+    # 統計分析相關 API
+    path('api/analytics/cohort/', views_analytics.CohortAnalyticsView.as_view(), name='analytics-cohort'),
+    path('api/analytics/compliance/', views_analytics.ComplianceDashboardView.as_view(), name='analytics-compliance'),
+    path('api/analytics/daily/', views_analytics.DailyRollupView.as_view(), name='analytics-daily'),
+    path('api/analytics/distributions/', views_analytics.ResponseDistributionView.as_view(), name='analytics-distributions'),
+
+    # 資料匯出與匯入相關 API
+    path('api/exports/submissions/', views_export.SubmissionExportView.as_view(), name='export-submissions'),
+    path('api/imports/submissions/', views_import.SubmissionImportView.as_view(), name='import-submissions'),
     
     # 使用者管理相關 API
     path('api/companies/<int:company_id>/users/', views_user.CompanyUsersView.as_view(), name='company-users'),
@@ -6,6 +6,7 @@ from rest_framework import status
 from rest_framework.authtoken.models import Token
 from .models import Company, CustomUser
 from .serializers import UserSerializer, FormTypeSerializer
+from . import reference_cache
 from rest_framework.decorators import api_view
 from rest_framework.permissions import AllowAny
 from django.utils import timezone 
@@ -90,10 +91,9 @@ class LoginView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        try:
-            # 檢查公司代碼是否存在
-            company = Company.objects.get(code=company_code)
-        except Company.DoesNotExist:
+        # 檢查公司代碼是否存在
+        company = reference_cache.get_company_by_code(company_code)
+        if company is None:
             return Response(
                 {"message": "公司代碼不存在"},
                 status=status.HTTP_404_NOT_FOUND
@@ -0,0 +1,196 @@
+# backend/app/views_analytics.py
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from django.utils.dateparse import parse_date
+from . import analytics
+from . import distributions
+from . import rollups
+from . import reference_cache
+from .conditional import make_etag, not_modified, with_validators
+
+# 可查看任何公司統計資料的角色，其他角色只能查看自己的公司
+CROSS_COMPANY_ROLES = ['superadmin', 'super_experimenter']
+ANALYTICS_ROLES = ['owner', 'admin', 'experimenter'] + CROSS_COMPANY_ROLES
+
+
+def resolve_company(request):
+    """依使用者角色與 company_id 參數決定要分析的公司，回傳 (公司, 錯誤回應)"""
+    if request.user.role not in ANALYTICS_ROLES:
+        return None, Response(
+            {"message": "您沒有權限查看統計資料"},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    company_id = request.query_params.get('company_id')
+    is_from_super_company = (request.user.company and
+                             getattr(request.user.company, 'is_super_company', False)) or \
+                            request.user.role in CROSS_COMPANY_ROLES
+
+    if company_id and is_from_super_company:
+        try:
+            company = reference_cache.get_company(int(company_id))
+        except ValueError:
+            company = None
+        if company is None:
+            return None, Response(
+                {"message": "找不到指定的公司"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return company, None
+
+    if not request.user.company:
+        return None, Response(
+            {"message": "您沒有關聯到任何公司"},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    return request.user.company, None
+
+
+def parse_date_range(request):
+    """解析 start / end 日期參數（YYYY-MM-DD），格式錯誤時拋出 ValueError"""
+    dates = []
+    for name in ('start', 'end'):
+        value = request.query_params.get(name)
+        try:
+            parsed = parse_date(value) if value else None
+        except ValueError:
+            parsed = None
+        if value and parsed is None:
+            raise ValueError(f"無效的 {name} 參數: {value}")
+        dates.append(parsed)
+    return dates
+
+
+class CohortAnalyticsView(APIView):
+    """公司疲勞指標群體統計：各階段平均、每日趨勢、同日變化量與勞工 z 分數"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        company, error = resolve_company(request)
+        if error:
+            return error
+
+        try:
+            start, end = parse_date_range(request)
+        except ValueError as e:
+            return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        version = analytics.data_version(company.id)
+        etag = make_etag(request, company.id, version)
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+
+        try:
+            result = analytics.cached_cohort_analysis(company.id, start, end, version)
+        except Exception as e:
+            return Response(
+                {"message": f"計算統計資料時發生錯誤: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        return with_validators(Response({
+            'company_id': company.id,
+            'start': start.isoformat() if start else None,
+            'end': end.isoformat() if end else None,
+            **result
+        }), etag)
+
+
+class ComplianceDashboardView(APIView):
+    """公司填寫完成率儀表板：各日各階段完成率與目前階段未完成的勞工"""
+    permission_classes = [IsAuthenticated]
+    MAX_DAYS = 31
+
+    def get(self, request):
+        company, error = resolve_company(request)
+        if error:
+            return error
+
+        try:
+            days = int(request.query_params.get('days', 7))
+        except ValueError:
+            days = 0
+        if not 1 <= days <= self.MAX_DAYS:
+            return Response(
+                {"message": f"days 參數需介於 1 到 {self.MAX_DAYS}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            result = analytics.cached_compliance_summary(company.id, days)
+        except Exception as e:
+            return Response(
+                {"message": f"計算完成率時發生錯誤: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        return Response({'company_id': company.id, 'days': days, **result})
+
+
+class DailyRollupView(APIView):
+    """公司每日提交彙總（依日期、階段、表單類型），由彙總表讀取，不掃描提交記錄"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        company, error = resolve_company(request)
+        if error:
+            return error
+
+        try:
+            start, end = parse_date_range(request)
+        except ValueError as e:
+            return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'company_id': company.id,
+            'start': start.isoformat() if start else None,
+            'end': end.isoformat() if end else None,
+            'rows': rollups.daily_rows(company.id, start, end)
+        })
+
+
+class ResponseDistributionView(APIView):
+    """公司某表單類型各題答案的分布：直方圖、分位數與平均"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        company, error = resolve_company(request)
+        if error:
+            return error
+
+        form_type_id = request.query_params.get('form_type_id')
+        if not form_type_id:
+            return Response({"message": "缺少 form_type_id 參數"}, status=status.HTTP_400_BAD_REQUEST)
+        form_type = reference_cache.get_form_type(form_type_id)
+        if form_type is None:
+            return Response({"message": "找不到該表單類型"}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            start, end = parse_date_range(request)
+        except ValueError as e:
+            return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        version = analytics.data_version(company.id)
+        etag = make_etag(request, company.id, version)
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+
+        try:
+            result = distributions.cached_response_distribution(company.id, form_type.id, start, end, version)
+        except Exception as e:
+            return Response(
+                {"message": f"計算答案分布時發生錯誤: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        return with_validators(Response({
+            'company_id': company.id,
+            'form_type_id': form_type.id,
+            'start': start.isoformat() if start else None,
+            'end': end.isoformat() if end else None,
+            **result
+        }), etag)
@@ -9,6 +9,8 @@ from django.contrib.auth.hashers import make_password
 from django.contrib.auth import get_user_model
 from .models import Company, CustomUser
 from .serializers import CompanySerializer
+from . import reference_cache
+from .conditional import make_etag, not_modified, with_validators
 
 User = get_user_model()
 
@@ -17,9 +19,17 @@ User = get_user_model()
 def public_company_list(request):
     """公開的公司列表API，用於登入頁面顯示公司選項"""
     try:
+        etag = make_etag(request, reference_cache.current_version())
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+        
         # 只返回基本的公司信息（不包含敏感數據）
-        companies = Company.objects.all().values('id', 'name', 'code')
-        return Response(list(companies))
+        companies = [
+            {'id': company.id, 'name': company.name, 'code': company.code}
+            for company in reference_cache.get_companies()
+        ]
+        return with_validators(Response(companies), etag)
     except Exception as e:
         return Response(
             {"message": f"獲取公司列表時發生錯誤: {str(e)}"},
@@ -6,10 +6,64 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from django.utils import timezone
+from django.utils.http import http_date
+from django.urls import reverse
 from django.core.files.storage import default_storage
 import json
-from .models import Experiment, Worker, ExperimentFile, Company
-from .serializers import ExperimentSerializer
+from .models import Experiment, Worker, ExperimentFile, Company, ChunkedUpload
+from .serializers import ExperimentSerializer, ChunkedUploadSerializer
+from .conditional import queryset_etag, not_modified, with_validators
+from .pagination import list_payload
+from . import sync
+from . import uploads
+
+# 實驗列表的排序鍵，id 作為同一時間的穩定次序
+EXPERIMENT_ORDERING = ('-experiment_time', '-id')
+
+def experiment_list_response(request, experiments, view=None, worker_ids=None, paginate=False):
+    """實驗記錄列表回應（支援游標分頁），資料未變動時回傳 304 而不執行序列化
+
+    帶 since 參數時只回傳之後新增或更新的記錄，以及 worker_ids 範圍內已刪除的記錄 ID；
+    完整資料的回應以 X-Sync-Since 標頭提供第一次的 since 游標；paginate=True 時一律分頁
+    """
+    since = request.query_params.get('since')
+    started_at = timezone.now()
+    if since:
+        try:
+            since = sync.parse_since(since)
+        except ValueError:
+            return Response({"message": "無效的 since 參數"}, status=status.HTTP_400_BAD_REQUEST)
+        if sync.cursor_expired(since):
+            return Response({"message": "since 游標已過期，請重新取得完整資料"}, status=status.HTTP_410_GONE)
+        
+        changed = experiments.filter(updated_at__gt=since).select_related(
+            'worker', 'experimenter'
+        ).prefetch_related('files').order_by(*EXPERIMENT_ORDERING)
+        return Response({
+            'experiments': ExperimentSerializer(changed, many=True).data,
+            'deleted': sync.deleted_ids('experiment', since, worker_ids),
+            'since': sync.next_cursor(started_at)
+        })
+    
+    # 序列化內容含勞工與實驗者名稱，名稱變動時 ETag 也要改變
+    experimenters = sorted(
+        experiments.order_by().values_list('experimenter_id', 'experimenter__username').distinct()
+    )
+    etag = queryset_etag(request, experiments, 'updated_at', experimenters, related=('worker__updated_at',))
+    cached = not_modified(request, etag)
+    if cached:
+        return sync.with_cursor(cached, started_at)
+    
+    experiments = experiments.select_related('worker', 'experimenter').prefetch_related('files')
+    data = list_payload(
+        request,
+        experiments,
+        EXPERIMENT_ORDERING,
+        lambda rows: ExperimentSerializer(rows, many=True).data,
+        view=view,
+        paginate=paginate
+    )
+    return sync.with_cursor(with_validators(Response(data), etag), started_at)
 
 class ExperimenterExperimentsView(APIView):
     """獲取實驗者自己的實驗記錄"""
@@ -24,9 +78,8 @@ class ExperimenterExperimentsView(APIView):
             )
         
         # 獲取該實驗者的所有實驗記錄
-        experiments = Experiment.objects.filter(experimenter=request.user).order_by('-experiment_time')
-        serializer = ExperimentSerializer(experiments, many=True)
-        return Response(serializer.data)
+        experiments = Experiment.objects.filter(experimenter=request.user)
+        return experiment_list_response(request, experiments, view=self)
 
 class ExperimentCreateView(APIView):
     """創建新實驗記錄，支援檔案上傳"""
@@ -195,9 +248,8 @@ class CompanyExperimentsView(APIView):
         
         # 獲取該公司所有勞工的實驗記錄
         workers = Worker.objects.filter(company=company).values_list('id', flat=True)
-        experiments = Experiment.objects.filter(worker__in=workers).order_by('-experiment_time')
-        serializer = ExperimentSerializer(experiments, many=True)
-        return Response(serializer.data)
+        experiments = Experiment.objects.filter(worker__in=workers)
+        return experiment_list_response(request, experiments, view=self, worker_ids=workers)
 
 class WorkerExperimentsView(APIView):
     """獲取特定勞工的實驗記錄，公司管理員和實驗者可用"""
@@ -239,9 +291,8 @@ class WorkerExperimentsView(APIView):
             )
         
         # 獲取該勞工的所有實驗記錄
-        experiments = Experiment.objects.filter(worker=worker).order_by('-experiment_time')
-        serializer = ExperimentSerializer(experiments, many=True)
-        return Response(serializer.data)
+        experiments = Experiment.objects.filter(worker=worker)
+        return experiment_list_response(request, experiments, view=self, worker_ids=[worker.id])
 
 class SuperExperimenterView(APIView):
     """獲取所有公司的實驗記錄，僅超級實驗者可用"""
@@ -255,7 +306,162 @@ class SuperExperimenterView(APIView):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # 獲取所有實驗記錄
-        experiments = Experiment.objects.all().order_by('-experiment_time')
-        serializer = ExperimentSerializer(experiments, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        # 獲取所有實驗記錄；跨所有公司的資料量沒有上限，一律分頁
+        experiments = Experiment.objects.all()
+        return experiment_list_response(request, experiments, view=self, paginate=True)
+
+def experiment_access_error(request, experiment):
+    """檢查實驗者是否可以修改該實驗記錄，沒有權限時回傳錯誤回應"""
+    if request.user.role not in ['experimenter', 'super_experimenter']:
+        return Response(
+            {"message": "只有實驗者可以上傳實驗檔案"},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    is_from_super_company = (request.user.company and 
+                           getattr(request.user.company, 'is_super_company', False)) or \
+                          request.user.role == 'super_experimenter'
+    if is_from_super_company:
+        return None
+    if not request.user.company:
+        return Response(
+            {"message": "您沒有關聯到任何公司"},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    if experiment.worker.company_id != request.user.company.id:
+        return Response(
+            {"message": "您只能上傳自己公司勞工的實驗檔案"},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    return None
+
+def upload_response(upload, status_code=status.HTTP_200_OK):
+    """分段上傳的狀態回應，並以 tus 標頭提供已接收的位元組數"""
+    response = Response(ChunkedUploadSerializer(upload).data, status=status_code)
+    response['Tus-Resumable'] = uploads.TUS_VERSION
+    response['Upload-Offset'] = str(upload.offset)
+    response['Upload-Length'] = str(upload.size)
+    response['Cache-Control'] = 'no-store'
+    if not upload.completed_at:
+        response['Upload-Expires'] = http_date(uploads.expires_at(upload).timestamp())
+    return response
+
+def upload_error_response(upload, error):
+    response = Response({"message": str(error)}, status=error.status)
+    response['Tus-Resumable'] = uploads.TUS_VERSION
+    response['Upload-Offset'] = str(upload.offset)
+    response['Cache-Control'] = 'no-store'
+    return response
+
+class ExperimentUploadCreateView(APIView):
+    """建立實驗檔案的分段上傳，大型檔案可分段送出並在斷線後續傳
+
+    欄位名稱、檔名與大小可放在 JSON 本文（file_field_name、filename、size），
+    或使用 tus 的 Upload-Length 與 Upload-Metadata 標頭
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request, experiment_id):
+        try:
+            experiment = Experiment.objects.select_related('worker').get(id=experiment_id)
+        except Experiment.DoesNotExist:
+            return Response(
+                {"message": "找不到該實驗記錄"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        error = experiment_access_error(request, experiment)
+        if error:
+            return error
+        
+        try:
+            metadata = uploads.parse_metadata(request.headers.get('Upload-Metadata'))
+            size = uploads.parse_size(request.data.get('size', request.headers.get('Upload-Length')), 'size')
+            upload = uploads.create_upload(
+                experiment,
+                request.user,
+                request.data.get('file_field_name') or metadata.get('file_field_name'),
+                request.data.get('filename') or metadata.get('filename'),
+                size
+            )
+            if upload.size == 0:
+                upload = uploads.finalize(upload)
+        except uploads.UploadError as e:
+            return Response({"message": str(e)}, status=e.status)
+        
+        response = upload_response(upload, status.HTTP_201_CREATED)
+        response['Location'] = request.build_absolute_uri(reverse('experiment-upload', args=[upload.id]))
+        return response
+
+class ExperimentUploadView(APIView):
+    """分段上傳：GET / HEAD 查詢已接收的位元組數，PATCH 由 Upload-Offset 位置寫入分段，DELETE 取消上傳
+
+    PATCH 的 Content-Type 須為 application/offset+octet-stream，本文直接寫入檔案，
+    最後一個分段送達時自動完成上傳並建立實驗檔案記錄
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get_upload(self, request, upload_id):
+        return ChunkedUpload.objects.filter(id=upload_id, user=request.user).first()
+    
+    def get(self, request, upload_id):
+        upload = self.get_upload(request, upload_id)
+        if upload is None:
+            return Response({"message": "找不到該上傳"}, status=status.HTTP_404_NOT_FOUND)
+        return upload_response(upload)
+    
+    def patch(self, request, upload_id):
+        upload = self.get_upload(request, upload_id)
+        if upload is None:
+            return Response({"message": "找不到該上傳"}, status=status.HTTP_404_NOT_FOUND)
+        
+        if request.content_type != uploads.CHUNK_CONTENT_TYPE:
+            return Response(
+                {"message": f"Content-Type 必須為 {uploads.CHUNK_CONTENT_TYPE}"},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+            )
+        
+        try:
+            offset = uploads.parse_size(request.headers.get('Upload-Offset'), 'Upload-Offset')
+            length = uploads.parse_size(request.headers.get('Content-Length'), 'Content-Length')
+            # 不讀取 request.data，以免 DRF 將整個分段載入記憶體
+            uploads.write_chunk(upload, offset, request.stream, length)
+            if upload.offset == upload.size:
+                upload = uploads.finalize(upload)
+        except uploads.UploadError as e:
+            return upload_error_response(upload, e)
+        
+        return upload_response(upload)
+    
+    def delete(self, request, upload_id):
+        upload = self.get_upload(request, upload_id)
+        if upload is None:
+            return Response({"message": "找不到該上傳"}, status=status.HTTP_404_NOT_FOUND)
+        
+        try:
+            uploads.discard(upload)
+        except uploads.UploadError as e:
+            return upload_error_response(upload, e)
+        
+        response = Response(status=status.HTTP_204_NO_CONTENT)
+        response['Tus-Resumable'] = uploads.TUS_VERSION
+        return response
+
+class ExperimentUploadFinalizeView(APIView):
+    """完成分段上傳並回傳更新後的實驗記錄（最後一個分段送達時已自動完成，可重複呼叫）"""
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request, upload_id):
+        upload = ChunkedUpload.objects.filter(id=upload_id, user=request.user).first()
+        if upload is None:
+            return Response({"message": "找不到該上傳"}, status=status.HTTP_404_NOT_FOUND)
+        
+        try:
+            upload = uploads.finalize(upload)
+        except uploads.UploadError as e:
+            return upload_error_response(upload, e)
+        
+        experiment = Experiment.objects.select_related('worker', 'experimenter').prefetch_related('files').get(
+            id=upload.experiment_id
+        )
+        return Response(ExperimentSerializer(experiment).data)
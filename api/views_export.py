@@ -0,0 +1,67 @@
+# backend/app/views_export.py
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from django.http import StreamingHttpResponse, FileResponse
+from django.utils import timezone
+from . import exports
+from .views_analytics import resolve_company, parse_date_range
+
+EXPORT_FILE_TYPES = ('csv', 'xlsx')
+
+
+class SubmissionExportView(APIView):
+    """匯出公司的表單提交記錄（CSV 或 XLSX），data 欄位攤平為多個欄位
+
+    篩選參數：company_id（僅超級角色）、start、end、form_type_id、stage；
+    檔案格式以 file_type 指定（DRF 保留了 format 參數）
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        company, error = resolve_company(request)
+        if error:
+            return error
+
+        file_type = request.query_params.get('file_type', 'csv')
+        if file_type not in EXPORT_FILE_TYPES:
+            return Response(
+                {"message": f"不支援的檔案格式: {file_type}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            start, end = parse_date_range(request)
+            form_type_id = self.optional_int(request, 'form_type_id')
+            stage = self.optional_int(request, 'stage')
+        except ValueError as e:
+            return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        submissions = exports.export_queryset(company.id, start, end, form_type_id, stage)
+        archived = exports.archived_source(company.id, start, end, form_type_id, stage)
+        filename = f"submissions_{company.code}_{timezone.localdate():%Y%m%d}.{file_type}"
+
+        if file_type == 'xlsx':
+            return FileResponse(
+                exports.write_xlsx(submissions, archived),
+                as_attachment=True,
+                filename=filename,
+                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            )
+
+        response = StreamingHttpResponse(
+            exports.stream_csv(submissions, archived),
+            content_type='text/csv; charset=utf-8'
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    def optional_int(self, request, name):
+        value = request.query_params.get(name)
+        if value in (None, ''):
+            return None
+        try:
+            return int(value)
+        except ValueError:
+            raise ValueError(f"無效的 {name} 參數: {value}")
@@ -8,37 +8,55 @@ from django.utils import timezone
 from django.shortcuts import get_object_or_404
 from .models import FormType, FormSubmission, Worker, Company
 from .serializers import FormTypeSerializer, FormSubmissionSerializer
+from . import reference_cache
+from .conditional import queryset_etag, make_etag, not_modified, with_validators, immutable
+from .pagination import list_payload
+from . import sync
+from . import bootstrap
+from . import ingest
+from . import batches
+from . import worker_tokens
+from . import form_schemas
+from .submissions import (
+    create_submissions, get_idempotency_key, run_idempotent, request_fingerprint,
+    IdempotencyKeyReused, IdempotencyKeyPending, IDEMPOTENCY_KEY_MAX_LENGTH
+)
 from rest_framework.permissions import AllowAny
 
 
+def form_types_response(request):
+    """表單類型列表，以參考資料版本作為 ETag"""
+    etag = make_etag(request, reference_cache.current_version())
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
+    serializer = FormTypeSerializer(reference_cache.get_form_types(), many=True)
+    return with_validators(Response(serializer.data), etag)
+
 class FormTypeListView(APIView):
     """獲取所有表單類型"""
     
     def get(self, request):
-        form_types = FormType.objects.all()
-        serializer = FormTypeSerializer(form_types, many=True)
-        return Response(serializer.data)
+        return form_types_response(request)
 
 @api_view(['GET'])
 def get_worker_forms(request, worker_id):
     """獲取勞工應填寫的表單類型"""
     try:
-        worker = Worker.objects.get(id=worker_id)
-        
-        # 計算該勞工已填寫的次數
-        submission_count = FormSubmission.objects.filter(
-            worker=worker
-        ).values('submission_count').order_by('-submission_count').first()
+        worker = Worker.objects.select_related('batch').get(id=worker_id)
         
-        current_count = 0 if submission_count is None else submission_count['submission_count']
+        # 該勞工目前的批次（尚未填寫過為 0）
+        current_count = batches.current_batch(worker)
         
         # 根據填寫次數決定應顯示哪些表單
+        form_types = reference_cache.get_form_types()
         if current_count == 0:
             # 首次填寫，顯示所有表單
-            forms_to_show = FormType.objects.filter(is_required_first_time=True)
+            forms_to_show = [form_type for form_type in form_types if form_type.is_required_first_time]
         else:
             # 後續填寫，只顯示部分表單
-            forms_to_show = FormType.objects.filter(is_required_subsequent=True)
+            forms_to_show = [form_type for form_type in form_types if form_type.is_required_subsequent]
         
         return Response({
             'submissionCount': current_count,
@@ -47,6 +65,46 @@ def get_worker_forms(request, worker_id):
     except Worker.DoesNotExist:
         return Response({'error': '找不到該勞工'}, status=404)
 
+def idempotent_response(payload, replayed):
+    """組成提交回應，重送時加上標頭讓用戶端知道未產生新記錄"""
+    response = Response(payload, status=202 if payload.get('queued') else 200)
+    if replayed:
+        response['Idempotent-Replayed'] = 'true'
+    return response
+
+def idempotency_conflict_response():
+    return Response({'error': '此冪等鍵已用於內容不同的請求'}, status=422)
+
+def idempotency_pending_response():
+    return Response({'error': '相同冪等鍵的請求仍在處理中，請稍後重試'}, status=409)
+
+def queued_payload(receipt_id, submission_count, stage):
+    """佇列模式的提交回應；實際寫入結果以收據 ID 查詢"""
+    return {
+        'success': True,
+        'queued': True,
+        'status': ingest.STATUS_QUEUED,
+        'receipt_id': receipt_id,
+        'submission_count': submission_count,
+        'stage': stage
+    }
+
+def submission_params(data):
+    """解析提交的批次、時段與階段參數，回傳 (submission_count, time_segment, stage)
+
+    皆須為整數（批次與時段從 1 起算、階段從 0 起算），未指定批次時為 None；格式錯誤時拋出 ValueError
+    """
+    submission_count = data.get('submission_count')
+    try:
+        submission_count = None if submission_count in (None, '') else int(submission_count)
+        time_segment = int(data.get('time_segment', 1))
+        stage = int(data.get('stage', 0))
+    except (TypeError, ValueError):
+        raise ValueError('批次、時段與階段必須為整數')
+    if (submission_count is not None and submission_count < 1) or time_segment < 1 or stage < 0:
+        raise ValueError('批次、時段或階段超出範圍')
+    return submission_count, time_segment, stage
+
 @api_view(['POST'])
 @permission_classes([AllowAny])  
 def submit_form(request):
@@ -54,59 +112,183 @@ def submit_form(request):
     worker_id = request.data.get('worker_id')
     form_type_id = request.data.get('form_type_id')
     form_data = request.data.get('form_data')
-    submission_count = request.data.get('submission_count', 1)
-    time_segment = int(request.data.get('time_segment', 1))
-    stage = request.data.get('stage', 0)  # 新增對階段參數的處理
+    idempotency_key = get_idempotency_key(request)
     
     if not all([worker_id, form_type_id, form_data]):
         return Response({'error': '缺少必要參數'}, status=400)
     
     try:
-        worker = Worker.objects.get(id=worker_id)
-        form_type = FormType.objects.get(id=form_type_id)
-    except Worker.DoesNotExist:
-        return Response({'error': '找不到該勞工'}, status=404)
-    except FormType.DoesNotExist:
+        submission_count, time_segment, stage = submission_params(request.data)  # 含階段參數
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+    
+    if idempotency_key and len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        return Response({'error': '冪等鍵過長'}, status=400)
+    
+    form_type = reference_cache.get_form_type(form_type_id)
+    if form_type is None:
         return Response({'error': '找不到該表單類型'}, status=404)
     
-    # 檢查是否已存在相同的提交記錄
-    existing_submission = FormSubmission.objects.filter(
-        worker=worker,
-        form_type=form_type,
-        submission_count=submission_count,
-        time_segment=time_segment,
-        stage=stage  # 新增階段條件
-    ).first()
-    
-    if existing_submission:
-        # 找出當前最大的時段數字
-        max_segment = FormSubmission.objects.filter(
-            worker=worker,
-            form_type=form_type,
-            submission_count=submission_count,
-            stage=stage  # 新增階段條件
-        ).order_by('-time_segment').values_list('time_segment', flat=True).first() or 0
-        
-        # 使用下一個時段數字
-        time_segment = max_segment + 1
-    
-    # 創建新的提交記錄
-    submission = FormSubmission.objects.create(
-        worker=worker,
-        form_type=form_type,
-        submission_count=submission_count,
-        time_segment=time_segment,
-        stage=stage,  # 新增階段字段
-        data=form_data
-    )
-    
-    return Response({
-        'success': True, 
-        'submission_id': submission.id,
+    errors = form_schemas.errors_for(form_type, form_data)
+    if errors:
+        return Response({
+            'error': '表單資料格式錯誤',
+            'schema_version': form_type.schema_version,
+            'errors': errors
+        }, status=400)
+    
+    try:
+        worker = Worker.objects.select_related('batch').get(id=worker_id)
+    except (Worker.DoesNotExist, ValueError, TypeError):
+        return Response({'error': '找不到該勞工'}, status=404)
+    
+    # 以用戶端送出的原始內容計算雜湊，重試時批次預設值改變也不影響比對
+    request_hash = request_fingerprint('submit_form', worker.id, {
+        'form_type_id': form_type.id,
+        'form_data': form_data,
         'submission_count': submission_count,
         'time_segment': time_segment,
-        'stage': stage  # 返回階段信息
+        'stage': stage,
     })
+    
+    # 未指定批次時使用勞工目前的批次
+    if submission_count is None:
+        submission_count = batches.current_batch(worker) or 1
+    
+    def enqueue():
+        receipt_id = ingest.enqueue(worker, submission_count, stage, time_segment, [(form_type, form_data)])
+        return queued_payload(receipt_id, submission_count, stage)
+    
+    def create():
+        # 分配時段並創建新的提交記錄（相同時段已存在時自動使用下一個時段）
+        submission = create_submissions(
+            worker, submission_count, stage, time_segment, [(form_type, form_data)]
+        )[0]
+        return {
+            'success': True, 
+            'submission_id': submission.id,
+            'submission_count': submission_count,
+            'time_segment': submission.time_segment,
+            'stage': stage  # 返回階段信息
+        }
+    
+    try:
+        payload, replayed = run_idempotent(
+            idempotency_key, enqueue if ingest.queue_enabled() else create, worker, request_hash,
+            claim_first=ingest.queue_enabled()
+        )
+    except IdempotencyKeyReused:
+        return idempotency_conflict_response()
+    except IdempotencyKeyPending:
+        return idempotency_pending_response()
+    return idempotent_response(payload, replayed)
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def submit_stage_forms(request):
+    """一次提交同一階段的所有表單數據"""
+    worker_id = request.data.get('worker_id')
+    forms = request.data.get('forms')
+    idempotency_key = get_idempotency_key(request)
+    
+    if not worker_id or not isinstance(forms, list) or not forms:
+        return Response({'error': '缺少必要參數'}, status=400)
+    
+    try:
+        submission_count, time_segment, stage = submission_params(request.data)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+    
+    if idempotency_key and len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        return Response({'error': '冪等鍵過長'}, status=400)
+    
+    # 先驗證所有表單，任何一筆有誤就整批拒絕
+    form_type_ids = []
+    for index, form in enumerate(forms):
+        if not isinstance(form, dict) or not form.get('form_type_id') or not form.get('form_data'):
+            return Response({'error': f'第 {index + 1} 筆表單缺少必要參數'}, status=400)
+        try:
+            form_type_ids.append(int(form['form_type_id']))
+        except (TypeError, ValueError):
+            return Response({'error': f'第 {index + 1} 筆表單類型無效'}, status=400)
+    
+    if len(set(form_type_ids)) != len(form_type_ids):
+        return Response({'error': '同一批次中不可重複提交相同的表單類型'}, status=400)
+    
+    try:
+        worker = Worker.objects.select_related('batch').get(id=worker_id)
+    except (Worker.DoesNotExist, ValueError, TypeError):
+        return Response({'error': '找不到該勞工'}, status=404)
+    
+    request_hash = request_fingerprint('submit_stage_forms', worker.id, {
+        'forms': [[form_type_id, form['form_data']] for form_type_id, form in zip(form_type_ids, forms)],
+        'submission_count': submission_count,
+        'time_segment': time_segment,
+        'stage': stage,
+    })
+    
+    # 未指定批次時使用勞工目前的批次
+    if submission_count is None:
+        submission_count = batches.current_batch(worker) or 1
+    
+    form_types = reference_cache.get_form_types_by_ids(form_type_ids)
+    missing = [form_type_id for form_type_id in form_type_ids if form_type_id not in form_types]
+    if missing:
+        return Response({'error': '找不到該表單類型', 'form_type_ids': missing}, status=404)
+    
+    stage_forms = [(form_types[form_type_id], form['form_data']) for form_type_id, form in zip(form_type_ids, forms)]
+    
+    invalid = []
+    for form_type, form_data in stage_forms:
+        errors = form_schemas.errors_for(form_type, form_data)
+        if errors:
+            invalid.append({
+                'form_type_id': form_type.id,
+                'schema_version': form_type.schema_version,
+                'errors': errors
+            })
+    if invalid:
+        return Response({'error': '表單資料格式錯誤', 'forms': invalid}, status=400)
+    
+    def enqueue():
+        receipt_id = ingest.enqueue(worker, submission_count, stage, time_segment, stage_forms)
+        return queued_payload(receipt_id, submission_count, stage)
+    
+    def create():
+        submissions = create_submissions(worker, submission_count, stage, time_segment, stage_forms)
+        return {
+            'success': True,
+            'submission_count': submission_count,
+            'stage': stage,
+            'submissions': [
+                {
+                    'submission_id': submission.id,
+                    'form_type_id': submission.form_type_id,
+                    'time_segment': submission.time_segment
+                }
+                for submission in submissions
+            ]
+        }
+    
+    try:
+        payload, replayed = run_idempotent(
+            idempotency_key, enqueue if ingest.queue_enabled() else create, worker, request_hash,
+            claim_first=ingest.queue_enabled()
+        )
+    except IdempotencyKeyReused:
+        return idempotency_conflict_response()
+    except IdempotencyKeyPending:
+        return idempotency_pending_response()
+    return idempotent_response(payload, replayed)
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def public_submission_receipt(request, receipt_id):
+    """查詢佇列提交的寫入結果（queued / done / failed）"""
+    receipt = ingest.get_receipt(receipt_id)
+    if receipt is None:
+        return Response({'error': '找不到該收據'}, status=404)
+    return Response({'receipt_id': receipt_id, **receipt})
 
 class WorkerSubmissionsView(APIView):
     """獲取勞工所有表單提交記錄，需要認證"""
@@ -125,53 +307,125 @@ class WorkerSubmissionsView(APIView):
         worker = get_object_or_404(Worker, id=worker_id, company=company)
         
         # 獲取所有提交記錄
-        submissions = FormSubmission.objects.filter(worker=worker).order_by('-submission_time')
-        serializer = FormSubmissionSerializer(submissions, many=True)
+        submissions = FormSubmission.objects.filter(worker=worker)
         
-        return Response(serializer.data)
+        etag = queryset_etag(
+            request, submissions, 'submission_time', worker.updated_at, reference_cache.current_version()
+        )
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+        
+        data = list_payload(
+            request,
+            submissions.select_related('worker', 'form_type'),
+            ('-submission_time', '-id'),
+            lambda rows: FormSubmissionSerializer(rows, many=True).data,
+            view=self
+        )
+        return with_validators(Response(data), etag)
     
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def public_form_types(request):
     """公開獲取所有表單類型"""
-    form_types = FormType.objects.all()
-    serializer = FormTypeSerializer(form_types, many=True)
-    return Response(serializer.data)
+    return form_types_response(request)
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def public_form_type_schema(request, form_type_id, schema_hash):
+    """表單類型的 JSON Schema；網址含內容雜湊，回應可永久快取"""
+    form_type = reference_cache.get_form_type(form_type_id)
+    if form_type is None:
+        return Response({'error': '找不到該表單類型'}, status=404)
+    
+    # 只提供目前版本的 schema，舊雜湊回傳目前的網址讓用戶端重新取得
+    if schema_hash != form_type.schema_hash:
+        return Response({
+            'error': '表單定義已更新',
+            'schema_version': form_type.schema_version,
+            'schema_url': FormTypeSerializer(form_type).data['schema_url']
+        }, status=404)
+    
+    etag = f'"{form_type.schema_hash}"'
+    if request.headers.get('If-None-Match') == etag:
+        return immutable(Response(status=304), etag)
+    return immutable(Response(form_type.schema), etag)
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def public_worker_submissions(request):
-    """公開獲取勞工的表單提交記錄"""
-    worker_code = request.query_params.get('worker_code')
-    company_code = request.query_params.get('company_code')
+    """公開獲取勞工的表單提交記錄
+
+    帶 since 參數時只回傳該時間之後新增或更新的記錄（依 updated_at，含匯入的歷史資料與佇列延後寫入的記錄）
+    與已刪除的記錄 ID；完整資料的回應以 X-Sync-Since 標頭提供第一次的 since 游標。
+    以 token 識別勞工時不需查詢勞工資料
+    """
+    since = request.query_params.get('since')
     
-    if not worker_code or not company_code:
-        return Response({'error': '缺少必要參數'}, status=400)
+    try:
+        ref = worker_tokens.resolve(request.query_params)
+    except worker_tokens.WorkerRefError as e:
+        return Response({'error': e.message}, status=e.status)
     
+    if since:
+        try:
+            since = sync.parse_since(since)
+        except ValueError:
+            return Response({'error': '無效的 since 參數'}, status=400)
+        if sync.cursor_expired(since):
+            return Response({'error': 'since 游標已過期，請重新取得完整資料'}, status=410)
+    
+    worker_id = ref.worker_id
+    if worker_id is None:
+        try:
+            worker_id = worker_tokens.get_worker(ref).id
+        except Worker.DoesNotExist:
+            return Response({'error': '找不到該勞工'}, status=404)
+    
+    submissions = FormSubmission.objects.filter(worker_id=worker_id).order_by('-submission_time')
+    started_at = timezone.now()
+    
+    # 增量模式：只回傳 since 之後新增或更新的記錄與墓碑
+    if since:
+        return Response({
+            'submissions': sync.submission_rows(submissions.filter(updated_at__gt=since)),
+            'deleted': sync.deleted_ids('formsubmission', since, [worker_id]),
+            'since': sync.next_cursor(started_at)
+        })
+    
+    etag = queryset_etag(request, submissions, 'updated_at')
+    cached = not_modified(request, etag)
+    if cached:
+        return sync.with_cursor(cached, started_at)
+    
+    # 格式化為前端需要的結構
+    return sync.with_cursor(with_validators(Response(sync.submission_rows(submissions)), etag), started_at)
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def public_form_bootstrap(request):
+    """表單頁啟動資料：勞工、應填表單、目前批次與階段、今日完成狀態，一次回傳
+
+    快取到勞工下一次提交或下一次階段切換為止，未變動時回傳 304；
+    可用 token 或 company_code + worker_code 識別勞工
+    """
     try:
-        company = Company.objects.get(code=company_code)
-        worker = Worker.objects.get(code=worker_code, company=company)
-        
-        # 獲取所有提交記錄
-        submissions = FormSubmission.objects.filter(worker=worker).order_by('-submission_time')
-        
-        # 格式化為前端需要的結構
-        result = []
-        for sub in submissions:
-            result.append({
-                'id': sub.id,
-                'worker_id': sub.worker.id,
-                'form_type_id': sub.form_type.id,
-                'submission_count': sub.submission_count,
-                'time_segment': sub.time_segment,
-                'stage': sub.stage,  # 新增返回階段信息
-                'submission_time': sub.submission_time.isoformat()
-            })
-        
-        return Response(result)
-        
-    except Company.DoesNotExist:
-        return Response({'error': '找不到該公司'}, status=404)
+        ref = worker_tokens.resolve(request.query_params)
+    except worker_tokens.WorkerRefError as e:
+        return Response({'error': e.message}, status=e.status)
+    
+    try:
+        payload, version = bootstrap.get_bootstrap(ref.company, ref.worker_code)
     except Worker.DoesNotExist:
-        return Response({'error': '找不到該勞工'}, status=404)
\ No newline at end of file
+        return Response({'error': '找不到該勞工'}, status=404)
+    # 權杖簽發後勞工被刪除、代碼又配給新勞工時不可沿用
+    if ref.worker_id is not None and payload['worker']['id'] != ref.worker_id:
+        return Response({'error': '找不到該勞工'}, status=404)
+    
+    etag = make_etag(request, version)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    return with_validators(Response(payload), etag)
@@ -0,0 +1,56 @@
+# backend/app/views_import.py
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.parsers import MultiPartParser, FormParser
+from . import imports
+from .views_analytics import resolve_company
+
+IMPORT_ROLES = ['owner', 'admin', 'superadmin', 'super_experimenter']
+
+
+def is_truthy(value):
+    return str(value).lower() in ('1', 'true', 'yes', 'on')
+
+
+class SubmissionImportView(APIView):
+    """匯入歷史表單資料（CSV 或 XLSX），回傳逐列的錯誤報告
+
+    上傳欄位為 file；dry_run=true 時只驗證不寫入；
+    超級角色以 ?company_id= 指定匯入的公司
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser, FormParser]
+
+    def post(self, request):
+        if request.user.role not in IMPORT_ROLES:
+            return Response(
+                {"message": "只有公司管理員或老闆可以匯入資料"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        company, error = resolve_company(request)
+        if error:
+            return error
+
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response({"message": "請上傳檔案"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            report = imports.import_submissions(
+                company,
+                upload.file,
+                upload.name,
+                dry_run=is_truthy(request.data.get('dry_run'))
+            )
+        except imports.ImportFormatError as e:
+            return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response(
+                {"message": f"匯入資料時發生錯誤: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        return Response({'company_id': company.id, **report})
@@ -6,20 +6,21 @@ from django.conf import settings
 from datetime import timedelta
 from .models import Worker, FormSubmission, LineUserBinding, Company, ReminderLog
 from .line_bot_handler import LineBotService
+from . import reference_cache
+from . import worker_tokens
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def check_worker_status_api(request):
-    """API 端點：檢查勞工填寫狀態（供 LINE Bot 使用）"""
-    worker_code = request.GET.get('worker_code')
-    company_code = request.GET.get('company_code')
-    
-    if not worker_code or not company_code:
-        return Response({'error': '缺少必要參數'}, status=400)
+    """API 端點：檢查勞工填寫狀態（供 LINE Bot 使用，以 token 或 company_code + worker_code 識別）"""
+    try:
+        ref = worker_tokens.resolve(request.GET)
+    except worker_tokens.WorkerRefError as e:
+        return Response({'error': e.message}, status=e.status)
     
     try:
-        company = Company.objects.get(code=company_code)
-        worker = Worker.objects.get(code=worker_code, company=company)
+        company = ref.company
+        worker = worker_tokens.get_worker(ref, Worker.objects.select_related('batch', 'stats'))
         
         line_service = LineBotService()
         status_info = line_service.get_worker_status_detailed(worker)
@@ -30,7 +31,7 @@ def check_worker_status_api(request):
             'status': status_info
         })
         
-    except (Company.DoesNotExist, Worker.DoesNotExist):
+    except Worker.DoesNotExist:
         return Response({'error': '勞工或公司不存在'}, status=404)
 
 @api_view(['POST'])
@@ -82,7 +83,7 @@ def test_line_reminder(request):
             bindings = LineUserBinding.objects.filter(is_active=True)
             for binding in bindings:
                 try:
-                    form_url = f"{settings.FRONTEND_URL}/form?worker_code={binding.worker.code}&company_code={binding.worker.company.code}"
+                    form_url = worker_tokens.build_form_url(binding.worker)
                     flex_message = line_service.create_form_flex_message(binding.worker, form_url)
                     line_service.line_bot_api.push_message(binding.line_user_id, flex_message)
                     sent_count += 1
@@ -99,12 +100,12 @@ def test_line_reminder(request):
             if not worker_code or not company_code:
                 return Response({'error': '缺少 worker_code 或 company_code'}, status=400)
             
-            company = Company.objects.get(code=company_code)
+            company = reference_cache.require_company_by_code(company_code)
             worker = Worker.objects.get(code=worker_code, company=company)
             binding = LineUserBinding.objects.get(worker=worker, is_active=True)
             
             line_service = LineBotService()
-            form_url = f"{settings.FRONTEND_URL}/form?worker_code={worker.code}&company_code={worker.company.code}"
+            form_url = worker_tokens.build_form_url(worker)
             flex_message = line_service.create_form_flex_message(worker, form_url)
             line_service.line_bot_api.push_message(binding.line_user_id, flex_message)
             
@@ -189,7 +190,7 @@ def test_specific_worker_reminder(request):
         return Response({'error': '缺少必要參數'}, status=400)
     
     try:
-        company = Company.objects.get(code=company_code)
+        company = reference_cache.require_company_by_code(company_code)
         worker = Worker.objects.get(code=worker_code, company=company)
         
         # 檢查綁定狀態
@@ -207,7 +208,7 @@ def test_specific_worker_reminder(request):
         if reminder_check['needs_reminder']:
             # 生成表單連結並發送
             from django.conf import settings
-            form_url = f"{settings.FRONTEND_URL}/form?worker_code={worker.code}&company_code={worker.company.code}"
+            form_url = worker_tokens.build_form_url(worker)
             flex_message = line_service.create_form_flex_message(worker, form_url)
             line_service.line_bot_api.push_message(binding.line_user_id, flex_message)
             
@@ -249,7 +250,7 @@ def test_line_reminder(request):
             for binding in bindings:
                 try:
                     from django.conf import settings
-                    form_url = f"{settings.FRONTEND_URL}/form?worker_code={binding.worker.code}&company_code={binding.worker.company.code}"
+                    form_url = worker_tokens.build_form_url(binding.worker)
                     flex_message = line_service.create_form_flex_message(binding.worker, form_url)
                     line_service.line_bot_api.push_message(binding.line_user_id, flex_message)
                     sent_count += 1
@@ -266,13 +267,13 @@ def test_line_reminder(request):
             if not worker_code or not company_code:
                 return Response({'error': '缺少 worker_code 或 company_code'}, status=400)
             
-            company = Company.objects.get(code=company_code)
+            company = reference_cache.require_company_by_code(company_code)
             worker = Worker.objects.get(code=worker_code, company=company)
             binding = LineUserBinding.objects.get(worker=worker, is_active=True)
             
             line_service = LineBotService()
             from django.conf import settings
-            form_url = f"{settings.FRONTEND_URL}/form?worker_code={worker.code}&company_code={worker.company.code}"
+            form_url = worker_tokens.build_form_url(worker)
             flex_message = line_service.create_form_flex_message(worker, form_url)
             line_service.line_bot_api.push_message(binding.line_user_id, flex_message)
             
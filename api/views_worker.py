@@ -3,15 +3,34 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.parsers import MultiPartParser, FormParser
 from django.db import transaction
 from rest_framework.decorators import api_view, permission_classes
 from django.shortcuts import get_object_or_404
 from .models import Company, Worker, Experiment, FormSubmission, ExperimentFile  # 新增導入 Experiment 和 FormSubmission
 from .serializers import WorkerSerializer
+from . import reference_cache
+from .conditional import queryset_etag, not_modified, with_validators
+from .pagination import list_payload
+from .imports import ImportFormatError
+from . import roster
+from . import worker_tokens
+from . import worker_stats
+from .submissions import delete_worker_submissions
+from .views_analytics import CROSS_COMPANY_ROLES
 
 class WorkerListView(APIView):
     permission_classes = [IsAuthenticated]
     
+    def list_response(self, request, workers, serialize):
+        """勞工列表回應（依 ID 分頁），勞工或公司資料未變動時回傳 304"""
+        etag = queryset_etag(request, workers, 'updated_at', reference_cache.current_version())
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+        data = list_payload(request, workers, ('id',), serialize, view=self)
+        return with_validators(Response(data), etag)
+    
     def get(self, request, company_id=None):
         try:
             # 檢查用戶是否為超級實驗者
@@ -19,27 +38,26 @@ class WorkerListView(APIView):
             
             # 如果是超級實驗者且沒有指定 company_id，返回所有勞工
             if is_super_experimenter and company_id is None:
-                workers = Worker.objects.all()
-                serializer = WorkerSerializer(workers, many=True)
-                return Response(serializer.data)
+                workers = Worker.objects.select_related('company')
+                return self.list_response(
+                    request, workers, lambda rows: WorkerSerializer(rows, many=True).data
+                )
             
             # 如果沒有提供 company_id，使用用戶的公司
             if company_id is None:
                 if is_super_experimenter:
                     # 超級實驗者可以看到所有公司
-                    companies = Company.objects.all()
-                    data = []
-                    for company in companies:
-                        workers = Worker.objects.filter(company=company)
-                        for worker in workers:
-                            data.append({
-                                'id': worker.id,
-                                'name': worker.name,
-                                'code': worker.code,
-                                'company': company.id,
-                                'company_name': company.name
-                            })
-                    return Response(data)
+                    workers = Worker.objects.select_related('company')
+                    return self.list_response(request, workers, lambda rows: [
+                        {
+                            'id': worker.id,
+                            'name': worker.name,
+                            'code': worker.code,
+                            'company': worker.company.id,
+                            'company_name': worker.company.name
+                        }
+                        for worker in rows
+                    ])
                 else:
                     company = request.user.company
                     if not company:
@@ -57,9 +75,10 @@ class WorkerListView(APIView):
                     status=status.HTTP_403_FORBIDDEN
                 )
             
-            workers = Worker.objects.filter(company=company)
-            serializer = WorkerSerializer(workers, many=True)
-            return Response(serializer.data)
+            workers = Worker.objects.filter(company=company).select_related('company')
+            return self.list_response(
+                request, workers, lambda rows: WorkerSerializer(rows, many=True).data
+            )
             
         except Company.DoesNotExist:
             return Response(
@@ -104,6 +123,49 @@ class WorkerCreateView(APIView):
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class WorkerRosterImportView(APIView):
+    """以名冊檔案（CSV 或 XLSX，欄位 code、name）批次新增、更名或移除勞工，僅公司管理員可用
+
+    remove_missing=true 時移除名冊中沒有且無任何資料記錄的勞工；dry_run=true 時只回傳差異
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser, FormParser]
+    
+    def post(self, request):
+        # 檢查用戶是否為公司管理員或老闆
+        if request.user.role not in ['owner', 'admin']:
+            return Response(
+                {"message": "只有公司管理員或老闆可以匯入勞工名冊"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        # 獲取公司
+        company = request.user.company
+        if not company:
+            return Response(
+                {"message": "您沒有關聯到任何公司"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response({"message": "請上傳名冊檔案"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            summary = roster.sync_roster(
+                company,
+                upload.file,
+                upload.name,
+                remove_missing=str(request.data.get('remove_missing')).lower() in ('1', 'true', 'yes'),
+                dry_run=str(request.data.get('dry_run')).lower() in ('1', 'true', 'yes')
+            )
+        except ImportFormatError as e:
+            return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if summary['errors']:
+            return Response(summary, status=status.HTTP_400_BAD_REQUEST)
+        return Response(summary, status=status.HTTP_200_OK)
+
 class WorkerDetailView(APIView):
     """獲取、更新或刪除特定勞工，僅公司管理員可用"""
     
@@ -118,18 +180,29 @@ class WorkerDetailView(APIView):
         return []
 
     def get(self, request, worker_id):
-        """獲取特定勞工資訊，用於表單頁面"""
-        company_code = request.query_params.get('company_code')
-        if not company_code:
-            return Response(
-                {"message": "缺少必要參數"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        """獲取特定勞工資訊，用於表單頁面（以 token 或 company_code 識別）"""
+        token = request.query_params.get(worker_tokens.TOKEN_PARAM)
+        if token:
+            try:
+                token_worker_id, company_id, _ = worker_tokens.verify(token)
+            except worker_tokens.WorkerRefError as e:
+                return Response({"message": e.message}, status=e.status)
+            if token_worker_id != worker_id:
+                return Response(
+                    {"message": "連結與勞工不符"},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            company = reference_cache.get_company(company_id)
+        else:
+            company_code = request.query_params.get('company_code')
+            if not company_code:
+                return Response(
+                    {"message": "缺少必要參數"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            company = reference_cache.get_company_by_code(company_code)
         
-        # 獲取公司
-        try:
-            company = Company.objects.get(code=company_code)
-        except Company.DoesNotExist:
+        if company is None:
             return Response(
                 {"message": "公司代碼不存在"},
                 status=status.HTTP_404_NOT_FOUND
@@ -159,21 +232,20 @@ class WorkerDetailView(APIView):
         
         # 獲取勞工
         try:
-            worker = Worker.objects.get(id=worker_id, company=company)
+            worker = Worker.objects.select_related('stats').get(id=worker_id, company=company)
         except Worker.DoesNotExist:
             return Response(
                 {"message": "找不到該勞工或您沒有權限操作"},
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        # 檢查勞工是否有相關的實驗記錄或表單提交記錄
-        experiment_count = Experiment.objects.filter(worker=worker).count()
-        form_submission_count = FormSubmission.objects.filter(worker=worker).count()
+        # 檢查勞工是否有相關的實驗記錄或表單提交記錄（含已封存的提交）
+        stats = worker_stats.get_stats(worker)
         
         worker_name = worker.name
         
         # 如果有相關資料，先返回400讓前端確認
-        if experiment_count > 0 or form_submission_count > 0:
+        if stats.has_data:
             return Response(
                 {"message": "該勞工有相關資料記錄"},
                 status=status.HTTP_400_BAD_REQUEST
@@ -192,27 +264,15 @@ class WorkerByCodeView(APIView):
     permission_classes = [] # 不需要認證
     
     def get(self, request):
-        worker_code = request.query_params.get('worker_code')
-        company_code = request.query_params.get('company_code')
-        
-        if not worker_code or not company_code:
-            return Response(
-                {"message": "缺少必要參數"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # 獲取公司
+        # 以 token 或 company_code + worker_code 識別勞工
         try:
-            company = Company.objects.get(code=company_code)
-        except Company.DoesNotExist:
-            return Response(
-                {"message": "公司代碼不存在"},
-                status=status.HTTP_404_NOT_FOUND
-            )
+            ref = worker_tokens.resolve(request.query_params)
+        except worker_tokens.WorkerRefError as e:
+            return Response({"message": e.message}, status=e.status)
         
         # 獲取勞工
         try:
-            worker = Worker.objects.get(code=worker_code, company=company)
+            worker = worker_tokens.get_worker(ref)
             serializer = WorkerSerializer(worker)
             return Response(serializer.data)
         except Worker.DoesNotExist:
@@ -222,6 +282,36 @@ class WorkerByCodeView(APIView):
             )
 
 
+class WorkerFormLinkView(APIView):
+    """產生勞工的表單連結（含簽章權杖），供列印 QR code 或手動傳送"""
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, worker_id):
+        workers = Worker.objects.select_related('company')
+        if request.user.role not in CROSS_COMPANY_ROLES:
+            if not request.user.company:
+                return Response(
+                    {"message": "您沒有關聯到任何公司"},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            workers = workers.filter(company=request.user.company)
+        
+        try:
+            worker = workers.get(id=worker_id)
+        except Worker.DoesNotExist:
+            return Response(
+                {"message": "找不到該勞工或您沒有權限操作"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        return Response({
+            'worker_id': worker.id,
+            'token': worker_tokens.issue(worker),
+            'url': worker_tokens.build_form_url(worker),
+            'expires_at': worker_tokens.expires_at()
+        })
+
+
 class WorkerForceDeleteView(APIView):
     """強制刪除勞工及其所有相關資料"""
     permission_classes = [IsAuthenticated]
@@ -268,8 +358,8 @@ class WorkerForceDeleteView(APIView):
                 # 刪除實驗記錄（這會連帶刪除實驗檔案記錄）
                 Experiment.objects.filter(worker=worker).delete()
                 
-                # 刪除表單提交記錄
-                FormSubmission.objects.filter(worker=worker).delete()
+                # 刪除表單提交記錄（以 SQL 分批刪除，不逐筆載入）
+                delete_worker_submissions([worker.id])
                 
                 # 最後刪除勞工
                 worker.delete()
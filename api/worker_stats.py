@@ -0,0 +1,155 @@
+# backend/app/worker_stats.py
+"""勞工活動統計（WorkerStats）
+
+提交與實驗記錄建立、刪除時以 F() 運算式在資料庫中原子更新計數，
+刪除勞工前的檢查、名冊同步與 LINE 統計只需一次主鍵查詢，不必對提交資料表 COUNT。
+各批次提交數為 JSON 欄位，在 select_for_update 鎖定統計列後更新。
+封存只是搬移記錄，不會改變統計；繞過模型訊號的刪除（重複清理）會重建受影響勞工的統計，
+計數若有偏差可用 repair_worker_stats 指令由資料表與封存檔重新計算。
+"""
+from collections import Counter
+from django.db import transaction
+from django.db.models import Count, DateTimeField, F, Max, Min, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+from .models import Experiment, FormSubmission, Worker, WorkerStats
+from . import archive
+
+
+def get_stats(worker):
+    """取得勞工的活動統計；尚無記錄時回傳未存檔的空統計"""
+    try:
+        return worker.stats
+    except WorkerStats.DoesNotExist:
+        return WorkerStats(worker=worker)
+
+
+def _earliest(field, value):
+    value = Value(value, output_field=DateTimeField())
+    return Least(Coalesce(F(field), value), value)
+
+
+def _latest(field, value):
+    value = Value(value, output_field=DateTimeField())
+    return Greatest(Coalesce(F(field), value), value)
+
+
+def record_submissions(worker_id, submissions):
+    """以同一勞工新建立的提交更新統計"""
+    if not submissions:
+        return
+    per_batch = Counter(str(submission.submission_count) for submission in submissions)
+    times = [submission.submission_time for submission in submissions]
+    # 提交時已在交易中，不需要另外建立 savepoint
+    with transaction.atomic(savepoint=False):
+        stats, _ = WorkerStats.objects.select_for_update().get_or_create(worker_id=worker_id)
+        batch_counts = dict(stats.batch_counts)
+        for batch, count in per_batch.items():
+            batch_counts[batch] = batch_counts.get(batch, 0) + count
+        WorkerStats.objects.filter(pk=stats.pk).update(
+            submission_total=F('submission_total') + len(submissions),
+            batch_counts=batch_counts,
+            first_submission_at=_earliest('first_submission_at', min(times)),
+            last_submission_at=_latest('last_submission_at', max(times))
+        )
+
+
+def record_submission_deleted(submission):
+    """單筆提交刪除後遞減統計；勞工本身被刪除時統計列可能已不存在，不重新建立"""
+    with transaction.atomic():
+        stats = WorkerStats.objects.select_for_update().filter(worker_id=submission.worker_id).first()
+        if stats is None:
+            return
+        batch = str(submission.submission_count)
+        batch_counts = dict(stats.batch_counts)
+        if batch_counts.get(batch, 0) > 1:
+            batch_counts[batch] -= 1
+        else:
+            batch_counts.pop(batch, None)
+        changes = {
+            'submission_total': F('submission_total') - 1,
+            'batch_counts': batch_counts,
+        }
+        # 刪除的是第一筆或最後一筆時，由尚未封存的記錄重新取得時間（以 worker 索引查詢）
+        if submission.submission_time in (stats.first_submission_at, stats.last_submission_at):
+            bounds = FormSubmission.objects.filter(worker_id=submission.worker_id).aggregate(
+                first=Min('submission_time'), last=Max('submission_time')
+            )
+            if submission.submission_time == stats.first_submission_at:
+                changes['first_submission_at'] = bounds['first']
+            if submission.submission_time == stats.last_submission_at:
+                changes['last_submission_at'] = bounds['last']
+        WorkerStats.objects.filter(pk=stats.pk).update(**changes)
+
+
+def record_experiment(worker_id, delta):
+    """實驗記錄建立（+1）或刪除（-1）時更新統計"""
+    updated = WorkerStats.objects.filter(worker_id=worker_id).update(
+        experiment_count=F('experiment_count') + delta
+    )
+    if not updated and delta > 0:
+        stats, created = WorkerStats.objects.get_or_create(
+            worker_id=worker_id, defaults={'experiment_count': delta}
+        )
+        if not created:
+            WorkerStats.objects.filter(pk=stats.pk).update(experiment_count=F('experiment_count') + delta)
+
+
+def _apply(stats, submission_count, total, first, last):
+    stats.submission_total += total
+    batch = str(submission_count)
+    stats.batch_counts[batch] = stats.batch_counts.get(batch, 0) + total
+    if stats.first_submission_at is None or first < stats.first_submission_at:
+        stats.first_submission_at = first
+    if stats.last_submission_at is None or last > stats.last_submission_at:
+        stats.last_submission_at = last
+
+
+def rebuild(worker_ids=None, company_id=None):
+    """由提交資料表、封存檔與實驗記錄重新計算勞工的統計，回傳更新的勞工數"""
+    workers = Worker.objects.all()
+    if worker_ids is not None:
+        workers = workers.filter(id__in=worker_ids)
+    if company_id is not None:
+        workers = workers.filter(company_id=company_id)
+    worker_companies = dict(workers.values_list('id', 'company_id'))
+    if not worker_companies:
+        return 0
+
+    stats = {worker_id: WorkerStats(worker_id=worker_id, batch_counts={}) for worker_id in worker_companies}
+
+    for worker_id, submission_count, total, first, last in FormSubmission.objects.filter(
+        worker_id__in=worker_companies
+    ).values('worker_id', 'submission_count').annotate(
+        total=Count('id'), first=Min('submission_time'), last=Max('submission_time')
+    ).values_list('worker_id', 'submission_count', 'total', 'first', 'last').order_by():
+        _apply(stats[worker_id], submission_count, total, first, last)
+
+    # 指定勞工時依封存索引只讀取這些勞工的資料，不掃描整間公司的封存檔
+    archived_workers = None if worker_ids is None else set(worker_companies)
+    for archived_company in sorted(set(worker_companies.values())):
+        for record in archive.iter_records(archived_company, worker_ids=archived_workers):
+            row = stats.get(record['worker_id'])
+            if row is not None:
+                time = record['submission_time']
+                _apply(row, record['submission_count'], 1, time, time)
+
+    for worker_id, total in Experiment.objects.filter(worker_id__in=worker_companies).values(
+        'worker_id'
+    ).annotate(total=Count('id')).values_list('worker_id', 'total').order_by():
+        stats[worker_id].experiment_count = total
+
+    fields = ['submission_total', 'batch_counts', 'experiment_count', 'first_submission_at', 'last_submission_at']
+    with transaction.atomic():
+        existing = dict(
+            WorkerStats.objects.select_for_update().filter(
+                worker_id__in=worker_companies
+            ).values_list('worker_id', 'pk')
+        )
+        updates = []
+        for worker_id, pk in existing.items():
+            row = stats.pop(worker_id)
+            row.pk = pk
+            updates.append(row)
+        WorkerStats.objects.bulk_update(updates, fields, batch_size=1000)
+        WorkerStats.objects.bulk_create(stats.values(), batch_size=1000)
+    return len(worker_companies)
@@ -0,0 +1,100 @@
+# backend/app/worker_tokens.py
+"""勞工表單連結的簽章權杖
+
+權杖以 SECRET_KEY 做 HMAC 簽章並帶有簽發時間，內容為勞工 ID、公司 ID 與勞工代碼，
+公開端點驗證權杖只需計算簽章，不必再依公司代碼與勞工代碼查詢資料庫。
+提醒訊息與 LINE 綁定回覆的表單連結會帶上權杖；沒有權杖時仍可使用 company_code + worker_code。
+"""
+from collections import namedtuple
+from datetime import timedelta
+from urllib.parse import urlencode
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+from .models import Worker
+from . import reference_cache
+
+TOKEN_SALT = 'api.worker_tokens'
+TOKEN_PARAM = 'token'
+
+# company 為 Company（來自參考資料快取）；以權杖識別時 worker_id 有值，以代碼識別時為 None
+WorkerRef = namedtuple('WorkerRef', ['company', 'worker_id', 'worker_code'])
+
+
+class WorkerRefError(Exception):
+    """無法識別勞工：message 為錯誤訊息，status 為 HTTP 狀態碼"""
+
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def issue(worker):
+    """簽發勞工的表單權杖"""
+    return signing.dumps(
+        {'w': worker.id, 'c': worker.company_id, 'k': worker.code},
+        salt=TOKEN_SALT,
+        compress=True
+    )
+
+
+def expires_at(now=None):
+    """現在簽發的權杖到期時間"""
+    return (now or timezone.now()) + timedelta(seconds=settings.WORKER_TOKEN_MAX_AGE)
+
+
+def verify(token):
+    """驗證權杖並回傳 (勞工 ID, 公司 ID, 勞工代碼)，無效或過期時拋出 WorkerRefError"""
+    try:
+        payload = signing.loads(token, salt=TOKEN_SALT, max_age=settings.WORKER_TOKEN_MAX_AGE)
+    except signing.SignatureExpired:
+        raise WorkerRefError('連結已過期，請重新取得', 403)
+    except signing.BadSignature:
+        raise WorkerRefError('無效的連結', 403)
+    try:
+        return int(payload['w']), int(payload['c']), str(payload['k'])
+    except (KeyError, TypeError, ValueError):
+        raise WorkerRefError('無效的連結', 403)
+
+
+def build_form_url(worker, company=None):
+    """表單頁連結；保留公司代碼與勞工代碼，讓尚未支援權杖的前端仍可使用"""
+    company = company or worker.company
+    query = urlencode({
+        'worker_code': worker.code,
+        'company_code': company.code,
+        TOKEN_PARAM: issue(worker),
+    })
+    return f"{settings.FRONTEND_URL}/form?{query}"
+
+
+def resolve(params):
+    """由權杖或 company_code + worker_code 識別勞工，不查詢勞工資料表
+
+    params 為 request.query_params 或 request.data，無法識別時拋出 WorkerRefError
+    """
+    token = params.get(TOKEN_PARAM)
+    if token:
+        worker_id, company_id, worker_code = verify(token)
+        company = reference_cache.get_company(company_id)
+        if company is None:
+            raise WorkerRefError('找不到該公司', 404)
+        return WorkerRef(company, worker_id, worker_code)
+
+    worker_code = params.get('worker_code')
+    company_code = params.get('company_code')
+    if not worker_code or not company_code:
+        raise WorkerRefError('缺少必要參數', 400)
+    company = reference_cache.get_company_by_code(company_code)
+    if company is None:
+        raise WorkerRefError('找不到該公司', 404)
+    return WorkerRef(company, None, worker_code)
+
+
+def get_worker(ref, queryset=None):
+    """取得參照的勞工（以權杖識別時依主鍵查詢），不存在時拋出 Worker.DoesNotExist"""
+    queryset = Worker.objects.all() if queryset is None else queryset
+    if ref.worker_id is not None:
+        return queryset.get(pk=ref.worker_id, company=ref.company)
+    return queryset.get(code=ref.worker_code, company=ref.company)
@@ -97,6 +97,58 @@ DATABASES = {
 }
 
 
+# 快取設定
+# 參考資料版本號與各種失效標記都存在這裡，正式環境必須是所有 gunicorn 與 Celery 程序共用的快取：
+# 設定 REDIS_URL 時使用與 Celery 相同的 Redis；未設定時（本機開發、測試）使用單一程序的記憶體快取
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# 表單提交寫入模式：direct 為直接寫入資料庫；queue 為先寫入 Redis Stream，
+# 立即回傳 202 與收據 ID，再由 consume_submissions 指令或 Celery 任務批次寫入
+SUBMISSION_INGEST_MODE = os.getenv('SUBMISSION_INGEST_MODE', 'direct')
+INGEST_REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+INGEST_STREAM = 'submissions:ingest'
+INGEST_GROUP = 'submission-persisters'
+INGEST_BATCH_SIZE = 500
+INGEST_CLAIM_IDLE_MS = 60000  # 待處理訊息閒置超過此毫秒數即由其他消費者接手
+INGEST_RECEIPT_TTL = 7 * 24 * 60 * 60
+
+# 參考資料快取（表單類型、公司、提醒排程）向共享快取確認版本的間隔秒數
+REFERENCE_CACHE_CHECK_INTERVAL = 1
+
+# 表單資料精簡格式：啟用後新的提交以每個表單類型的欄位字典、依位置儲存答案，
+# 既有記錄以 convert_form_data 指令（或遷移 0026 於啟用時）分批轉換
+FORM_DATA_COMPACT = os.getenv('FORM_DATA_COMPACT', 'false').lower() in ('1', 'true', 'yes')
+
+# 統計分析結果快取秒數（資料版本改變時會立即失效）
+ANALYTICS_CACHE_TIMEOUT = 600
+
+# 填寫完成率儀表板快取秒數
+COMPLIANCE_CACHE_TIMEOUT = 60
+
+# 每日排程重建提交彙總的天數（含今天）
+ROLLUP_REBUILD_DAYS = 2
+
+# 研究用 Parquet 資料集的輸出目錄
+DATASET_EXPORT_ROOT = os.environ.get('DATASET_EXPORT_ROOT', os.path.join(BASE_DIR, 'datasets'))
+
+# 表單提交封存：超過天數的記錄（以整月為單位）移到壓縮封存檔並從資料表刪除
+ARCHIVE_ROOT = os.environ.get('ARCHIVE_ROOT', os.path.join(BASE_DIR, 'archive'))
+ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', 365))
+ARCHIVE_BATCH_SIZE = 2000
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -148,7 +200,11 @@ AUTH_USER_MODEL = 'api.CustomUser'
 # CORS 設定
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
-CORS_EXPOSE_HEADERS = ['Content-Type', 'X-CSRFToken', 'Authorization']
+CORS_EXPOSE_HEADERS = [
+    'Content-Type', 'X-CSRFToken', 'Authorization', 'ETag', 'Last-Modified', 'Content-Disposition',
+    'Location', 'Upload-Offset', 'Upload-Length', 'Upload-Expires', 'Tus-Resumable',
+    'X-Sync-Since',
+]
 CORS_ALLOW_HEADERS = [
     'accept',
     'accept-encoding',
@@ -159,6 +215,13 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'idempotency-key',
+    'if-none-match',
+    'if-modified-since',
+    'upload-offset',
+    'upload-length',
+    'upload-metadata',
+    'tus-resumable',
 ]
 
 # REST Framework 設定
@@ -186,6 +249,10 @@ AUTHENTICATION_BACKENDS = [
     'django.contrib.auth.backends.ModelBackend',  # 保留預設後端
 ]
 
+# 列表 API 游標分頁設定（用戶端帶 page_size 或 cursor 參數時生效）
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 500
+
 # 檔案上傳設定
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
@@ -199,6 +266,21 @@ ALLOWED_FILE_EXTENSIONS = [
 # 最大檔案大小 (位元組)
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
 
+# 分段上傳：每個 PATCH 分段的大小上限，以及未完成的上傳保留時數（超過後由排程清除）
+UPLOAD_CHUNK_MAX_SIZE = 10 * 1024 * 1024  # 10MB
+UPLOAD_EXPIRY_HOURS = int(os.getenv('UPLOAD_EXPIRY_HOURS', 24))
+
+# 表單提交冪等鍵保留天數（超過後由排程清除）
+IDEMPOTENCY_KEY_RETENTION_DAYS = 7
+# 冪等鍵佔位超過此秒數仍未完成時視為原請求已中斷，可由重試接手
+IDEMPOTENCY_CLAIM_TIMEOUT_SECONDS = 60
+
+# 刪除記錄（墓碑）保留天數：超過後由排程清除，since 游標早於此期限的用戶端需重新取得完整資料
+DELETED_RECORD_RETENTION_DAYS = int(os.getenv('DELETED_RECORD_RETENTION_DAYS', 90))
+# 增量同步游標往前重疊的秒數：需大於最長的寫入交易（匯入批次、佇列消費者的批次寫入），
+# 交易開始後才提交的資料時間戳記早於提交時間，重疊不足時會被漏掉
+SYNC_OVERLAP_SECONDS = int(os.getenv('SYNC_OVERLAP_SECONDS', 300))
+
 ## line bot
 
 LINE_CHANNEL_ACCESS_TOKEN = os.getenv('LINE_CHANNEL_ACCESS_TOKEN')
@@ -207,6 +289,9 @@ LINE_CHANNEL_SECRET = os.getenv('LINE_CHANNEL_SECRET')
 # 前端 URL (用於生成問卷連結)
 FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:5173')
 
+# 表單連結權杖的有效秒數（預設 30 天）
+WORKER_TOKEN_MAX_AGE = int(os.getenv('WORKER_TOKEN_MAX_AGE', 30 * 24 * 60 * 60))
+
 # Celery 設定 (用於定時任務)
 CELERY_BROKER_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
@@ -242,6 +327,48 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'api.tasks.daily_status_report',
         'schedule': crontab(hour=22, minute=0),  # 晚上10點
     },
+    
+    # 清除過期的提交冪等鍵 - 每天凌晨3點
+    'purge-idempotency-keys': {
+        'task': 'api.tasks.purge_idempotency_keys',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    
+    # 清除過期的刪除記錄（墓碑） - 每天凌晨3點10分
+    'purge-deleted-records': {
+        'task': 'api.tasks.purge_deleted_records',
+        'schedule': crontab(hour=3, minute=10),
+    },
+    
+    # 重建最近幾天的每日提交彙總 - 每天凌晨3點30分
+    'rebuild-recent-rollups': {
+        'task': 'api.tasks.rebuild_recent_rollups',
+        'schedule': crontab(hour=3, minute=30),
+    },
+    
+    # 增量匯出研究用 Parquet 資料集 - 每天凌晨4點
+    'export-datasets': {
+        'task': 'api.tasks.export_datasets',
+        'schedule': crontab(hour=4, minute=0),
+    },
+    
+    # 封存超過保留期限的表單提交 - 每月1日凌晨2點
+    'archive-submissions': {
+        'task': 'api.tasks.archive_submissions',
+        'schedule': crontab(day_of_month=1, hour=2, minute=0),
+    },
+    
+    # 寫入佇列中的表單提交 - 每分鐘（僅 SUBMISSION_INGEST_MODE = 'queue' 時有作用）
+    'drain-submission-queue': {
+        'task': 'api.tasks.drain_submission_queue',
+        'schedule': crontab(minute='*'),
+    },
+    
+    # 清除逾期未完成的分段上傳 - 每小時的15分
+    'purge-stale-uploads': {
+        'task': 'api.tasks.purge_stale_uploads',
+        'schedule': crontab(minute=15),
+    },
 }
 
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
@@ -13,6 +13,7 @@ django.setup()
 
 # 導入必要的模型
 from api.models import FormType  # 修改為您實際的應用和模型名稱
+from api.form_schemas import default_schema
 from django.db import transaction
 
 # 顯示操作開始
@@ -31,6 +32,7 @@ form_types = [
         'description': '記錄睡眠時間',
         'is_required_first_time': True,
         'is_required_subsequent': True,
+        'schema': default_schema(),
     },
     {
         'id': 2,
@@ -38,6 +40,7 @@ form_types = [
         'description': '評估當前嗜睡程度',
         'is_required_first_time': True,
         'is_required_subsequent': True,
+        'schema': default_schema(),
     },
     {
         'id': 3,
@@ -45,6 +48,7 @@ form_types = [
         'description': '評估眼睛健康狀況',
         'is_required_first_time': True,
         'is_required_subsequent': True,
+        'schema': default_schema(),
     },
     {
         'id': 4,
@@ -52,6 +56,7 @@ form_types = [
         'description': '評估工作負荷程度',
         'is_required_first_time': True,
         'is_required_subsequent': True,
+        'schema': default_schema(),
     },
 ]
 
@@ -67,9 +72,10 @@ with transaction.atomic():
             # 嘗試獲取現有表單
             existing_form = FormType.objects.get(id=form_id)
             
-            # 更新現有表單
+            # 更新現有表單（schema 只在建立時設定，之後在管理介面調整的 schema 不會被覆蓋）
             for key, value in form_data.items():
-                setattr(existing_form, key, value)
+                if key != 'schema':
+                    setattr(existing_form, key, value)
             existing_form.save()
             print(f"✓ 已更新 ID={form_id} 的表單: {form_name}")
             
@@ -81,6 +87,6 @@ with transaction.atomic():
 # 驗證結果
 print("\n最終表單類型列表:")
 for form in FormType.objects.all().order_by('id'):
-    print(f"ID: {form.id}, 名稱: {form.name}, 描述: {form.description[:30]}...")
+    print(f"ID: {form.id}, 名稱: {form.name}, 描述: {form.description[:30]}..., schema 版本: {form.schema_version}")
 
 print("\n=== 表單類型設置完成 ===\n")
\ No newline at end of file